@@ -1,7 +1,19 @@
 import os
 import base64
+import csv
+import hashlib
+import json
+import re
 import requests
+import shutil
+import tarfile
+import threading
 import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Bulk mode - generate one barcode per row of a CSV/JSONL file
+bulk_mode = False  # Set to True to use the bulk function below
 
 def create_barcode():
     """
@@ -103,7 +115,247 @@ def create_barcode():
         # Other status codes - Error
         print(f"Error: {response.status_code} - {response.text}")
 
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def parse_bool(value):
+    """Interpret CSV/JSON truthy values such as true, 1, yes"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("true", "1", "yes", "y")
+
+
+def iter_barcode_rows(input_path, default_barcode_type):
+    """
+    Stream barcode rows from a CSV or JSONL file
+    Each row needs a 'text' value; 'barcodeType', 'hideText' and 'name' (output file name) are optional
+    Rows without text are reported and skipped
+    Yields (index, row) with the row normalised to {name, text, barcodeType, hideText}
+    """
+    extension = os.path.splitext(input_path)[1].lower()
+    with open(input_path, "r", encoding="utf-8", newline="") as f:
+        if extension in (".jsonl", ".ndjson"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+
+        for index, record in enumerate(records):
+            text = record.get("text")
+            if text is None or text == "":
+                print(f"Skipping row {index + 1}: no 'text' value")
+                continue
+            yield index, {
+                "name": record.get("name") or f"{index:06d}",
+                "text": str(text),
+                "barcodeType": record.get("barcodeType") or default_barcode_type,
+                "hideText": parse_bool(record.get("hideText", False))
+            }
+
+
+def barcode_cache_key(row):
+    """Content key of a barcode: identical text, type and hideText always give the same image"""
+    canonical = json.dumps([row["text"], row["barcodeType"], row["hideText"]], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def barcode_cache_path(cache_folder, key):
+    """Cached images are sharded by the first two hex digits of their key"""
+    return os.path.join(cache_folder, key[:2], key + ".png")
+
+
+def generate_barcode(api_key, url, row, cache_path):
+    """
+    Generate one barcode image and store it in the cache
+    Process: Send API request → Poll for completion → Write image to cache atomically
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    payload = {
+        "text": row["text"],                  # Text to encode in barcode
+        "barcodeType": row["barcodeType"],    # Barcode type, e.g. qrCode, code128, dataMatrix
+        "hideText": row["hideText"],          # Hide barcode text
+        "async": True                         # Enable asynchronous processing
+    }
+
+    session = get_session(api_key)
+    response = session.post(url, json=payload, timeout=120)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    # Write to a temporary name first so an interrupted run never leaves a truncated cache entry
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(temp_path, cache_path)
+
+
+def open_barcode_output(output_path, shard_size):
+    """
+    Open the destination for generated barcodes
+    output_path ending in .zip or .tar/.tar.gz writes a single archive, anything else a sharded folder tree
+    Returns (write, close): write(index, name, image_path) places one image, close() finishes the output
+    """
+    def relative_name(index, name):
+        safe_name = re.sub(r'[^A-Za-z0-9._-]+', "_", name)
+        return f"{index // shard_size:04d}/{safe_name}.png"
+
+    if output_path.lower().endswith(".zip"):
+        # PNG data is already compressed, so entries are stored as-is
+        archive = zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+        def write(index, name, image_path):
+            archive.write(image_path, relative_name(index, name))
+        return write, archive.close
+
+    if output_path.lower().endswith((".tar", ".tar.gz", ".tgz")):
+        # Stream mode writes members sequentially without seeking back
+        mode = "w|gz" if output_path.lower().endswith((".tar.gz", ".tgz")) else "w|"
+        archive = tarfile.open(output_path, mode)
+
+        def write(index, name, image_path):
+            archive.add(image_path, arcname=relative_name(index, name))
+        return write, archive.close
+
+    def write(index, name, image_path):
+        target = os.path.join(output_path, relative_name(index, name))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            os.remove(target)
+        try:
+            # Duplicates share one file on disk where the file system allows hard links
+            os.link(image_path, target)
+        except OSError:
+            shutil.copyfile(image_path, target)
+    return write, lambda: None
+
+
+def create_barcodes_bulk():
+    """
+    Generate barcodes for every row of a CSV/JSONL file
+    Process: Stream rows → Skip values already in the cache → Generate the rest concurrently → Write images to a folder tree or archive
+    Identical (text, barcodeType, hideText) rows are generated once, also across runs through the on-disk cache
+    """
+
+    # API Configuration - PDF4me service for creating barcodes
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
+    input_path = "barcodes.csv"  # CSV or JSONL with text, barcodeType, hideText (and optional name) per row
+    output_path = "Barcode_outputs"  # Folder tree, or a file name ending in .zip / .tar / .tar.gz
+    cache_folder = "barcode_cache"  # Content-keyed cache of generated images
+    failures_path = "Barcode_failures.jsonl"  # One line per row that failed
+    default_barcode_type = "qrCode"  # Used when a row has no barcodeType
+    shard_size = 1000  # Images per output sub-folder
+    max_workers = 8  # Concurrent API requests
+    url = "https://api.pdf4me.com/api/v2/CreateBarcode"
+
+    if not os.path.exists(input_path):
+        print(f"Error: Input file not found at {input_path}")
+        return
+
+    if not output_path.lower().endswith((".zip", ".tar", ".tar.gz", ".tgz")):
+        os.makedirs(output_path, exist_ok=True)
+    write_output, close_output = open_barcode_output(output_path, shard_size)
+
+    started = time.time()
+    rows_total, cache_hits, generated, api_errors, failed = 0, 0, 0, 0, 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}   # future -> cache key
+        waiting = {}   # cache key -> rows waiting for that image
+
+        def collect(done):
+            nonlocal generated, api_errors, failed
+            for future in done:
+                key = pending.pop(future)
+                rows = waiting.pop(key)
+                try:
+                    future.result()
+                    generated += 1
+                    for index, row in rows:
+                        write_output(index, row["name"], barcode_cache_path(cache_folder, key))
+                except Exception as e:
+                    api_errors += 1
+                    failed += len(rows)
+                    for index, row in rows:
+                        failures_file.write(json.dumps({"row": index + 1, "text": row["text"], "error": str(e)}) + "\n")
+                    print(f"✗ {rows[0][1]['text']!r}: {e}")
+
+        for index, row in iter_barcode_rows(input_path, default_barcode_type):
+            rows_total += 1
+            key = barcode_cache_key(row)
+            cache_path = barcode_cache_path(cache_folder, key)
+
+            if key in waiting:
+                # Same value already being generated in this run
+                waiting[key].append((index, row))
+                cache_hits += 1
+            elif os.path.exists(cache_path):
+                write_output(index, row["name"], cache_path)
+                cache_hits += 1
+            else:
+                waiting[key] = [(index, row)]
+                future = executor.submit(generate_barcode, api_key, url, row, cache_path)
+                pending[future] = key
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            if rows_total % 1000 == 0:
+                rate = rows_total / max(time.time() - started, 1e-9)
+                print(f"Progress: {rows_total} rows, {generated} generated, {cache_hits} from cache ({rate:.1f} rows/s)")
+
+        collect(list(pending))
+
+    close_output()
+
+    elapsed = max(time.time() - started, 1e-9)
+    hit_rate = cache_hits / rows_total if rows_total else 0.0
+    print(f"Bulk generation finished in {elapsed:.1f}s")
+    print(f"  Rows: {rows_total} ({rows_total / elapsed:.1f} rows/s)")
+    print(f"  API calls: {generated + api_errors} ({generated / elapsed:.1f} barcodes/s generated)")
+    print(f"  Cache hits: {cache_hits} ({hit_rate:.1%})")
+    print(f"  Failed rows: {failed}")
+    print(f"Output written to: {output_path}")
+    if failed:
+        print(f"Failed rows listed in: {failures_path}")
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Creating barcode...")
-    create_barcode()
+    if bulk_mode:
+        create_barcodes_bulk()
+    else:
+        create_barcode()
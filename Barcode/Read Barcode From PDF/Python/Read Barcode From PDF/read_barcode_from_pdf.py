@@ -1,9 +1,17 @@
 import os
 import base64
+import hashlib
 import requests
 import time
 import json
 
+# Optional page fingerprinting for the barcode page cache - install with: pip install pypdf
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+except ImportError:
+    PdfReader = None
+
 def read_barcode_from_pdf():
     """
     Read barcodes or QR codes from a PDF document using PDF4me API
@@ -15,6 +23,11 @@ def read_barcode_from_pdf():
     api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
     pdf_file_path = "sample.pdf"  # Path to the main PDF file
     output_path = "Read_barcode_output.json"  # Output file for barcode data
+    barcode_types = ["all"]  # Barcode types: ["all"], ["qrCode"], ["dataMatrix"], ["code128"], etc.
+    
+    # Page cache - only pages whose content fingerprint has not been seen before are sent for decoding
+    use_page_cache = True
+    page_cache_path = "barcode_page_cache.json"  # Decode results keyed by page fingerprint
     
     # API endpoint for reading barcodes from PDF documents
     url = "https://api.pdf4me.com/api/v2/ReadBarcodes"
@@ -34,12 +47,37 @@ def read_barcode_from_pdf():
         print(f"Error reading PDF file: {e}")
         return
 
+    # Fingerprint every page and look up pages that were already decoded
+    page_fingerprints = None
+    page_cache = {}
+    pages_to_scan = []
+    if use_page_cache:
+        page_fingerprints = compute_page_fingerprints(pdf_file_path, barcode_types)
+        if page_fingerprints:
+            page_cache = load_page_cache(page_cache_path)
+            pages_to_scan = [
+                page_number for page_number, fingerprint in enumerate(page_fingerprints, 1)
+                if fingerprint not in page_cache
+            ]
+            print(f"Page cache: {len(page_fingerprints) - len(pages_to_scan)} of {len(page_fingerprints)} pages already known")
+            
+            if not pages_to_scan:
+                # Every page is cached - build the result without calling the API
+                print("✓ All pages found in cache - skipping API request")
+                barcode_data = merge_barcode_page_cache({"barcodes": []}, page_fingerprints, pages_to_scan,
+                                                        page_cache, page_cache_path)
+                with open(output_path, "w", encoding='utf-8') as f:
+                    json.dump(barcode_data, f, indent=2, ensure_ascii=False)
+                print(f"Barcode data saved: {output_path}")
+                print(f"Found {len(barcode_data['barcodes'])} barcode(s)")
+                return
+
     # Prepare the payload (data) to send to the API
     payload = {
         "docContent": pdf_base64,                        # Base64 encoded PDF document content
         "docName": "output.pdf",                         # Output PDF file name
-        "barcodeType": ["all"],                          # Barcode types: ["all"], ["qrCode"], ["dataMatrix"], ["code128"], etc.
-        "pages": "all",                                  # Page options: "all", "1", "1,3,5", "2-5", "1,3,7-10", "2-"
+        "barcodeType": barcode_types,                    # Barcode types: ["all"], ["qrCode"], ["dataMatrix"], ["code128"], etc.
+        "pages": format_page_list(pages_to_scan) if page_fingerprints else "all",  # Page options: "all", "1", "1,3,5", "2-5", "1,3,7-10", "2-"
         "async": True                                    # Enable asynchronous processing
     }
 
@@ -67,6 +105,11 @@ def read_barcode_from_pdf():
         try:
             barcode_data = response.json() if response.content else response.text
             
+            # Cache the scanned pages and merge in the results of the cached ones
+            if page_fingerprints and isinstance(barcode_data, dict):
+                barcode_data = merge_barcode_page_cache(barcode_data, page_fingerprints, pages_to_scan,
+                                                        page_cache, page_cache_path)
+            
             # Save the barcode data to JSON file
             with open(output_path, "w", encoding='utf-8') as f:
                 if isinstance(barcode_data, dict):
@@ -127,6 +170,11 @@ def read_barcode_from_pdf():
                 try:
                     barcode_data = response_conversion.json() if response_conversion.content else response_conversion.text
                     
+                    # Cache the scanned pages and merge in the results of the cached ones
+                    if page_fingerprints and isinstance(barcode_data, dict):
+                        barcode_data = merge_barcode_page_cache(barcode_data, page_fingerprints, pages_to_scan,
+                                                                page_cache, page_cache_path)
+                    
                     # Save the barcode data to JSON file
                     with open(output_path, "w", encoding='utf-8') as f:
                         if isinstance(barcode_data, dict):
@@ -168,6 +216,114 @@ def read_barcode_from_pdf():
         # Other status codes - Error
         print(f"Error: {response.status_code} - {response.text}")
 
+def compute_page_fingerprints(pdf_file_path, barcode_types):
+    """
+    Hash each page's content stream and the resources it draws (images, forms)
+    The barcode types are part of the fingerprint so results for different type filters never mix
+    
+    Returns:
+        list: One hex fingerprint per page, or None if pypdf is not installed or the PDF cannot be parsed
+    """
+    if PdfReader is None:
+        print("pypdf not installed - page cache disabled (pip install pypdf)")
+        return None
+    
+    try:
+        reader = PdfReader(pdf_file_path)
+        fingerprints = []
+        for page in reader.pages:
+            digest = hashlib.sha256(json.dumps(barcode_types).encode('utf-8'))
+            for key in ("/Contents", "/Resources", "/MediaBox", "/CropBox", "/Rotate"):
+                digest.update(key.encode('latin-1'))
+                if key in page:
+                    hash_pdf_object(page[key], digest, set())
+            fingerprints.append(digest.hexdigest())
+        return fingerprints
+    except Exception as e:
+        print(f"Could not fingerprint pages, scanning all pages: {e}")
+        return None
+
+def hash_pdf_object(obj, digest, visited):
+    """Feed a PDF object and everything it references into the digest"""
+    if isinstance(obj, IndirectObject):
+        # Referenced objects are hashed once per page to avoid cycles
+        if obj.idnum in visited:
+            return
+        visited.add(obj.idnum)
+        obj = obj.get_object()
+    
+    if isinstance(obj, StreamObject):
+        digest.update(b"stream")
+        hash_pdf_object(DictionaryObject({k: v for k, v in obj.items() if k != "/Length"}), digest, visited)
+        digest.update(obj.get_data())
+    elif isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for key in sorted(obj.keys()):
+            if key == "/Parent":
+                continue
+            digest.update(key.encode('latin-1'))
+            hash_pdf_object(obj.raw_get(key), digest, visited)
+        digest.update(b">>")
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            hash_pdf_object(item, digest, visited)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+def format_page_list(page_numbers):
+    """Format page numbers as an API page option, e.g. [1, 3, 4, 5, 9] -> 1,3-5,9"""
+    ranges = []
+    for page_number in sorted(page_numbers):
+        if ranges and page_number == ranges[-1][1] + 1:
+            ranges[-1][1] = page_number
+        else:
+            ranges.append([page_number, page_number])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+def load_page_cache(page_cache_path):
+    """Load the fingerprint -> barcodes cache from disk"""
+    if not os.path.exists(page_cache_path):
+        return {}
+    try:
+        with open(page_cache_path, "r", encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Could not read page cache, starting empty: {e}")
+        return {}
+
+def merge_barcode_page_cache(barcode_data, page_fingerprints, scanned_pages, page_cache, page_cache_path):
+    """
+    Store the decode results of the scanned pages and merge in cached results for all other pages
+    Process: Group API barcodes by page → Cache per fingerprint (including pages without barcodes) → Rebuild full list by page number
+    """
+    # Pages without barcodes are cached too, so blank cover/separator sheets are never re-sent
+    barcodes_by_page = {page_number: [] for page_number in scanned_pages}
+    for barcode in barcode_data.get('barcodes') or []:
+        page_number = barcode.get('page')
+        if page_number in barcodes_by_page:
+            barcodes_by_page[page_number].append({k: v for k, v in barcode.items() if k != 'page'})
+    
+    for page_number, barcodes in barcodes_by_page.items():
+        page_cache[page_fingerprints[page_number - 1]] = barcodes
+    
+    try:
+        with open(page_cache_path, "w", encoding='utf-8') as f:
+            json.dump(page_cache, f)
+    except Exception as e:
+        print(f"Could not save page cache: {e}")
+    
+    # Rebuild the result for the whole document, ordered by page number
+    merged_barcodes = []
+    for page_number, fingerprint in enumerate(page_fingerprints, 1):
+        for barcode in page_cache.get(fingerprint, []):
+            merged_barcodes.append(dict(barcode, page=page_number))
+    
+    merged = dict(barcode_data)
+    merged['barcodes'] = merged_barcodes
+    return merged
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Reading barcodes from PDF...")
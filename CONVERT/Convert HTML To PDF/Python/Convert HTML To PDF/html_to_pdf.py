@@ -1,7 +1,21 @@
 import requests
 import base64
 import os
+import re
+import json
 import time
+import zlib
+import struct
+import hashlib
+import posixpath
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, unquote
+
+# Batch mode - pack each HTML file with its CSS, fonts and images into a ZIP bundle and convert a whole folder
+batch_mode = False  # Set to True to use the batch function below
 
 def convert_html_to_pdf():
     """
@@ -182,10 +196,338 @@ def convert_html_to_pdf():
         print(f"Response text: {response.text}")
         return
 
+# Already-compressed formats are stored in the bundle without deflate
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff", ".woff2", ".zip", ".gz", ".pdf"}
+
+# Every ZIP entry gets the same timestamp (1980-01-01 00:00), so identical inputs give byte-identical bundles
+ZIP_DOS_TIME = 0
+ZIP_DOS_DATE = (1 << 5) | 1
+
+# url(...) and @import "..." references in CSS
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""", re.IGNORECASE)
+CSS_IMPORT = re.compile(r"""@import\s+(['"])([^'"]+)\1""", re.IGNORECASE)
+
+# Link relations that point at files the renderer loads
+ASSET_LINK_RELS = {"stylesheet", "icon", "preload", "shortcut"}
+
+def css_references(css_text):
+    """Return the url(...) and @import targets of a stylesheet"""
+    return [match.group(2).strip() for pattern in (CSS_URL, CSS_IMPORT) for match in pattern.finditer(css_text)]
+
+class AssetReferenceParser(HTMLParser):
+    """Collect the asset references of an HTML page: stylesheets, scripts, images and url(...) in inline CSS"""
+
+    def __init__(self):
+        super().__init__()
+        self.references = []
+        self.in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "style":
+            self.in_style = True
+        if tag == "link":
+            if ASSET_LINK_RELS & set((attrs.get("rel") or "").lower().split()) and attrs.get("href"):
+                self.references.append(attrs["href"])
+        for name in ("src", "poster", "data", "background"):
+            if attrs.get(name):
+                self.references.append(attrs[name])
+        if attrs.get("srcset"):
+            self.references.extend(candidate.split()[0] for candidate in attrs["srcset"].split(",") if candidate.strip())
+        if attrs.get("style"):
+            self.references.extend(css_references(attrs["style"]))
+
+    def handle_endtag(self, tag):
+        if tag == "style":
+            self.in_style = False
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.references.extend(css_references(data))
+
+def resolve_reference(referrer_path, reference):
+    """
+    Resolve a reference found in referrer_path to a path inside the bundle root
+    Returns None for remote URLs, data URIs, fragments and paths that leave the bundle root
+    """
+    parts = urlsplit(reference)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        resolved = posixpath.normpath(path.lstrip("/"))
+    else:
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(referrer_path), path))
+    if resolved.startswith("..") or resolved == ".":
+        return None
+    return resolved
+
+def zip_entry_records(name, entry, offset):
+    """Return the local header and central directory record of a ZIP entry stored at offset"""
+    method, crc, size, data = entry
+    encoded_name = name.encode("utf-8")
+    local_header = struct.pack(
+        "<IHHHHHIIIHH", 0x04034b50, 20, 0x0800, method, ZIP_DOS_TIME, ZIP_DOS_DATE,
+        crc, len(data), size, len(encoded_name), 0) + encoded_name
+    central_record = struct.pack(
+        "<IHHHHHHIIIHHHHHII", 0x02014b50, 0x0314, 20, 0x0800, method, ZIP_DOS_TIME, ZIP_DOS_DATE,
+        crc, len(data), size, len(encoded_name), 0, 0, 0, 0, 0o100644 << 16, offset) + encoded_name
+    return local_header, central_record
+
+def compress_zip_entry(name, content):
+    """Compress file content for a ZIP entry: (method, crc32, uncompressed size, data)"""
+    if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+        return 0, zlib.crc32(content), len(content), content
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return 8, zlib.crc32(content), len(content), compressor.compress(content) + compressor.flush()
+
+def make_bundle_packer(bundle_root, max_cached_bundles=32):
+    """
+    Return (pack, stats) for HTML files under bundle_root
+    pack(html_path, body_file) writes the base64 of a deterministic ZIP bundle of the HTML file and every
+    local asset it references (recursively through CSS) into body_file
+
+    Caching across a batch:
+    - Assets are read, hashed and compressed once per content hash, so shared fonts and logos cost nothing after the first use
+    - The packed asset part of a bundle, including its base64 encoding, is cached per asset set. Assets are written
+      first and the HTML entry last, so a statement whose data changed but whose assets did not only encodes its own HTML
+    """
+    lock = threading.Lock()
+    file_info = {}     # relative path -> (mtime, size, content hash, references of CSS files)
+    asset_store = {}   # content hash -> compressed ZIP entry
+    bundle_cache = {}  # asset set hash -> (base64 of the aligned prefix, remaining bytes, central records, size)
+    stats = {"bundles_built": 0, "bundles_reused": 0, "assets_compressed": 0, "missing_assets": set()}
+
+    def get_file_info(path):
+        full_path = os.path.join(bundle_root, path)
+        try:
+            file_stat = os.stat(full_path)
+        except OSError:
+            return None
+        cached = file_info.get(path)
+        if cached and cached[:2] == (file_stat.st_mtime_ns, file_stat.st_size):
+            return cached
+
+        with open(full_path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        references = []
+        if path.lower().endswith(".css"):
+            references = [resolve_reference(path, ref) for ref in css_references(content.decode("utf-8", "replace"))]
+        info = (file_stat.st_mtime_ns, file_stat.st_size, digest, [ref for ref in references if ref])
+        with lock:
+            file_info[path] = info
+            if digest not in asset_store:
+                asset_store[digest] = compress_zip_entry(path, content)
+                stats["assets_compressed"] += 1
+        return info
+
+    def collect_assets(html_path, html_text):
+        parser = AssetReferenceParser()
+        parser.feed(html_text)
+        stack = [ref for ref in (resolve_reference(html_path, r) for r in parser.references) if ref]
+        assets = {}
+        while stack:
+            path = stack.pop()
+            if path in assets or path == html_path:
+                continue
+            info = get_file_info(path)
+            if info is None:
+                with lock:
+                    stats["missing_assets"].add(path)
+                continue
+            assets[path] = info[2]
+            stack.extend(info[3])
+        return sorted(assets.items())
+
+    def get_packed_assets(assets):
+        key = hashlib.sha256(json.dumps(assets).encode("utf-8")).hexdigest()
+        with lock:
+            cached = bundle_cache.get(key)
+            if cached is not None:
+                stats["bundles_reused"] += 1
+                return cached
+
+        local_parts, central_records, offset = [], [], 0
+        for path, digest in assets:
+            entry = asset_store[digest]
+            local_header, central_record = zip_entry_records(path, entry, offset)
+            local_parts.extend((local_header, entry[3]))
+            central_records.append(central_record)
+            offset += len(local_header) + len(entry[3])
+        blob = b"".join(local_parts)
+        # base64 of a concatenation only equals the concatenated base64 at 3-byte boundaries
+        aligned = len(blob) - len(blob) % 3
+        packed = (base64.b64encode(blob[:aligned]), blob[aligned:], central_records, len(blob))
+
+        with lock:
+            stats["bundles_built"] += 1
+            if len(bundle_cache) >= max_cached_bundles:
+                bundle_cache.pop(next(iter(bundle_cache)))
+            bundle_cache[key] = packed
+        return packed
+
+    def pack(html_path, body_file):
+        with open(os.path.join(bundle_root, html_path), "rb") as f:
+            html_content = f.read()
+        assets = collect_assets(html_path, html_content.decode("utf-8", "replace"))
+        encoded_prefix, remainder, central_records, offset = get_packed_assets(assets)
+
+        html_zip_entry = compress_zip_entry(html_path, html_content)
+        local_header, central_record = zip_entry_records(html_path, html_zip_entry, offset)
+        html_entry = local_header + html_zip_entry[3]
+        central_directory = b"".join(central_records) + central_record
+        end_record = struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, len(assets) + 1, len(assets) + 1,
+                                 len(central_directory), offset + len(html_entry), 0)
+
+        body_file.write(encoded_prefix)
+        body_file.write(base64.b64encode(remainder + html_entry + central_directory + end_record))
+        return len(assets)
+
+    return pack, stats
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+def convert_html_bundle(api_key, url, html_path, output_path, pack, static_fragment):
+    """
+    Convert one HTML file with its assets
+    Process: Pack the ZIP bundle straight into a base64 request body on disk → Upload it → Poll for completion → Save PDF
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    body_prefix = ('{"docName":' + json.dumps(os.path.basename(output_path)) +
+                   ',"indexFilePath":' + json.dumps(html_path) + ',' + static_fragment + ',"docContent":"')
+    session = get_session(api_key)
+
+    with tempfile.TemporaryFile() as body_file:
+        body_file.write(body_prefix.encode("utf-8"))
+        pack(html_path, body_file)
+        body_file.write(b'"}')
+        body_file.seek(0)
+        response = session.post(url, data=body_file, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(response.content)
+
+def convert_html_batch_to_pdfs():
+    """
+    Convert every HTML file in a folder, each packed with the CSS, fonts and images it references
+    Process: Walk each page's asset graph → Build a deterministic ZIP bundle → Stream it base64-encoded into the request → Save PDF
+    Shared assets are compressed once per batch and the packed asset part is reused while only the HTML data changes
+    """
+
+    # API Configuration - PDF4Me service for converting HTML to PDF documents
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
+    input_folder = "statements"  # Bundle root: HTML files plus the assets they reference (e.g. statements/assets/...)
+    output_folder = "HTML_to_PDF_outputs"  # One PDF per HTML file, same relative paths
+    failures_path = "HTML_to_PDF_failures.jsonl"  # One line per HTML file that failed
+    max_workers = 8  # Concurrent API requests
+    url = "https://api.pdf4me.com/api/v2/ConvertHtmlToPdf"
+
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    # Conversion options shared by every request, serialised once
+    static_fragment = json.dumps({
+        "layout": "Portrait",             # Page orientation: Portrait or Landscape
+        "format": "A4",                   # Page size: A4, Letter, A5, A6, etc.
+        "scale": 0.8,                     # Scaling factor for content (0.1 to 2.0)
+        "topMargin": "40px",              # Top margin spacing
+        "bottomMargin": "40px",           # Bottom margin spacing
+        "leftMargin": "40px",             # Left margin spacing
+        "rightMargin": "40px",            # Right margin spacing
+        "printBackground": True,          # Include background colors and images
+        "displayHeaderFooter": True,      # Show header and footer in PDF
+        "async": True                     # Enable asynchronous processing
+    }, separators=(",", ":"))[1:-1]
+
+    pack, stats = make_bundle_packer(input_folder)
+
+    def iter_html_files():
+        for folder, _, file_names in os.walk(input_folder):
+            for file_name in sorted(file_names):
+                if file_name.lower().endswith((".html", ".htm")):
+                    yield os.path.relpath(os.path.join(folder, file_name), input_folder).replace(os.sep, "/")
+
+    started = time.time()
+    converted, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}
+
+        def collect(done):
+            nonlocal converted, failed
+            for future in done:
+                html_path = pending.pop(future)
+                try:
+                    future.result()
+                    converted += 1
+                except Exception as e:
+                    failed += 1
+                    failures_file.write(json.dumps({"file": html_path, "error": str(e)}) + "\n")
+                    print(f"✗ {html_path}: {e}")
+
+        for html_path in iter_html_files():
+            output_path = os.path.join(output_folder, os.path.splitext(html_path)[0] + ".pdf")
+            future = executor.submit(convert_html_bundle, api_key, url, html_path, output_path, pack, static_fragment)
+            pending[future] = html_path
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s: {converted} converted, {failed} failed")
+    print(f"  Unique assets compressed: {stats['assets_compressed']}, "
+          f"bundles packed: {stats['bundles_built']}, reused: {stats['bundles_reused']}")
+    if stats["missing_assets"]:
+        print(f"  Referenced files not found: {', '.join(sorted(stats['missing_assets']))}")
+    if failed:
+        print(f"Failed files listed in: {failures_path}")
+
 # Main execution - Run the conversion when script is executed directly
 if __name__ == "__main__":
-    print("Starting HTML to PDF Conversion Process...")
-    print("This converts HTML web content into PDF documents")
-    print("Preserves styling, layout, images, and formatting")
-    print("-" * 60)
-    convert_html_to_pdf()
+    if batch_mode:
+        convert_html_batch_to_pdfs()
+    else:
+        print("Starting HTML to PDF Conversion Process...")
+        print("This converts HTML web content into PDF documents")
+        print("Preserves styling, layout, images, and formatting")
+        print("-" * 60)
+        convert_html_to_pdf()
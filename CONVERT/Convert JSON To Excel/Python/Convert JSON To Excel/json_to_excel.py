@@ -1,7 +1,19 @@
 import base64
+import csv
+import datetime
+import decimal
 import requests
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+# Excel worksheets hold at most 1,048,576 rows (including the title row)
+EXCEL_MAX_ROWS = 1048576
+
+# Streaming mode - convert large JSONL/CSV/Parquet sources in sheet-sized batches
+streaming_mode = False  # Set to True to use convert_records_to_excel_batched()
 
 
 def convert_json_to_excel():
@@ -88,5 +100,220 @@ def convert_json_to_excel():
         print(f"Response text: {response.text}")
         return
 
+
+def iter_records(source_path):
+    """
+    Stream records one at a time from a JSONL, CSV, Parquet or JSON array file
+    Only Parquet needs an extra package (pyarrow); it is read one row group batch at a time
+    """
+    extension = os.path.splitext(source_path)[1].lower()
+
+    if extension in (".jsonl", ".ndjson"):
+        with open(source_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == ".csv":
+        with open(source_path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    elif extension == ".parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source_path)
+        for record_batch in parquet_file.iter_batches(batch_size=10000):
+            yield from record_batch.to_pylist()
+    else:
+        # Plain JSON arrays have to be loaded as a whole
+        with open(source_path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+def iter_batches(records, batch_size):
+    """Group a record stream into lists of at most batch_size records"""
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def json_default(value):
+    """
+    Serialise values that Parquet/Arrow rows contain but json cannot encode
+    Dates and times become ISO 8601 strings; decimals keep their exact digits as strings
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def convert_batch_to_excel(records, worksheet_name, first_row, output_path, api_url, headers):
+    """
+    Convert one batch of records with ConvertJsonToExcel and save the workbook
+    Returns the output path on success, None otherwise
+    """
+    json_base64 = base64.b64encode(json.dumps(records, default=json_default).encode('utf-8')).decode('utf-8')
+
+    payload = {
+        "docContent": json_base64,           # Base64 encoded JSON content of this batch only
+        "docName": "output",                 # Output file name
+        "worksheetName": worksheet_name,     # One worksheet per batch
+        "isTitleWrapText": True,             # Wrap text in title cells (True/False)
+        "isTitleBold": True,                 # Bold title row (True/False)
+        "convertNumberAndDate": False,       # Auto-convert numbers and dates (True/False)
+        "numberFormat": "11",                # Number format code (0-49)
+        "dateFormat": "01/01/2025",          # Date format pattern
+        "ignoreNullValues": False,           # Ignore null values (True/False)
+        "firstRow": first_row,               # Starting row number (1-based)
+        "firstColumn": 1,                    # Starting column number (1-based)
+        "async": True                        # Enable asynchronous processing
+    }
+
+    response = requests.post(api_url, json=payload, headers=headers, verify=False, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            print(f"{worksheet_name}: No 'Location' header found in the response.")
+            return None
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10  # seconds
+
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = requests.get(location_url, headers=headers, verify=False, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            print(f"{worksheet_name}: Timeout - conversion did not complete after multiple retries.")
+            return None
+
+    if response.status_code != 200:
+        print(f"{worksheet_name}: Conversion failed. Status code: {response.status_code}")
+        print(f"Response text: {response.text}")
+        return None
+
+    with open(output_path, "wb") as f:
+        f.write(response.content)
+    return output_path
+
+
+def merge_workbooks(part_paths, output_path):
+    """
+    Combine the per-batch workbooks into one workbook with one sheet per batch
+    Uses openpyxl in read-only/write-only mode so rows are copied without loading whole sheets.
+    Cell styles (title formatting, number formats) are copied along with the values; column widths are not
+    """
+    from openpyxl import Workbook, load_workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    merged = Workbook(write_only=True)
+    for part_path in part_paths:
+        part = load_workbook(part_path, read_only=True)
+        for source_sheet in part.worksheets:
+            target_sheet = merged.create_sheet(title=source_sheet.title)
+
+            # Most cells share a few styles: resolve each source style once
+            styles = {}
+            for row in source_sheet.iter_rows():
+                target_row = []
+                for cell in row:
+                    if not hasattr(cell, "style_array") or not cell.has_style:
+                        target_row.append(cell.value)
+                        continue
+                    style_key = tuple(cell.style_array)
+                    if style_key not in styles:
+                        styles[style_key] = (cell.font, cell.fill, cell.border, cell.alignment,
+                                             cell.number_format, cell.protection)
+                    target_cell = WriteOnlyCell(target_sheet, value=cell.value)
+                    (target_cell.font, target_cell.fill, target_cell.border, target_cell.alignment,
+                     target_cell.number_format, target_cell.protection) = styles[style_key]
+                    target_row.append(target_cell)
+                target_sheet.append(target_row)
+        part.close()
+    merged.save(output_path)
+
+
+def convert_records_to_excel_batched():
+    api_url = "https://api.pdf4me.com/api/v2/ConvertJsonToExcel"
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
+    source_path = "rows.jsonl"               # JSONL, CSV or Parquet source file
+    output_folder = "JSON_to_EXCEL_batches"  # Folder for the per-batch workbooks
+    merged_output_path = "JSON_to_EXCEL_output.xlsx"  # Combined workbook (requires openpyxl)
+    merge_parts = True                       # Combine the batch workbooks into one multi-sheet workbook
+
+    first_row = 1                            # Starting row number (1-based), same as the single-shot sample
+    rows_per_batch = 50000                   # Records per API call / worksheet
+    max_workers = 4                          # Concurrent conversions
+
+    # A batch must fit on one worksheet below firstRow, leaving one row for the titles
+    sheet_capacity = EXCEL_MAX_ROWS - (first_row - 1) - 1
+    batch_size = min(rows_per_batch, sheet_capacity)
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Basic {api_key}"
+    }
+
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"Converting {source_path} in batches of {batch_size} records with {max_workers} workers...")
+
+    part_paths = {}
+    failed_batches = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for number, batch in enumerate(iter_batches(iter_records(source_path), batch_size), 1):
+            worksheet_name = f"Sheet{number}"
+            part_path = os.path.join(output_folder, f"output_part_{number:04d}.xlsx")
+            future = executor.submit(
+                convert_batch_to_excel, batch, worksheet_name, first_row, part_path, api_url, headers
+            )
+            pending[future] = number
+
+            # Keep at most two batches per worker in memory
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for finished in done:
+                    collect_batch_result(finished, pending.pop(finished), part_paths, failed_batches)
+
+        for finished in list(pending):
+            collect_batch_result(finished, pending.pop(finished), part_paths, failed_batches)
+
+    print(f"Converted {len(part_paths)} batches, {len(failed_batches)} failed")
+    if failed_batches:
+        print(f"Failed batches: {sorted(failed_batches)}")
+
+    if merge_parts and part_paths and not failed_batches:
+        try:
+            merge_workbooks([part_paths[number] for number in sorted(part_paths)], merged_output_path)
+            print(f"Excel file saved successfully at:\n{merged_output_path}")
+        except ImportError:
+            print("openpyxl not installed - batch workbooks kept as separate files (pip install openpyxl)")
+
+
+def collect_batch_result(future, number, part_paths, failed_batches):
+    """Record the outcome of one finished batch conversion"""
+    try:
+        part_path = future.result()
+    except Exception as e:
+        print(f"Sheet{number}: Error during conversion: {e}")
+        part_path = None
+
+    if part_path:
+        part_paths[number] = part_path
+        print(f"Sheet{number} saved: {part_path}")
+    else:
+        failed_batches.append(number)
+
 if __name__ == "__main__":
-    convert_json_to_excel()
+    if streaming_mode:
+        convert_records_to_excel_batched()
+    else:
+        convert_json_to_excel()
@@ -1,7 +1,18 @@
 import requests
 import base64
 import os
+import re
+import json
 import time
+import hashlib
+import zipfile
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit, unquote
+
+# Docs-site mode - convert a whole Markdown tree, shipped once as a ZIP bundle with its images
+docs_site_mode = False  # Set to True to use the docs-site function below
 
 def convert_markdown_to_pdf():
     """
@@ -176,11 +187,280 @@ def convert_markdown_to_pdf():
         print(f"Response text: {response.text}")
         return
 
+# Images and links in Markdown: ![alt](path "title"), [text](path), reference definitions and <img src="...">
+MD_INLINE_TARGET = re.compile(r"""!?\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+(?:"[^"]*"|'[^']*'|\([^)]*\)))?\s*\)""")
+MD_REFERENCE_DEFINITION = re.compile(r"""^\s{0,3}\[[^\]]+\]:\s*<?([^\s>]+)>?""", re.MULTILINE)
+HTML_IMG_SRC = re.compile(r"""<img\b[^>]*\bsrc\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+# Markdown entry files converted to one PDF each
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+
+# Every bundle entry gets the same timestamp, so identical inputs give byte-identical bundles
+ZIP_FIXED_DATE = (1980, 1, 1, 0, 0, 0)
+
+def resolve_md_reference(entry_path, reference):
+    """
+    Resolve a link target found in entry_path to a path inside the docs root
+    Returns None for remote URLs, anchors and paths that leave the docs root
+    """
+    parts = urlsplit(reference)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if path.startswith("/"):
+        resolved = posixpath.normpath(path.lstrip("/"))
+    else:
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(entry_path), path))
+    if resolved.startswith("..") or resolved == ".":
+        return None
+    return resolved
+
+def find_md_dependencies(docs_root, entry_path, md_text):
+    """
+    List the local files a Markdown entry embeds or links to (images, attachments), excluding other Markdown pages
+    Only files that exist under docs_root are returned
+    """
+    references = (MD_INLINE_TARGET.findall(md_text) + MD_REFERENCE_DEFINITION.findall(md_text) +
+                  HTML_IMG_SRC.findall(md_text))
+    dependencies = set()
+    for reference in references:
+        path = resolve_md_reference(entry_path, reference)
+        if (path and not path.lower().endswith(MARKDOWN_EXTENSIONS)
+                and os.path.isfile(os.path.join(docs_root, path))):
+            dependencies.add(path)
+    return sorted(dependencies)
+
+def file_sha256(file_path):
+    """SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_build_manifest(manifest_path):
+    """Return entry path -> dependency hash of outputs built by earlier runs"""
+    built = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                built[entry["entry"]] = entry["hash"]
+    return built
+
+class Base64StreamWriter:
+    """Write-only stream that base64-encodes everything written to it, so a ZIP can be encoded while it is built"""
+
+    def __init__(self):
+        self.chunks = []
+        self.pending = b""
+
+    def write(self, data):
+        size = len(data)
+        data = self.pending + bytes(data)
+        aligned = len(data) - len(data) % 3
+        self.chunks.append(base64.b64encode(data[:aligned]))
+        self.pending = data[aligned:]
+        return size
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return b"".join(self.chunks) + base64.b64encode(self.pending)
+
+def build_md_bundle(docs_root, paths):
+    """
+    Build a deterministic ZIP of the given docs-root paths, base64-encoded while it is written
+    Entries are sorted and carry a fixed timestamp; images are stored, text is deflated
+
+    Returns:
+        bytes: Base64 of the ZIP bundle
+    """
+    encoder = Base64StreamWriter()
+    with zipfile.ZipFile(encoder, "w") as bundle:
+        for path in sorted(paths):
+            info = zipfile.ZipInfo(path, date_time=ZIP_FIXED_DATE)
+            info.external_attr = 0o100644 << 16
+            info.compress_type = (zipfile.ZIP_DEFLATED if path.lower().endswith(MARKDOWN_EXTENSIONS + (".svg", ".txt"))
+                                  else zipfile.ZIP_STORED)
+            with open(os.path.join(docs_root, path), "rb") as source, bundle.open(info, "w") as target:
+                for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                    target.write(chunk)
+    return encoder.getvalue()
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+def convert_md_entry(api_key, url, entry_path, output_path, bundle_base64, static_fragment):
+    """
+    Convert one entry of the shared bundle
+    Process: Splice entry path and cached bundle into the request body → Send API request → Poll for completion → Save PDF
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    # The bundle is encoded once; every entry reuses the same bytes
+    body = b"".join((
+        ('{"docName":' + json.dumps(os.path.basename(entry_path)) +
+         ',"mdFilePath":' + json.dumps(entry_path) + ',' + static_fragment + ',"docContent":"').encode("utf-8"),
+        bundle_base64,
+        b'"}'
+    ))
+
+    session = get_session(api_key)
+    response = session.post(url, data=body, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(response.content)
+
+def convert_docs_site_to_pdfs():
+    """
+    Convert every Markdown file of a docs tree to PDF, one ConvertMdToPdf request per entry file
+    Process: Hash each entry with its images → Skip entries unchanged since the last run → Bundle the rest into one ZIP → Convert entries in parallel
+    The bundle is built and base64-encoded once and kept in memory; every request reuses the same bytes with its own mdFilePath
+    """
+
+    # API Configuration - PDF4Me service for converting Markdown to PDF documents
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
+    docs_root = "docs"  # Root of the Markdown tree; images are resolved relative to each page
+    output_folder = "Docs_PDF_outputs"  # One PDF per Markdown file, same relative paths
+    manifest_path = "Docs_build_manifest.jsonl"  # Entry -> dependency hash of every built PDF
+    failures_path = "Docs_failures.jsonl"  # One line per entry that failed
+    max_workers = 4  # Concurrent API requests
+    url = "https://api.pdf4me.com/api/v2/ConvertMdToPdf"
+
+    if not os.path.isdir(docs_root):
+        print(f"Error: Docs folder not found at {docs_root}")
+        return
+
+    # Options shared by every request, serialised once; they are part of every dependency hash
+    static_fragment = json.dumps({
+        "async": True               # Enable asynchronous processing
+    }, separators=(",", ":"))[1:-1]
+
+    entries = []
+    for folder, _, file_names in os.walk(docs_root):
+        for file_name in file_names:
+            if file_name.lower().endswith(MARKDOWN_EXTENSIONS):
+                entries.append(os.path.relpath(os.path.join(folder, file_name), docs_root).replace(os.sep, "/"))
+    entries.sort()
+
+    # Dependency hash: entry content + every embedded file + conversion options
+    asset_hashes = {}
+    dependencies, dependency_hashes = {}, {}
+    for entry_path in entries:
+        with open(os.path.join(docs_root, entry_path), "rb") as f:
+            md_content = f.read()
+        dependencies[entry_path] = find_md_dependencies(docs_root, entry_path, md_content.decode("utf-8", "replace"))
+        digest = hashlib.sha256(md_content)
+        digest.update(static_fragment.encode("utf-8"))
+        for path in dependencies[entry_path]:
+            if path not in asset_hashes:
+                asset_hashes[path] = file_sha256(os.path.join(docs_root, path))
+            digest.update(f"\0{path}\0{asset_hashes[path]}".encode("utf-8"))
+        dependency_hashes[entry_path] = digest.hexdigest()
+
+    built = load_build_manifest(manifest_path)
+
+    def output_path_for(entry_path):
+        return os.path.join(output_folder, os.path.splitext(entry_path)[0] + ".pdf")
+
+    to_build = [
+        entry_path for entry_path in entries
+        if built.get(entry_path) != dependency_hashes[entry_path] or not os.path.exists(output_path_for(entry_path))
+    ]
+    print(f"{len(entries)} Markdown files, {len(entries) - len(to_build)} up to date, {len(to_build)} to convert")
+    if not to_build:
+        return
+
+    # Only the entries being rebuilt and the files they embed go into the bundle
+    bundle_paths = set(to_build)
+    for entry_path in to_build:
+        bundle_paths.update(dependencies[entry_path])
+    bundle_base64 = build_md_bundle(docs_root, bundle_paths)
+    print(f"Bundle built once: {len(bundle_paths)} files, {len(bundle_base64)} bytes base64")
+
+    started = time.time()
+    converted, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(manifest_path, "a", encoding="utf-8") as manifest, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}
+
+        def collect(done):
+            nonlocal converted, failed
+            for future in done:
+                entry_path = pending.pop(future)
+                try:
+                    future.result()
+                    converted += 1
+                    manifest.write(json.dumps({"entry": entry_path, "hash": dependency_hashes[entry_path]}) + "\n")
+                except Exception as e:
+                    failed += 1
+                    failures_file.write(json.dumps({"entry": entry_path, "error": str(e)}) + "\n")
+                    print(f"✗ {entry_path}: {e}")
+            manifest.flush()
+
+        for entry_path in to_build:
+            future = executor.submit(convert_md_entry, api_key, url, entry_path, output_path_for(entry_path),
+                                     bundle_base64, static_fragment)
+            pending[future] = entry_path
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Docs site finished in {elapsed:.1f}s: {converted} converted, {failed} failed")
+    print(f"PDFs saved in: {output_folder}")
+    if failed:
+        print(f"Failed entries listed in: {failures_path}")
+
 # Main execution - Run the conversion when script is executed directly
 if __name__ == "__main__":
-    print("Starting Markdown to PDF Conversion Process...")
-    print("This converts Markdown documents into formatted PDF files")
-    print("Preserves headers, lists, code blocks, links, and text formatting")
-    print("Perfect for documentation, README files, and technical writing")
-    print("-" * 70)
-    convert_markdown_to_pdf()
+    if docs_site_mode:
+        convert_docs_site_to_pdfs()
+    else:
+        print("Starting Markdown to PDF Conversion Process...")
+        print("This converts Markdown documents into formatted PDF files")
+        print("Preserves headers, lists, code blocks, links, and text formatting")
+        print("Perfect for documentation, README files, and technical writing")
+        print("-" * 70)
+        convert_markdown_to_pdf()
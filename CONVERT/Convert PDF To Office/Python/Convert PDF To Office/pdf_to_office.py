@@ -0,0 +1,198 @@
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+# API Configuration - PDF4Me services for converting PDF documents to Office formats
+api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
+base_url = "https://api.pdf4me.com/"
+
+# Supported target formats: API endpoint and extension of the converted file
+TARGETS = {
+    "word": {"endpoint": "ConvertPdfToWord", "extension": ".docx"},
+    "excel": {"endpoint": "ConvertPdfToExcel", "extension": ".xlsx"},
+    "powerpoint": {"endpoint": "ConvertPdfToPowerPoint", "extension": ".pptx"},
+}
+
+# Conversion options shared by all three endpoints
+CONVERSION_OPTIONS = {
+    "qualityType": "Draft",      # Quality setting: Draft (faster) or Quality (better accuracy)
+    "language": "English",       # OCR language for text recognition in images/scanned PDFs
+    "ocrWhenNeeded": True,       # Use OCR (Optical Character Recognition) for scanned PDFs
+    "outputFormat": True,        # Preserve original formatting when possible
+    "mergeAllSheets": True,      # Word: single document flow, Excel: one sheet, PowerPoint: one slide sequence
+    "async": True                # Enable asynchronous processing
+}
+
+
+def build_request_body(pdf_path, options_fragment):
+    """
+    Read and encode a PDF once into a complete JSON request body
+    The body is identical for every target format, so the same bytes are posted to each endpoint
+    """
+    with open(pdf_path, "rb") as f:
+        pdf_base64 = base64.b64encode(f.read())
+    return b"".join((
+        ('{"docName":' + json.dumps(os.path.basename(pdf_path)) + ',' + options_fragment + ',"docContent":"').encode("utf-8"),
+        pdf_base64,
+        b'"}'
+    ))
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def convert_to_target(body, target, output_path):
+    """
+    Post a prepared request body to one conversion endpoint
+    Process: Send API request → Poll for completion → Save the converted file
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    session = get_session()
+    response = session.post(f"{base_url}api/v2/{TARGETS[target]['endpoint']}", data=body, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(response.content)
+    return len(response.content)
+
+
+def iter_pdf_files(input_path):
+    """Yield (pdf path, path relative to the input) for a single PDF or every PDF under a folder"""
+    if os.path.isfile(input_path):
+        yield input_path, os.path.basename(input_path)
+        return
+    for folder, _, file_names in os.walk(input_path):
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(".pdf"):
+                pdf_path = os.path.join(folder, file_name)
+                yield pdf_path, os.path.relpath(pdf_path, input_path)
+
+
+def run_multi_target_conversion(input_path, targets, output_folder, report_path, max_workers):
+    """
+    Convert one PDF or a folder of PDFs to several Office formats
+    Each PDF is read and encoded once; its conversions to all targets run concurrently in a bounded worker pool,
+    and every result is saved and reported as soon as it completes
+    """
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        raise ValueError(f"Unknown target(s) {', '.join(unknown)}, expected: {', '.join(TARGETS)}")
+
+    options_fragment = json.dumps(CONVERSION_OPTIONS, separators=(",", ":"))[1:-1]
+
+    started = time.time()
+    converted, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(report_path, "w", encoding="utf-8") as report:
+        pending = {}  # future -> (relative path, target, output path)
+
+        def collect(done):
+            nonlocal converted, failed
+            for future in done:
+                relative_path, target, output_path = pending.pop(future)
+                entry = {"file": relative_path, "target": target}
+                try:
+                    entry["size"] = future.result()
+                    entry["output"] = output_path
+                    converted += 1
+                    print(f"✓ {relative_path} → {output_path}")
+                except Exception as e:
+                    entry["error"] = str(e)
+                    failed += 1
+                    print(f"✗ {relative_path} ({target}): {e}")
+                report.write(json.dumps(entry) + "\n")
+            report.flush()
+
+        for pdf_path, relative_path in iter_pdf_files(input_path):
+            try:
+                body = build_request_body(pdf_path, options_fragment)
+            except OSError as e:
+                failed += len(targets)
+                report.write(json.dumps({"file": relative_path, "error": str(e)}) + "\n")
+                print(f"✗ {relative_path}: {e}")
+                continue
+
+            # Fan out: the encoded body is shared by every target of this PDF
+            stem = os.path.splitext(relative_path)[0]
+            for target in targets:
+                output_path = os.path.join(output_folder, stem + TARGETS[target]["extension"])
+                future = executor.submit(convert_to_target, body, target, output_path)
+                pending[future] = (relative_path, target, output_path)
+            del body
+
+            # Report finished conversions right away instead of only when the pool is full
+            collect([future for future in pending if future.done()])
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Finished in {elapsed:.1f}s: {converted} files converted, {failed} failed")
+    print(f"Report: {report_path}")
+    return converted, failed
+
+
+def convert_pdf_to_office():
+    """
+    Main function for the multi-target converter
+    Converts a PDF (or every PDF in a folder) to Word, Excel and PowerPoint at once
+    """
+    input_path = "sample.pdf"  # A PDF file or a folder of PDFs
+    targets = ["word", "excel", "powerpoint"]  # Any subset of TARGETS
+    output_folder = "PDF_to_Office_outputs"  # Converted files, same relative paths as the input
+    report_path = "PDF_to_Office_report.jsonl"  # One line per conversion, written as results complete
+    max_workers = 6  # Concurrent API requests across all PDFs and targets
+
+    if not os.path.exists(input_path):
+        print(f"Error: Input not found at {input_path}")
+        return
+
+    print(f"=== Converting {input_path} to {', '.join(targets)} ===")
+    run_multi_target_conversion(input_path, targets, output_folder, report_path, max_workers)
+
+
+# Run the function when script is executed directly
+if __name__ == "__main__":
+    convert_pdf_to_office()
@@ -1,7 +1,25 @@
 import base64
 import requests
 import os
+import json
 import time
+import queue
+import shutil
+import zipfile
+import tempfile
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Optional inotify support for the spool daemon (Linux) - install with: pip install inotify_simple
+# Without it the spool folder is polled
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Daemon mode - watch a spool folder and convert everything that arrives
+daemon_mode = False  # Set to True to run the spool daemon below
 
 def convert_to_pdf():
     api_url = "https://api.pdf4me.com/api/v2/ConvertToPdf"                               # API endpoint for converting documents to PDF
@@ -83,5 +101,392 @@ def convert_to_pdf():
         print(f"Response text: {response.text}")
         return
 
+# Magic bytes of formats recognised without looking at the extension
+MAGIC_TYPES = [
+    (b"%PDF", "pdf"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"{\\rtf", "rtf"),
+]
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# Office Open XML packages are told apart by their main part folder, OpenDocument by the mimetype entry
+OOXML_FOLDERS = {"word/": "docx", "xl/": "xlsx", "ppt/": "pptx"}
+ODF_MIMETYPES = {
+    "application/vnd.oasis.opendocument.text": "odt",
+    "application/vnd.oasis.opendocument.spreadsheet": "ods",
+    "application/vnd.oasis.opendocument.presentation": "odp",
+}
+
+# File types accepted by extension when the content does not identify them
+EXTENSION_TYPES = {
+    "docx": "docx", "doc": "doc", "xlsx": "xlsx", "xls": "xls", "pptx": "pptx", "ppt": "ppt",
+    "odt": "odt", "ods": "ods", "odp": "odp", "rtf": "rtf", "txt": "txt", "html": "html", "htm": "html",
+    "png": "png", "jpg": "jpg", "jpeg": "jpg", "gif": "gif", "tif": "tiff", "tiff": "tiff", "bmp": "bmp",
+}
+IMAGE_TYPES = {"png", "jpg", "gif", "tiff", "bmp"}
+
+def classify_spool_file(file_path):
+    """
+    Identify a file's type from its magic bytes, falling back to the extension
+    ZIP containers are opened to tell DOCX/XLSX/PPTX and OpenDocument apart
+
+    Returns:
+        str or None: Type such as "docx", "xlsx", "png" or "pdf"; None if unsupported
+    """
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    with open(file_path, "rb") as f:
+        header = f.read(16)
+
+    for magic, file_type in MAGIC_TYPES:
+        if header.startswith(magic):
+            return file_type
+    if header.startswith(b"BM") and header[6:10] == b"\x00\x00\x00\x00":
+        return "bmp"
+
+    if header.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(file_path) as package:
+                names = package.namelist()
+                if "mimetype" in names:
+                    mimetype = package.read("mimetype").decode("ascii", "replace").strip()
+                    if mimetype in ODF_MIMETYPES:
+                        return ODF_MIMETYPES[mimetype]
+                for folder, file_type in OOXML_FOLDERS.items():
+                    if any(name.startswith(folder) for name in names):
+                        return file_type
+        except zipfile.BadZipFile:
+            pass
+        return None
+
+    if header.startswith(OLE_MAGIC):
+        # Legacy Office binaries share one container format; the extension tells them apart
+        return extension if extension in ("doc", "xls", "ppt") else None
+
+    return EXTENSION_TYPES.get(extension)
+
+def create_lane(name, workers):
+    """Create a conversion lane: its own queue, worker count and metrics"""
+    return {
+        "name": name,
+        "workers": workers,
+        "queue": queue.Queue(),
+        "lock": threading.Lock(),
+        "in_flight": 0,
+        "completed": 0,
+        "failed": 0,
+        "latencies": deque(maxlen=1000),  # Seconds from detection to finished, last 1000 jobs
+    }
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers, 0.0 if empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def render_metrics(lanes):
+    """Render queue depth, in-flight jobs, totals and latency percentiles per lane in Prometheus text format"""
+    lines = []
+    for lane in lanes.values():
+        with lane["lock"]:
+            latencies = list(lane["latencies"])
+            values = {
+                "conversion_queue_depth": lane["queue"].qsize(),
+                "conversion_in_flight": lane["in_flight"],
+                "conversion_completed_total": lane["completed"],
+                "conversion_failed_total": lane["failed"],
+            }
+        for metric, value in values.items():
+            lines.append(f'{metric}{{lane="{lane["name"]}"}} {value}')
+        for quantile in (0.5, 0.95, 0.99):
+            lines.append(f'conversion_latency_seconds{{lane="{lane["name"]}",quantile="{quantile}"}} '
+                         f'{percentile(latencies, quantile):.3f}')
+    return "\n".join(lines) + "\n"
+
+def start_metrics_server(lanes, port):
+    """Serve render_metrics(lanes) at http://127.0.0.1:<port>/metrics from a background thread"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render_metrics(lanes).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # Keep the daemon log for conversions
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reserve_path(folder, name):
+    """
+    Create an empty placeholder for name in folder and return its path
+    A counter is added when the name is taken, so files with the same name never overwrite each other
+    """
+    stem, extension = os.path.splitext(name)
+    candidate, counter = name, 1
+    while True:
+        path = os.path.join(folder, candidate)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            candidate = f"{stem}-{counter}{extension}"
+            counter += 1
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+def convert_spool_file(api_url, api_key, file_path, doc_name, output_path):
+    """
+    Convert one file with bounded memory
+    Process: Base64-encode into a temporary request body in chunks → Upload it → Poll for completion → Stream the PDF to disk
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    session = get_session(api_key)
+    with tempfile.TemporaryFile() as body_file:
+        body_file.write(('{"docName":' + json.dumps(doc_name) + ',"async":true,"docContent":"').encode("utf-8"))
+        with open(file_path, "rb") as source:
+            for chunk in iter(lambda: source.read(3 * 256 * 1024), b""):
+                body_file.write(base64.b64encode(chunk))
+        body_file.write(b'"}')
+        body_file.seek(0)
+        response = session.post(api_url, data=body_file, stream=True, timeout=600)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        response.close()
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, stream=True, timeout=60)
+            if response.status_code != 202:
+                break
+            response.close()
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    with response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+        temporary_path = output_path + ".part"
+        with open(temporary_path, "wb") as output_file:
+            for chunk in response.iter_content(chunk_size=256 * 1024):
+                output_file.write(chunk)
+        os.replace(temporary_path, output_path)
+
+def lane_worker(lane, settings, stop_event):
+    """
+    Take jobs from one lane until the daemon stops
+    Finished sources move to spool/done, failures to spool/failed with a line in the error log
+    Jobs still queued at shutdown stay in spool/processing and are picked up on the next start
+    """
+    while True:
+        job = lane["queue"].get()
+        if job is None or stop_event.is_set():
+            return
+        file_path, file_type, detected_at = job
+        name = os.path.basename(file_path)
+        stem = os.path.splitext(name)[0]
+
+        with lane["lock"]:
+            lane["in_flight"] += 1
+        output_path = reserve_path(settings["output_folder"], stem + ".pdf")
+        try:
+            if file_type == "pdf":
+                shutil.copyfile(file_path, output_path)  # Already a PDF: no conversion needed
+            else:
+                convert_spool_file(settings["api_url"], settings["api_key"], file_path,
+                                   f"{stem}.{file_type}", output_path)
+            os.replace(file_path, reserve_path(os.path.join(settings["spool_folder"], "done"), name))
+            succeeded = True
+        except Exception as e:
+            succeeded = False
+            print(f"✗ [{lane['name']}] {name}: {e}")
+            with settings["error_lock"], open(settings["error_log_path"], "a", encoding="utf-8") as error_log:
+                error_log.write(json.dumps({"file": name, "lane": lane["name"], "error": str(e)}) + "\n")
+            os.remove(output_path)
+            try:
+                os.replace(file_path, reserve_path(os.path.join(settings["spool_folder"], "failed"), name))
+            except OSError:
+                pass
+        finally:
+            with lane["lock"]:
+                lane["in_flight"] -= 1
+                lane["completed" if succeeded else "failed"] += 1
+                lane["latencies"].append(time.time() - detected_at)
+
+def run_spool_daemon(settings, stop_event):
+    """
+    Watch spool/incoming and convert every file that arrives until stop_event is set
+    Process: Detect new file (inotify or polling) → Claim it by moving it to spool/processing → Classify → Route to a lane
+
+    Lanes keep big files from starving small ones: files above large_file_size go to the "large" lane with few workers,
+    the rest to the "image" or "office" lane with many workers.
+    """
+    spool_folder = settings["spool_folder"]
+    incoming, processing = os.path.join(spool_folder, "incoming"), os.path.join(spool_folder, "processing")
+    for folder in (incoming, processing, os.path.join(spool_folder, "done"),
+                   os.path.join(spool_folder, "failed"), settings["output_folder"]):
+        os.makedirs(folder, exist_ok=True)
+
+    lanes = {name: create_lane(name, workers) for name, workers in settings["lane_workers"].items()}
+    threads = [
+        threading.Thread(target=lane_worker, args=(lane, settings, stop_event), daemon=True)
+        for lane in lanes.values() for _ in range(lane["workers"])
+    ]
+    for thread in threads:
+        thread.start()
+    metrics_server = start_metrics_server(lanes, settings["metrics_port"]) if settings["metrics_port"] else None
+
+    def route(file_path, detected_at):
+        try:
+            file_type = classify_spool_file(file_path)
+        except OSError as e:
+            print(f"Could not read {file_path}: {e}")
+            return
+        if file_type is None:
+            print(f"✗ Unsupported file type: {os.path.basename(file_path)}")
+            os.replace(file_path, reserve_path(os.path.join(spool_folder, "failed"), os.path.basename(file_path)))
+            return
+        if os.path.getsize(file_path) > settings["large_file_size"]:
+            lane = lanes["large"]
+        elif file_type in IMAGE_TYPES:
+            lane = lanes["image"]
+        else:
+            lane = lanes["office"]
+        lane["queue"].put((file_path, file_type, detected_at))
+
+    def claim(name):
+        """Move a finished file out of incoming, so it is picked up exactly once"""
+        if name.startswith(".") or name.endswith((".tmp", ".part")):
+            return
+        stem, extension = os.path.splitext(name)
+        target, counter = os.path.join(processing, name), 1
+        while os.path.exists(target):
+            target = os.path.join(processing, f"{stem}-{counter}{extension}")
+            counter += 1
+        try:
+            os.rename(os.path.join(incoming, name), target)
+        except FileNotFoundError:
+            return
+        route(target, time.time())
+
+    # Files claimed by an earlier run that did not finish
+    for name in sorted(os.listdir(processing)):
+        route(os.path.join(processing, name), time.time())
+
+    watcher = None
+    if INotify is not None:
+        watcher = INotify()
+        watcher.add_watch(incoming, inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO)
+        for name in sorted(os.listdir(incoming)):
+            claim(name)
+    else:
+        print("inotify_simple is not installed; polling the spool folder (pip install inotify_simple)")
+
+    seen_sizes = {}  # Polling: name -> (size, mtime) at the previous scan
+    last_report = time.time()
+    print(f"Watching {incoming}")
+    try:
+        while not stop_event.is_set():
+            if watcher is not None:
+                for event in watcher.read(timeout=int(settings["poll_interval"] * 1000)):
+                    if event.name:
+                        claim(event.name)
+            else:
+                # A file is ready once its size and modification time stop changing between scans
+                current = {}
+                for entry in os.scandir(incoming):
+                    if entry.is_file():
+                        file_stat = entry.stat()
+                        current[entry.name] = (file_stat.st_size, file_stat.st_mtime)
+                for name, signature in current.items():
+                    if seen_sizes.get(name) == signature and time.time() - signature[1] >= settings["poll_interval"]:
+                        claim(name)
+                seen_sizes = current
+                stop_event.wait(settings["poll_interval"])
+
+            if time.time() - last_report >= settings["report_interval"]:
+                last_report = time.time()
+                print(" | ".join(
+                    f"{lane['name']}: queued {lane['queue'].qsize()}, running {lane['in_flight']}, "
+                    f"done {lane['completed']}, failed {lane['failed']}, "
+                    f"p95 {percentile(list(lane['latencies']), 0.95):.1f}s"
+                    for lane in lanes.values()))
+    finally:
+        stop_event.set()
+        for lane in lanes.values():
+            for _ in range(lane["workers"]):
+                lane["queue"].put(None)
+        for thread in threads:
+            thread.join()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if watcher is not None:
+            watcher.close()
+    return lanes
+
+def run_conversion_daemon():
+    """
+    Long-running conversion service for a spool folder fed by another system (e.g. a mail gateway)
+    Drop files into spool/incoming; PDFs appear in the output folder. Stop with Ctrl+C.
+    Metrics are served at http://127.0.0.1:<metrics_port>/metrics
+    """
+    settings = {
+        "api_url": "https://api.pdf4me.com/api/v2/ConvertToPdf",
+        "api_key": "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/",
+        "spool_folder": "spool",  # Contains incoming/, processing/, done/ and failed/
+        "output_folder": "Converted_PDF_outputs",  # One PDF per input file
+        "error_log_path": "Conversion_errors.jsonl",  # One line per failed file
+        "error_lock": threading.Lock(),
+        "large_file_size": 50 * 1024 * 1024,  # Files above this size (bytes) use the large lane
+        "lane_workers": {"office": 8, "image": 8, "large": 2},  # Concurrent conversions per lane
+        "poll_interval": 2.0,  # Seconds between scans without inotify; also the settle time of a new file
+        "report_interval": 60,  # Seconds between metric lines in the log
+        "metrics_port": 9464,  # None to disable the metrics endpoint
+    }
+
+    stop_event = threading.Event()
+    try:
+        run_spool_daemon(settings, stop_event)
+    except KeyboardInterrupt:
+        print("Stopping: running conversions finish, queued files stay in spool/processing for the next start")
+
 if __name__ == "__main__":
-    convert_to_pdf()
+    if daemon_mode:
+        run_conversion_daemon()
+    else:
+        convert_to_pdf()
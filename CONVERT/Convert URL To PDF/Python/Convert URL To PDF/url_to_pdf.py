@@ -1,6 +1,21 @@
 import os
+import re
+import gzip
+import json
+import hashlib
+import posixpath
+import threading
 import requests
 import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit, quote, unquote, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+
+# Crawl mode - convert every page of a site reachable from seed URLs and sitemaps
+crawl_mode = False  # Set to True to use the crawler function below
 
 def convert_url_to_pdf():
     """
@@ -190,12 +205,433 @@ def convert_url_to_pdf():
         print(f"Response text: {response.text}")
         return
 
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connections
+thread_local = threading.local()
+
+# Ports left out of normalised URLs
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Namespace of sitemap.xml files (https://www.sitemaps.org/protocol.html)
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+def get_api_session(api_key):
+    """Return the calling thread's PDF4me API session, creating it on first use"""
+    if not hasattr(thread_local, "api_session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.api_session = session
+    return thread_local.api_session
+
+def get_crawl_session(user_agent):
+    """Return the calling thread's session for fetching site pages (no API key is sent to crawled sites)"""
+    if not hasattr(thread_local, "crawl_session"):
+        session = requests.Session()
+        session.headers.update({"User-Agent": user_agent})
+        thread_local.crawl_session = session
+    return thread_local.crawl_session
+
+def normalize_url(url):
+    """
+    Normalise a URL so that different spellings of the same page dedupe to one entry
+    Lower-cases scheme and host, drops default ports, fragments and user info, resolves '.' and '..'
+    segments, re-encodes the path canonically and sorts query parameters
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    netloc = host if parts.port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+
+    path = posixpath.normpath(parts.path) if parts.path else "/"
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")
+    if parts.path.endswith("/") and path != "/":
+        path += "/"
+    path = quote(unquote(path), safe="/:@!$&'()*+,;=-._~")
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+class LinkParser(HTMLParser):
+    """Collect the href of every <a> element, resolved against the page URL and any <base href>"""
+
+    def __init__(self, page_url):
+        super().__init__()
+        self.base_url = page_url
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "base" and attrs.get("href"):
+            self.base_url = urljoin(self.base_url, attrs["href"])
+        elif tag == "a" and attrs.get("href"):
+            href = attrs["href"].strip()
+            if not href.lower().startswith(("mailto:", "javascript:", "tel:", "data:")):
+                self.links.append(urljoin(self.base_url, href))
+
+def extract_links(page_url, html_text):
+    """Return the normalised http(s) links of an HTML page"""
+    parser = LinkParser(page_url)
+    parser.feed(html_text)
+    return sorted({
+        normalize_url(link) for link in parser.links
+        if urlsplit(link).scheme in ("http", "https")
+    })
+
+def read_sitemap(sitemap_url, user_agent, max_sitemaps=100):
+    """
+    List the page URLs of a sitemap, following sitemap index files
+    Gzip-compressed sitemaps (sitemap.xml.gz) are decompressed
+    """
+    session = get_crawl_session(user_agent)
+    page_urls, pending, visited = [], [sitemap_url], set()
+    while pending and len(visited) < max_sitemaps:
+        current = pending.pop()
+        if current in visited:
+            continue
+        visited.add(current)
+        try:
+            response = session.get(current, timeout=60)
+            response.raise_for_status()
+            content = response.content
+            if content[:2] == b"\x1f\x8b":
+                content = gzip.decompress(content)
+            root = ET.fromstring(content)
+        except Exception as e:
+            print(f"Could not read sitemap {current}: {e}")
+            continue
+
+        locations = [loc.text.strip() for loc in root.iter(SITEMAP_NAMESPACE + "loc") if loc.text]
+        if root.tag == SITEMAP_NAMESPACE + "sitemapindex":
+            pending.extend(locations)
+        else:
+            page_urls.extend(locations)
+    return page_urls
+
+def make_host_throttle(min_interval):
+    """
+    Return a function that blocks until the next request to a host may be sent
+    Requests to the same host are spaced min_interval seconds apart across all threads
+    """
+    lock = threading.Lock()
+    next_slot = {}
+
+    def acquire(host):
+        with lock:
+            now = time.monotonic()
+            wait_time = next_slot.get(host, now) - now
+            next_slot[host] = max(now, next_slot.get(host, now)) + min_interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    return acquire
+
+def output_path_for_url(output_folder, page_url):
+    """
+    Map a normalised URL to output_folder/host/path.pdf
+    The original file name is kept (/b.html → b.html.pdf), so /b, /b.html and /b.htm get different PDFs.
+    Query strings, and names changed by replacing unsafe characters, add a short hash of the URL to the name.
+    """
+    parts = urlsplit(page_url)
+    raw_segments = [unquote(segment) for segment in parts.path.split("/") if segment]
+    segments = [re.sub(r"[^A-Za-z0-9._-]", "_", segment) for segment in raw_segments]
+    if not segments or parts.path.endswith("/"):
+        segments.append("index")
+    name = segments[-1]
+    if parts.query or segments[:len(raw_segments)] != raw_segments:
+        name += "_" + hashlib.sha1(f"{parts.path}?{parts.query}".encode("utf-8")).hexdigest()[:8]
+    host_folder = re.sub(r"[^A-Za-z0-9._-]", "_", parts.netloc)
+    return os.path.join(output_folder, host_folder, *segments[:-1], name + ".pdf")
+
+def load_crawl_cache(cache_path):
+    """Return normalised URL -> latest cache entry (ETag, Last-Modified, content hash, output, links)"""
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                cache[entry["url"]] = entry
+    return cache
+
+def compact_crawl_cache(cache_path, cache):
+    """Rewrite the append-only cache with only the latest entry per URL"""
+    part_path = cache_path + ".part"
+    with open(part_path, "w", encoding="utf-8") as f:
+        for entry in cache.values():
+            f.write(json.dumps(entry) + "\n")
+    os.replace(part_path, cache_path)
+
+def convert_page(api_url, api_key, page_url, output_path, static_fragment):
+    """
+    Convert one web page with ConvertUrlToPdf
+    Process: Splice URL into the pre-serialised request body → Send API request → Poll for completion → Save PDF
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    body = ('{"webUrl":' + json.dumps(page_url) +
+            ',"docName":' + json.dumps(os.path.basename(output_path)) + ',' + static_fragment + '}')
+
+    session = get_api_session(api_key)
+    response = session.post(api_url, data=body.encode("utf-8"), timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temporary_path = output_path + ".part"
+    with open(temporary_path, "wb") as f:
+        f.write(response.content)
+    os.replace(temporary_path, output_path)
+
+def crawl_page(page_url, cached, settings):
+    """
+    Fetch one page, collect its links and convert it if it changed since the last run
+    Process: Conditional GET with the cached ETag/Last-Modified → Parse links → Compare validators → Convert changed pages
+
+    Returns:
+        dict: New cache entry with status "converted", "unchanged", "not_html" or "failed"
+    """
+    host = urlsplit(page_url).netloc
+    output_path = output_path_for_url(settings["output_folder"], page_url)
+    has_output = cached is not None and cached.get("status") in ("converted", "unchanged") and os.path.exists(output_path)
+
+    request_headers = {}
+    if has_output:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    settings["throttle"](host)
+    response = get_crawl_session(settings["user_agent"]).get(page_url, headers=request_headers, timeout=60)
+
+    if response.status_code == 304 and has_output:
+        # Not modified: links are taken from the cache, no conversion needed
+        return dict(cached, status="unchanged")
+    response.raise_for_status()
+
+    entry = {
+        "url": page_url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_hash": hashlib.sha256(response.content).hexdigest(),
+        "output": output_path,
+        "links": []
+    }
+    if "html" not in response.headers.get("Content-Type", "").lower():
+        entry["status"] = "not_html"
+        return entry
+    entry["links"] = extract_links(response.url, response.text)
+
+    # Servers that ignore conditional requests: compare validators, or the content when there are none
+    if has_output:
+        if entry["etag"] or entry["last_modified"]:
+            unchanged = (entry["etag"], entry["last_modified"]) == (cached.get("etag"), cached.get("last_modified"))
+        else:
+            unchanged = entry["content_hash"] == cached.get("content_hash")
+        if unchanged:
+            entry["status"] = "unchanged"
+            return entry
+
+    settings["throttle"](host)  # The conversion service fetches the page from the same host
+    convert_page(settings["api_url"], settings["api_key"], page_url, output_path, settings["static_fragment"])
+    entry["status"] = "converted"
+    return entry
+
+def crawl_site(seed_urls, sitemap_urls, settings, cache_path, max_pages, max_depth,
+               max_workers, per_host_concurrency, respect_robots_txt):
+    """
+    Crawl from the seed and sitemap URLs and convert every in-scope page
+    Pages are scheduled round-robin across hosts, with at most per_host_concurrency jobs per host
+    Only hosts of the seed and sitemap URLs are crawled
+
+    Returns:
+        dict: Count of pages per status
+    """
+    cache = load_crawl_cache(cache_path)
+    start_urls = [(url, 0) for url in seed_urls]
+    for sitemap_url in sitemap_urls:
+        start_urls.extend((url, 0) for url in read_sitemap(sitemap_url, settings["user_agent"]))
+    allowed_hosts = {urlsplit(normalize_url(url)).netloc for url in list(seed_urls) + list(sitemap_urls)}
+
+    robots = {}
+
+    def allowed_by_robots(page_url):
+        if not respect_robots_txt:
+            return True
+        parts = urlsplit(page_url)
+        if parts.netloc not in robots:
+            parser = RobotFileParser()
+            try:
+                response = get_crawl_session(settings["user_agent"]).get(
+                    f"{parts.scheme}://{parts.netloc}/robots.txt", timeout=30)
+                parser.parse(response.text.splitlines() if response.status_code == 200 else [])
+            except requests.exceptions.RequestException:
+                parser.parse([])
+            robots[parts.netloc] = parser
+        return robots[parts.netloc].can_fetch(settings["user_agent"], page_url)
+
+    frontier = {}  # host -> deque of (url, depth)
+    seen = set()
+    counts = {"converted": 0, "unchanged": 0, "not_html": 0, "failed": 0, "robots_txt": 0}
+
+    def enqueue(url, depth):
+        url = normalize_url(url)
+        host = urlsplit(url).netloc
+        if url in seen or host not in allowed_hosts or len(seen) >= max_pages:
+            return
+        seen.add(url)
+        if not allowed_by_robots(url):
+            counts["robots_txt"] += 1
+            return
+        frontier.setdefault(host, deque()).append((url, depth))
+
+    for url, depth in start_urls:
+        enqueue(url, depth)
+
+    started = time.time()
+    active = {}  # host -> running jobs
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(cache_path, "a", encoding="utf-8") as cache_file:
+        pending = {}  # future -> (url, depth)
+
+        def collect(done):
+            for future in done:
+                url, depth = pending.pop(future)
+                active[urlsplit(url).netloc] -= 1
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    entry = {"url": url, "status": "failed", "error": str(e), "links": []}
+                    print(f"✗ {url}: {e}")
+                counts[entry["status"]] += 1
+                cache[url] = entry
+                cache_file.write(json.dumps(entry) + "\n")
+                if depth < max_depth:
+                    for link in entry["links"]:
+                        enqueue(link, depth + 1)
+            cache_file.flush()
+
+        while True:
+            # Round-robin over hosts so one large site cannot starve the others
+            for host in list(frontier):
+                queue = frontier[host]
+                while queue and active.get(host, 0) < per_host_concurrency and len(pending) < max_workers * 2:
+                    url, depth = queue.popleft()
+                    future = executor.submit(crawl_page, url, cache.get(url), settings)
+                    pending[future] = (url, depth)
+                    active[host] = active.get(host, 0) + 1
+                if not queue:
+                    del frontier[host]
+
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+            finished = sum(counts.values())
+            if finished % 100 == 0:
+                rate = finished / max(time.time() - started, 1e-9)
+                print(f"Progress: {finished} pages, {counts['converted']} converted, "
+                      f"{counts['unchanged']} unchanged, {len(seen)} discovered ({rate:.1f} pages/s)")
+
+    # One line per URL again, so the cache does not grow with every run
+    compact_crawl_cache(cache_path, cache)
+
+    elapsed = time.time() - started
+    print(f"Crawl finished in {elapsed:.1f}s: {len(seen)} URLs discovered")
+    print(f"  Converted: {counts['converted']}, unchanged (no API call): {counts['unchanged']}, "
+          f"not HTML: {counts['not_html']}, blocked by robots.txt: {counts['robots_txt']}, failed: {counts['failed']}")
+    return counts
+
+def convert_site_to_pdfs():
+    """
+    Archive a whole site as PDFs
+    Process: Read seeds and sitemaps → Crawl in-scope pages concurrently → Convert new and changed pages → Record validators in the cache
+    Later runs send conditional requests and only reconvert pages whose ETag/Last-Modified (or content) changed
+    """
+
+    # API Configuration - PDF4Me service for converting web URLs to PDF documents
+    api_url = "https://api.pdf4me.com/api/v2/ConvertUrlToPdf"
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
+
+    seed_urls = ["https://docs.pdf4me.com/"]  # Crawl starts here; their hosts define the crawl scope
+    sitemap_urls = []  # e.g. ["https://docs.pdf4me.com/sitemap.xml"]
+    output_folder = "Site_PDF_outputs"  # PDFs saved as <host>/<path>.pdf
+    cache_path = "Site_crawl_cache.jsonl"  # URL -> ETag/Last-Modified/content hash/links of every crawled page
+    max_pages = 500  # Upper limit of URLs per run
+    max_depth = 5  # Link depth followed from the seeds and sitemap entries
+    max_workers = 8  # Concurrent jobs in total
+    per_host_concurrency = 2  # Concurrent jobs per host
+    per_host_interval = 1.0  # Seconds between requests to the same host
+    respect_robots_txt = True  # Skip URLs disallowed by the site's robots.txt
+    user_agent = "PDF4me-URL-to-PDF-crawler/1.0"
+
+    settings = {
+        "api_url": api_url,
+        "api_key": api_key,
+        "output_folder": output_folder,
+        "user_agent": user_agent,
+        "throttle": make_host_throttle(per_host_interval),
+        # Conversion options shared by every page, serialised once
+        "static_fragment": json.dumps({
+            "authType": "NoAuth",           # Authentication type for URL website (NoAuth, Basic, etc.)
+            "username": "",                 # Username if authentication is required (empty for NoAuth)
+            "password": "",                 # Password if authentication is required (empty for NoAuth)
+            "docContent": "",               # Base64 PDF content (empty for URL conversion)
+            "layout": "portrait",           # Page orientation: "portrait" or "landscape"
+            "format": "A4",                 # Page format: A0-A8, Tabloid, Legal, Statement, Executive
+            "scale": 1.0,                   # Scale factor for the web page
+            "topMargin": "20px",            # Top margin of PDF
+            "leftMargin": "20px",           # Left margin of PDF
+            "rightMargin": "20px",          # Right margin of PDF
+            "bottomMargin": "20px",         # Bottom margin of PDF
+            "printBackground": True,        # Include background colors and images
+            "displayHeaderFooter": False,   # Show header and footer in PDF
+            "async": True                   # Enable asynchronous processing
+        }, separators=(",", ":"))[1:-1]
+    }
+
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"Crawling {len(seed_urls)} seed URLs and {len(sitemap_urls)} sitemaps...")
+    crawl_site(seed_urls, sitemap_urls, settings, cache_path, max_pages, max_depth,
+               max_workers, per_host_concurrency, respect_robots_txt)
+    print(f"PDFs saved in: {output_folder}")
+
 # Main execution - Run the conversion when script is executed directly
 if __name__ == "__main__":
-    print("Starting URL to PDF Conversion Process...")
-    print("This converts web pages into PDF documents while preserving layout and styling")
-    print("Perfect for archiving web content, creating offline documentation, or generating reports")
-    print("The process captures CSS styles, images, and maintains the original web page appearance")
-    print("Supports various page formats, margins, and scaling options for optimal PDF output")
-    print("-" * 90)
-    convert_url_to_pdf()
+    if crawl_mode:
+        convert_site_to_pdfs()
+    else:
+        print("Starting URL to PDF Conversion Process...")
+        print("This converts web pages into PDF documents while preserving layout and styling")
+        print("Perfect for archiving web content, creating offline documentation, or generating reports")
+        print("The process captures CSS styles, images, and maintains the original web page appearance")
+        print("Supports various page formats, margins, and scaling options for optimal PDF output")
+        print("-" * 90)
+        convert_url_to_pdf()
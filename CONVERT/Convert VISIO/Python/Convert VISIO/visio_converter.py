@@ -1,7 +1,12 @@
 import base64
+import hashlib
+import json
 import requests
 import os
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # API Configuration - PDF4Me service for converting Visio files
 api_url = "https://api.pdf4me.com/api/v2/ConvertVisio?schemaVal=PDF"
@@ -187,10 +192,311 @@ def convert_visio_to_pdf():
         print(f"Response text: {response.text}")
         return
 
+# ---------------------------------------------------------------------------
+# Batch mode - render a folder tree of drawings to several output formats
+# ---------------------------------------------------------------------------
+
+batch_mode = False  # Set to True to run convert_visio_batch() instead of convert_visio_to_pdf()
+batch_api_url = "https://api.pdf4me.com/api/v2/ConvertVisio"  # schemaVal is set per output format
+batch_input_folder = "drawings"  # Folder scanned recursively for Visio files
+object_store_root = "visio-renditions"  # Local bucket directory, can be synced as-is to S3, Azure Blob or GCS
+source_index_path = os.path.join(object_store_root, "index", "sources.jsonl")  # Source path -> content hash
+max_workers = 8  # Concurrent API requests (one per drawing and output format)
+
+# Output formats rendered for every drawing, with the options sent for each format
+output_formats = {
+    "PDF": {
+        "IsPdfCompliant": True,              # Make PDF compliant with standards
+        "PageIndex": 0,                      # Start from first page (0-indexed)
+        "PageCount": 5,                      # Number of pages to convert (1-100)
+        "IncludeHiddenPages": True,          # Include hidden pages (True/False)
+        "SaveForegroundPage": True,          # Save foreground elements (True/False)
+        "SaveToolBar": True,                 # Include toolbar (True/False)
+        "AutoFit": True                      # Auto-fit content to page (True/False)
+    },
+    "PNG": {
+        "PageIndex": 0,
+        "PageCount": 5,
+        "ImageBrightness": 1.0,
+        "ImageContrast": 1.0,
+        "ImageColorMode": "RGBA",            # RGBA (with alpha/transparency) or RGB
+        "CompositingQuality": "HighQuality",
+        "InterpolationMode": "High",
+        "PixelOffsetMode": "HighQuality",
+        "Resolution": 300,
+        "Scale": 1.0,
+        "SmoothingMode": "HighQuality",
+        "AutoFit": True
+    }
+}
+
+VISIO_EXTENSIONS = (".vsdx", ".vsd", ".vsdm")
+
+# File extension of each output format; multi-page image results returned as a ZIP are stored as .zip
+FORMAT_EXTENSIONS = {"PDF": ".pdf", "JPG": ".jpg", "PNG": ".png", "TIFF": ".tiff"}
+
+
+def build_format_fragments(formats):
+    """
+    Serialise the options of every output format once
+    Returns output format -> (JSON members without the surrounding braces, options id)
+    The options id is part of the object key, so changing a format's options renders it again
+    """
+    fragments = {}
+    for output_format, options in formats.items():
+        fragment = json.dumps(dict(options, OutputFormat=output_format, **{"async": True}),
+                              separators=(",", ":"))[1:-1]
+        options_id = hashlib.sha256(fragment.encode("utf-8")).hexdigest()[:12]
+        fragments[output_format] = (fragment, options_id)
+    return fragments
+
+
+def rendition_key(output_format, options_id, content_hash, extension):
+    """
+    Object key of one rendition: renditions/<format>/<options id>/<hash[:2]>/<hash><extension>
+    The two-character hash prefix spreads objects over many key prefixes, as object stores prefer
+    """
+    return "/".join(["renditions", output_format.lower(), options_id, content_hash[:2], content_hash + extension])
+
+
+def find_rendition(output_format, options_id, content_hash):
+    """Return the key of an existing rendition in the object store, or None"""
+    for extension in (FORMAT_EXTENSIONS.get(output_format, "." + output_format.lower()), ".zip"):
+        key = rendition_key(output_format, options_id, content_hash, extension)
+        if os.path.exists(os.path.join(object_store_root, *key.split("/"))):
+            return key
+    return None
+
+
+def load_source_index(index_path):
+    """
+    Return relative path -> {"size", "mtime_ns", "sha256"} from earlier runs
+    Later lines win, so a changed drawing simply gets a new line appended
+    """
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                index[entry["file"]] = entry
+    return index
+
+
+def iter_visio_files(input_folder):
+    """Yield the path of every Visio file under input_folder, relative to it"""
+    for folder, _, file_names in os.walk(input_folder):
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(VISIO_EXTENSIONS) and not file_name.startswith("~$"):
+                yield os.path.relpath(os.path.join(folder, file_name), input_folder).replace(os.sep, "/")
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def render_visio_format(drawing_name, drawing_base64, output_format, format_fragment, options_id, content_hash):
+    """
+    Render one drawing to one output format and store the result in the object store
+    Process: Splice the shared base64 into the format's request body → Send API request → Poll for completion →
+    Stream the result to a temporary file → Rename it to its object key
+
+    Returns:
+        tuple: (object key, size in bytes)
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    # The drawing was encoded once by the caller; only the format-specific members differ between requests
+    body = b"".join([
+        b'{"docName":', json.dumps(drawing_name).encode("utf-8"),
+        b',"docContent":"', drawing_base64, b'",', format_fragment.encode("utf-8"), b"}"
+    ])
+
+    session = get_session()
+    response = session.post(batch_api_url, params={"schemaVal": output_format}, data=body,
+                            stream=True, timeout=300)
+    del body
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        response.close()
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, stream=True, timeout=60)
+            if response.status_code != 202:
+                break
+            response.close()
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    with response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+        chunks = response.iter_content(chunk_size=256 * 1024)
+        first_chunk = next(chunks, b"")
+        if not first_chunk:
+            raise RuntimeError("Empty response from the API")
+        if first_chunk.startswith(b"PK\x03\x04"):
+            extension = ".zip"  # One image per page, packed by the API
+        else:
+            extension = FORMAT_EXTENSIONS.get(output_format, "." + output_format.lower())
+
+        key = rendition_key(output_format, options_id, content_hash, extension)
+        object_path = os.path.join(object_store_root, *key.split("/"))
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+
+        # Objects only appear under their key once complete, like an object store PUT
+        size = len(first_chunk)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(object_path), suffix=".part", delete=False) as part_file:
+            try:
+                part_file.write(first_chunk)
+                for chunk in chunks:
+                    part_file.write(chunk)
+                    size += len(chunk)
+            except Exception:
+                part_file.close()
+                os.remove(part_file.name)
+                raise
+        os.replace(part_file.name, object_path)
+
+    return key, size
+
+
+def convert_visio_batch():
+    """
+    Render every Visio file under batch_input_folder to every format in output_formats
+    Process: Hash each drawing → Skip formats already in the object store → Encode the drawing once →
+    Request all missing formats concurrently → Stream each result to its object key
+
+    Renditions are keyed by the drawing's content hash, so unchanged, moved or duplicated drawings are not
+    sent again. The source index remembers size and modification time, so unchanged drawings are not even
+    re-read on later runs.
+    """
+    print("Starting Visio batch conversion...")
+    print(f"Input folder: {batch_input_folder}")
+    print(f"Object store: {object_store_root}")
+    print(f"Output formats: {', '.join(output_formats)}")
+    print("-" * 50)
+
+    if not os.path.isdir(batch_input_folder):
+        print(f"Error: Input folder not found at {batch_input_folder}")
+        return
+
+    format_fragments = build_format_fragments(output_formats)
+    source_index = load_source_index(source_index_path)
+    os.makedirs(os.path.dirname(source_index_path), exist_ok=True)
+
+    started = time.time()
+    counts = {"rendered": 0, "failed": 0, "unchanged": 0, "bytes": 0}
+    in_flight = set()  # (content hash, format) requested in this run, so duplicates are sent once
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(source_index_path, "a", encoding="utf-8") as index_file:
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                relative_path, output_format = pending.pop(future)
+                try:
+                    key, size = future.result()
+                    counts["rendered"] += 1
+                    counts["bytes"] += size
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"✗ {relative_path} ({output_format}): {e}")
+
+        for scanned, relative_path in enumerate(iter_visio_files(batch_input_folder), start=1):
+            drawing_path = os.path.join(batch_input_folder, *relative_path.split("/"))
+            try:
+                stat = os.stat(drawing_path)
+                content = None
+                known = source_index.get(relative_path)
+                if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                    content_hash = known["sha256"]
+                else:
+                    with open(drawing_path, "rb") as f:
+                        content = f.read()
+                    content_hash = hashlib.sha256(content).hexdigest()
+                    entry = {"file": relative_path, "size": stat.st_size,
+                             "mtime_ns": stat.st_mtime_ns, "sha256": content_hash}
+                    source_index[relative_path] = entry
+                    index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+                missing = [
+                    output_format for output_format, (_, options_id) in format_fragments.items()
+                    if (content_hash, output_format) not in in_flight
+                    and find_rendition(output_format, options_id, content_hash) is None
+                ]
+                if not missing:
+                    counts["unchanged"] += 1
+                    continue
+
+                if content is None:
+                    with open(drawing_path, "rb") as f:
+                        content = f.read()
+            except OSError as e:
+                counts["failed"] += 1
+                print(f"✗ {relative_path}: {e}")
+                continue
+
+            # Encoded once per drawing; every format request splices in the same bytes
+            drawing_base64 = base64.b64encode(content)
+            del content
+
+            for output_format in missing:
+                format_fragment, options_id = format_fragments[output_format]
+                in_flight.add((content_hash, output_format))
+                future = executor.submit(render_visio_format, os.path.basename(relative_path), drawing_base64,
+                                         output_format, format_fragment, options_id, content_hash)
+                pending[future] = (relative_path, output_format)
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            if scanned % 1000 == 0:
+                index_file.flush()
+                rate = scanned / max(time.time() - started, 1e-9)
+                print(f"Progress: {scanned} drawings scanned, {counts['rendered']} renditions stored, "
+                      f"{counts['unchanged']} drawings unchanged ({rate:.1f} drawings/s)")
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s")
+    print(f"  Renditions stored: {counts['rendered']} ({counts['bytes'] / (1024 * 1024):.1f} MB), "
+          f"drawings unchanged (no API call): {counts['unchanged']}, failed: {counts['failed']}")
+    print(f"Renditions saved under: {os.path.join(object_store_root, 'renditions')}")
+
+
 # Step 9: Main execution - Run the conversion when script is executed directly
 if __name__ == "__main__":
-    print("Starting Visio to PDF conversion...")
-    print(f"Input file: {input_path}")
-    print(f"Output file: {output_path}")
-    print("-" * 50)
-    convert_visio_to_pdf()
+    if batch_mode:
+        convert_visio_batch()
+    else:
+        print("Starting Visio to PDF conversion...")
+        print(f"Input file: {input_path}")
+        print(f"Output file: {output_path}")
+        print("-" * 50)
+        convert_visio_to_pdf()
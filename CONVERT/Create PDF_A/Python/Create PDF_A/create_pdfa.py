@@ -1,7 +1,16 @@
 import requests
 import base64
+import hashlib
+import json
+import mmap
 import os
+import re
+import shutil
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+pipeline_mode = False  # Set to True to run the archival pipeline below instead of the single-file example
 
 def create_pdf_a():
     """
@@ -178,10 +187,351 @@ def create_pdf_a():
         print(f"Response text: {response.text}")
         return
 
+
+# Levels a document can claim in its XMP metadata: compliance value -> (part, conformance)
+PDFA_LEVELS = {
+    "PdfA1a": (1, "A"), "PdfA1b": (1, "B"),
+    "PdfA2a": (2, "A"), "PdfA2b": (2, "B"), "PdfA2u": (2, "U"),
+    "PdfA3a": (3, "A"), "PdfA3b": (3, "B"), "PdfA3u": (3, "U")
+}
+
+# Conformance levels that satisfy a target conformance: level A also implies Unicode mapping (U) and B
+SATISFYING_CONFORMANCE = {"A": {"A"}, "U": {"A", "U"}, "B": {"A", "U", "B"}}
+
+# XMP packets and the pdfaid properties, written either as attributes or as elements
+XMP_PACKET = re.compile(rb"<(?:\w+:)?x[am]pmeta\b.*?</(?:\w+:)?x[am]pmeta>", re.DOTALL)
+PDFAID_PART = re.compile(rb"pdfaid:part(?:\s*=\s*[\"']|>)\s*(\d)")
+PDFAID_CONFORMANCE = re.compile(rb"pdfaid:conformance(?:\s*=\s*[\"']|>)\s*([ABUabu])")
+
+
+def read_pdfa_claim(pdf_data):
+    """
+    Read the PDF/A level a document claims in its XMP metadata
+    PDF/A requires the metadata stream to be unfiltered, so a byte search finds it without parsing the PDF.
+    The last packet with a pdfaid:part wins, as incremental updates append newer metadata at the end.
+
+    Returns:
+        tuple: (part, conformance), e.g. (2, "B"), or None if the document claims no PDF/A level
+    """
+    claim = None
+    for packet in XMP_PACKET.finditer(pdf_data):
+        part = PDFAID_PART.search(packet.group())
+        if part:
+            conformance = PDFAID_CONFORMANCE.search(packet.group())
+            claim = (int(part.group(1)), conformance.group(1).decode("ascii").upper() if conformance else None)
+    return claim
+
+
+def claim_meets_target(claim, compliance):
+    """
+    Check whether a claimed (part, conformance) meets the target compliance level
+    The part must match exactly: PDF/A parts are separate profiles, and 2 and 3 allow transparency,
+    JPEG2000 and attachments that PDF/A-1 forbids
+    """
+    if claim is None or claim[1] is None:
+        return False
+    target_part, target_conformance = PDFA_LEVELS[compliance]
+    part, conformance = claim
+    if part != target_part:
+        return False
+    return conformance in SATISFYING_CONFORMANCE[target_conformance]
+
+
+def load_pdfa_cache(cache_path):
+    """Return cache key -> entry for documents handled by earlier runs whose output still exists"""
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                # Earlier versions also skipped documents claiming a higher part; those must be converted
+                claimed = entry.get("claimed")
+                if entry["status"] == "compliant" and not (
+                        claimed and claim_meets_target((int(claimed[:-1]), claimed[-1]), entry["compliance"])):
+                    continue
+                if entry["output"] is None or os.path.exists(entry["output"]):
+                    cache[entry["key"]] = entry
+    return cache
+
+
+def reuse_output(source_path, target_path):
+    """
+    Place an existing result at target_path, as a hard link where the file system allows it
+    Only used between outputs - input documents are copied (see copy_input) so later edits
+    to a source file never reach the archive
+    """
+    if os.path.abspath(source_path) == os.path.abspath(target_path):
+        return
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copyfile(source_path, target_path)
+
+
+def copy_input(source_path, target_path):
+    """Copy an input document to target_path through a .part file, never writing through an existing link"""
+    part_path = target_path + ".part"
+    shutil.copyfile(source_path, part_path)
+    os.replace(part_path, target_path)
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def convert_one_to_pdfa(api_key, url, pdf_name, pdf_data, options_fragment, output_path):
+    """
+    Convert one PDF to PDF/A using the pre-serialised options fragment
+    Process: Encode PDF → Splice into request body → Send API request → Poll for completion → Stream result to disk
+
+    Raises:
+        RuntimeError: If the API returns an error, a non-PDF response or processing times out
+    """
+    body = b"".join([
+        b'{"docName":', json.dumps(pdf_name).encode("utf-8"),
+        b',"docContent":"', base64.b64encode(pdf_data), b'",', options_fragment.encode("utf-8"), b"}"
+    ])
+
+    session = get_session(api_key)
+    response = session.post(url, data=body, stream=True, timeout=300)
+    del body
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        response.close()
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, stream=True, timeout=60)
+            if response.status_code != 202:
+                break
+            response.close()
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    with response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+        chunks = response.iter_content(chunk_size=256 * 1024)
+        first_chunk = next(chunks, b"")
+        if not first_chunk.startswith(b"%PDF"):
+            raise RuntimeError(f"Response is not a PDF: {first_chunk[:100]!r}")
+
+        # Written under a temporary name so an interrupted run never leaves a truncated PDF/A behind
+        part_path = output_path + ".part"
+        with open(part_path, "wb") as f:
+            f.write(first_chunk)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(part_path, output_path)
+
+
+def make_pdfa_processor(api_key, url, compliance, options_fragment, cache, copy_compliant):
+    """
+    Build the per-document worker of the pipeline
+    Identical documents that are processed at the same time are converted once: the first worker converts,
+    the others wait for its result and reuse the output.
+
+    Returns:
+        callable: process(pdf_path, output_path) -> report entry
+    """
+    options_hash = hashlib.sha256(options_fragment.encode("utf-8")).hexdigest()[:16]
+    in_progress = {}  # cache key -> Future of the worker that handles it
+    in_progress_lock = threading.Lock()
+
+    def process(pdf_path, output_path):
+        if os.path.getsize(pdf_path) == 0:
+            raise RuntimeError("File is empty")
+
+        with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pdf_data:
+            content_hash = hashlib.sha256(pdf_data).hexdigest()
+            key = f"{content_hash}:{compliance}:{options_hash}"
+            entry = {"key": key, "sha256": content_hash, "compliance": compliance}
+
+            with in_progress_lock:
+                cached = cache.get(key)
+                owner_future = None if cached is not None else in_progress.get(key)
+                is_owner = cached is None and owner_future is None
+                if is_owner:
+                    owner_future = in_progress[key] = Future()
+
+            if not is_owner:
+                # Handled by an earlier run or by another worker: reuse its outcome
+                status = "cached" if cached is not None else "duplicate"
+                if cached is None:
+                    cached = owner_future.result()  # Raises the owner's error for this copy as well
+                if cached["output"] is not None:
+                    reuse_output(cached["output"], output_path)
+                return dict(entry, status=status, output=output_path if cached["output"] else None,
+                            claimed=cached.get("claimed"))
+
+            try:
+                claim = read_pdfa_claim(pdf_data)
+                entry["claimed"] = f"{claim[0]}{claim[1] or ''}" if claim else None
+                if claim_meets_target(claim, compliance):
+                    # Already at the target level: no conversion needed
+                    if copy_compliant:
+                        copy_input(pdf_path, output_path)
+                    entry.update(status="compliant", output=output_path if copy_compliant else None)
+                else:
+                    convert_one_to_pdfa(api_key, url, os.path.basename(pdf_path), pdf_data,
+                                        options_fragment, output_path)
+                    entry.update(status="converted", output=output_path)
+            except Exception as e:
+                with in_progress_lock:
+                    in_progress.pop(key)
+                owner_future.set_exception(e)
+                raise
+
+        # Published to the shared cache before leaving in_progress, so later copies always find it
+        with in_progress_lock:
+            cache[key] = entry
+            in_progress.pop(key)
+        owner_future.set_result(entry)
+        return entry
+
+    return process
+
+
+def run_pdfa_pipeline(api_key, url, input_folder, output_folder, compliance, allow_upgrade, allow_downgrade,
+                      copy_compliant, max_workers, cache_path, failures_path):
+    """
+    Convert every PDF under input_folder to the target PDF/A level
+    Process: Hash and read the XMP claim of each PDF → Skip documents that already meet the level →
+    Convert the rest concurrently → Record every outcome in the cache
+
+    Outcomes are cached per content hash, compliance level and options, so later runs neither re-convert
+    nor re-check documents that were already handled.
+    """
+    if compliance not in PDFA_LEVELS:
+        raise ValueError(f"Unknown compliance '{compliance}', expected one of: {', '.join(PDFA_LEVELS)}")
+
+    # Options shared by every request are serialised once and spliced into each body
+    options_fragment = json.dumps({
+        "compliance": compliance,
+        "allowUpgrade": allow_upgrade,
+        "allowDowngrade": allow_downgrade,
+        "async": True
+    }, separators=(",", ":"))[1:-1]
+
+    cache = load_pdfa_cache(cache_path)
+    if cache:
+        print(f"Cache: {len(cache)} documents handled by earlier runs")
+    process = make_pdfa_processor(api_key, url, compliance, options_fragment, cache, copy_compliant)
+
+    def iter_pdf_files():
+        for folder, _, file_names in os.walk(input_folder):
+            for file_name in file_names:
+                if file_name.lower().endswith(".pdf"):
+                    yield os.path.relpath(os.path.join(folder, file_name), input_folder)
+
+    started = time.time()
+    counts = {"converted": 0, "compliant": 0, "cached": 0, "duplicate": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(cache_path, "a", encoding="utf-8") as cache_file, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                relative_path = pending.pop(future)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    counts["failed"] += 1
+                    failures_file.write(json.dumps({"file": relative_path, "error": str(e)}) + "\n")
+                    print(f"✗ {relative_path}: {e}")
+                    continue
+                counts[entry["status"]] += 1
+                if entry["status"] in ("converted", "compliant"):
+                    cache_file.write(json.dumps(dict(entry, file=relative_path), ensure_ascii=False) + "\n")
+            cache_file.flush()
+
+        for scanned, relative_path in enumerate(iter_pdf_files(), start=1):
+            output_path = os.path.join(output_folder, relative_path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            future = executor.submit(process, os.path.join(input_folder, relative_path), output_path)
+            pending[future] = relative_path
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            if scanned % 1000 == 0:
+                rate = scanned / max(time.time() - started, 1e-9)
+                print(f"Progress: {scanned} scanned, {counts['converted']} converted, "
+                      f"{counts['compliant']} already compliant, {counts['cached']} cached ({rate:.1f} documents/s)")
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Pipeline finished in {elapsed:.1f}s")
+    print(f"  Converted: {counts['converted']}, already {compliance} (no API call): {counts['compliant']}, "
+          f"from cache: {counts['cached']}, duplicates: {counts['duplicate']}, failed: {counts['failed']}")
+    if counts["failed"]:
+        print(f"Failed documents listed in: {failures_path}")
+    return counts
+
+
+def create_pdf_a_pipeline():
+    """
+    Archival ingest: bring a whole folder tree of PDFs to one PDF/A level
+    Documents whose XMP metadata already claims the target level are not sent to the API
+    """
+
+    # API Configuration - PDF4Me service for converting PDF to PDF/A format
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"  # Replace with your actual API key
+    input_folder = "documents"                 # Folder scanned recursively for PDFs
+    output_folder = "PDF_A_outputs"            # PDF/A files, same relative paths
+    compliance = "PdfA1b"                      # Target level, one of PDFA_LEVELS
+    allow_upgrade = True                       # Allow upgrading to higher compliance (True/False)
+    allow_downgrade = True                     # Allow downgrading to lower compliance (True/False)
+    copy_compliant = True                      # Place already compliant PDFs in the output folder too
+    max_workers = 8                            # Concurrent documents
+    cache_path = "PDF_A_cache.jsonl"           # Outcome per content hash and compliance level
+    failures_path = "PDF_A_failures.jsonl"     # One line per document that failed
+    url = "https://api.pdf4me.com/api/v2/PdfA"
+
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"Target PDF/A Compliance Level: {compliance}")
+    run_pdfa_pipeline(api_key, url, input_folder, output_folder, compliance, allow_upgrade, allow_downgrade,
+                      copy_compliant, max_workers, cache_path, failures_path)
+
+
 # Step 10: Main execution - Run the conversion when script is executed directly
 if __name__ == "__main__":
-    print("Starting PDF to PDF/A conversion...")
-    print("PDF/A is an ISO standard for long-term archival of electronic documents")
-    print("It ensures documents can be reproduced reliably over time")
-    print("-" * 70)
-    create_pdf_a()
+    if pipeline_mode:
+        create_pdf_a_pipeline()
+    else:
+        print("Starting PDF to PDF/A conversion...")
+        print("PDF/A is an ISO standard for long-term archival of electronic documents")
+        print("It ensures documents can be reproduced reliably over time")
+        print("-" * 70)
+        create_pdf_a()
@@ -1,7 +1,21 @@
 import requests
 import base64
+import io
+import json
+import math
 import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Optional exact page count for autotune mode - install with: pip install pypdf
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+autotune_mode = False  # Set to True to pick the optimize profile per document class (see linearize_pdf_autotune)
 
 def linearize_pdf():
     """
@@ -178,11 +192,377 @@ def linearize_pdf():
         print(f"Response text: {response.text}")
         return
 
+
+# Page tree node and its page count, used when pypdf is not installed
+PAGES_COUNT = re.compile(rb"/Type\s*/Pages\b.{0,512}?/Count\s+(\d+)|/Count\s+(\d+).{0,512}?/Type\s*/Pages\b", re.DOTALL)
+PDF_PRODUCER = re.compile(rb"/Producer\s*\(([^)]{1,120})\)")
+
+
+def count_pdf_pages(pdf_data):
+    """
+    Count the pages of a PDF locally
+    Uses pypdf when installed, otherwise the /Count of the largest page tree node found in the raw bytes
+
+    Returns:
+        int or None: Page count, None if it could not be determined (e.g. page tree in compressed object streams)
+    """
+    if PdfReader is not None:
+        try:
+            return len(PdfReader(io.BytesIO(pdf_data)).pages)
+        except Exception:
+            pass
+    counts = [int(m.group(1) or m.group(2)) for m in PAGES_COUNT.finditer(pdf_data)]
+    return max(counts) if counts else None
+
+
+def sample_page_ranges(page_count, windows, window_pages):
+    """
+    Page ranges of the sample: `windows` windows of `window_pages` pages spread over the document
+    Returns None when the document is small enough to try the profiles on the whole document
+    """
+    if page_count is None:
+        return f"1-{window_pages}"
+    if page_count <= 2 * windows * window_pages:
+        return None
+
+    ranges = []
+    for window in range(windows):
+        start = 1 + (page_count - window_pages) * window // max(windows - 1, 1)
+        ranges.append(f"{start}-{start + window_pages - 1}")
+    return ",".join(ranges)
+
+
+def document_class(pdf_data, page_count):
+    """
+    Coarse class of a document for the profile cache: producing application plus bytes per page (power of two)
+    Documents from the same source with similar content density tend to optimize alike
+    """
+    producers = PDF_PRODUCER.findall(pdf_data)
+    producer = producers[-1].decode("latin-1") if producers else "unknown"
+    # Keep the name only: escapes, version numbers and punctuation vary between releases of the same tool
+    producer = " ".join(re.sub(r"\\[0-7]{1,3}|[^A-Za-z ]+", " ", producer).split()) or "unknown"
+
+    bytes_per_page = len(pdf_data) / max(page_count or 1, 1)
+    bucket_kb = 2 ** max(0, round(math.log2(max(bytes_per_page, 1) / 1024)))
+    return f"{producer}|{bucket_kb}KB/page"
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def post_and_wait(api_key, endpoint_url, body):
+    """
+    Send one request body and wait for the final result
+    Process: Send API request → Poll for completion → Return the final response and the elapsed time
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    started = time.time()
+    session = get_session(api_key)
+    response = session.post(endpoint_url, data=body, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+    return response, time.time() - started
+
+
+def build_body(pdf_name, pdf_base64, **options):
+    """Build a request body around an already encoded document"""
+    return b"".join([
+        b'{"docName":', json.dumps(pdf_name).encode("utf-8"), b',"docContent":"', pdf_base64, b'",',
+        json.dumps(options, separators=(",", ":"))[1:-1].encode("utf-8"), b"}"
+    ])
+
+
+def split_sample(settings, pdf_name, pdf_base64, page_ranges):
+    """
+    Cut the sample pages out of a document with SplitPdf (SplitRanges)
+
+    Returns:
+        list: PDF bytes of every returned part
+    """
+    body = build_body(pdf_name, pdf_base64, splitAction="SplitRanges", splitRanges=page_ranges,
+                      fileNaming="NameAsPerOrder", **{"async": True})
+    response, _ = post_and_wait(settings["api_key"], settings["split_url"], body)
+    if response.content.startswith(b"%PDF"):
+        return [response.content]
+
+    # Same response shapes as in the Split PDF sample
+    split_data = response.json()
+    if isinstance(split_data, dict) and "splitedDocuments" in split_data:
+        parts = [document["streamFile"] for document in split_data["splitedDocuments"]]
+    elif isinstance(split_data, dict):
+        parts = [split_data["docContent"]]
+    else:
+        parts = [document["docContent"] for document in split_data]
+    if not parts:
+        raise RuntimeError("SplitPdf returned no documents for the sample")
+    return [base64.b64decode(part) for part in parts]
+
+
+def linearize_with_profile(settings, pdf_name, pdf_base64, profile, run_async=True):
+    """
+    Linearize one encoded document with one optimize profile
+
+    Returns:
+        tuple: (linearized PDF bytes, elapsed seconds)
+    """
+    body = build_body(pdf_name, pdf_base64, optimizeProfile=profile, **{"async": run_async})
+    response, elapsed = post_and_wait(settings["api_key"], settings["url"], body)
+    return response.content, elapsed
+
+
+def tune_profiles(executor, settings, pdf_name, pdf_data, pdf_base64, page_count):
+    """
+    Try every candidate profile concurrently on a page sample and extrapolate to the full document
+    Process: Cut sample with SplitPdf → Encode each part once → Linearize every part with every profile →
+    Scale sample size and time by full size / sample size
+
+    Returns:
+        tuple: (profile -> {"size", "seconds"} estimates, profile -> linearized full document or None)
+        The second item is set when the document was small enough to be tried whole, so the result can be kept
+    """
+    page_ranges = sample_page_ranges(page_count, settings["sample_windows"], settings["sample_window_pages"])
+    if page_ranges is None:
+        samples = [pdf_data]
+        sample_base64 = [pdf_base64]
+    else:
+        samples = split_sample(settings, pdf_name, pdf_base64, page_ranges)
+        sample_base64 = [base64.b64encode(sample) for sample in samples]
+
+    # Trials run synchronously where the API allows it, so the measured time is processing time
+    # rather than a multiple of the polling interval
+    trials = {
+        executor.submit(linearize_with_profile, settings, pdf_name, encoded, profile, False): (profile, index)
+        for profile in settings["candidate_profiles"]
+        for index, encoded in enumerate(sample_base64)
+    }
+
+    results = {profile: [None] * len(samples) for profile in settings["candidate_profiles"]}
+    for future, (profile, index) in trials.items():
+        try:
+            results[profile][index] = future.result()
+        except Exception as e:
+            print(f"  Profile {profile} failed on the sample: {e}")
+
+    scale = len(pdf_data) / sum(len(sample) for sample in samples)
+    estimates, full_outputs = {}, {}
+    for profile, outputs in results.items():
+        if any(output is None for output in outputs):
+            continue
+        estimates[profile] = {
+            "size": int(sum(len(content) for content, _ in outputs) * scale),
+            "seconds": round(sum(elapsed for _, elapsed in outputs) * scale, 2)
+        }
+        full_outputs[profile] = outputs[0][0] if page_ranges is None else None
+    return estimates, full_outputs
+
+
+def choose_profile(estimates, input_size, target_ratio, target_bytes):
+    """
+    Pick the fastest profile whose estimated output meets the size target
+    Falls back to the profile with the smallest estimated output when none meets it
+
+    Returns:
+        tuple: (profile, True if the target is met)
+    """
+    limit = input_size * target_ratio
+    if target_bytes is not None:
+        limit = min(limit, target_bytes)
+
+    meeting = [profile for profile, estimate in estimates.items() if estimate["size"] <= limit]
+    if meeting:
+        return min(meeting, key=lambda profile: estimates[profile]["seconds"]), True
+    return min(estimates, key=lambda profile: estimates[profile]["size"]), False
+
+
+def load_profile_cache(path):
+    """Return document class -> chosen profile entry from earlier runs"""
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Could not read profile cache, starting empty: {e}")
+    return {}
+
+
+def run_linearize_autotune(settings, input_folder, output_folder, profile_cache_path, max_workers):
+    """
+    Linearize every PDF in a folder with the cheapest profile that meets the size target
+    Process: Classify document → Reuse the cached profile of its class, or tune on a page sample →
+    Apply the chosen profile to the full document
+
+    A class is tuned once; later documents of the same class, in this run or later runs, use the cached choice.
+    Changing the candidates or the target re-tunes every class.
+    """
+    profile_cache = load_profile_cache(profile_cache_path)
+    tuning_key = {
+        "candidates": settings["candidate_profiles"],
+        "target_ratio": settings["target_ratio"],
+        "target_bytes": settings["target_bytes"]
+    }
+
+    pdf_files = sorted(
+        entry.name for entry in os.scandir(input_folder)
+        if entry.is_file() and entry.name.lower().endswith(".pdf")
+    )
+
+    started = time.time()
+    counts = {"tuned": 0, "cached": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"✗ {name}: {e}")
+
+        def save_output(content, output_filename):
+            # Written next to the target and renamed, so an interrupted run never leaves a truncated PDF
+            part_filename = output_filename + ".part"
+            with open(part_filename, "wb") as output_file:
+                output_file.write(content)
+            os.replace(part_filename, output_filename)
+
+        def apply_profile(pdf_name, pdf_base64, profile, output_filename):
+            content, _ = linearize_with_profile(settings, pdf_name, pdf_base64, profile)
+            save_output(content, output_filename)
+
+        for name in pdf_files:
+            output_filename = os.path.join(output_folder, name)
+            try:
+                with open(os.path.join(input_folder, name), "rb") as f:
+                    pdf_data = f.read()
+                pdf_base64 = base64.b64encode(pdf_data)  # Encoded once for the sample split and the final request
+                page_count = count_pdf_pages(pdf_data)
+                doc_class = document_class(pdf_data, page_count)
+
+                cached = profile_cache.get(doc_class)
+                if cached is not None and cached["settings"] == tuning_key:
+                    profile = cached["profile"]
+                    counts["cached"] += 1
+                    print(f"{name}: class '{doc_class}' → {profile} (cached)")
+                else:
+                    estimates, full_outputs = tune_profiles(executor, settings, name, pdf_data, pdf_base64, page_count)
+                    if not estimates:
+                        raise RuntimeError("No profile succeeded on the sample")
+                    profile, target_met = choose_profile(estimates, len(pdf_data),
+                                                         settings["target_ratio"], settings["target_bytes"])
+                    profile_cache[doc_class] = {
+                        "profile": profile, "target_met": target_met, "tuned_on": name,
+                        "estimates": estimates, "settings": tuning_key
+                    }
+                    with open(profile_cache_path, "w", encoding="utf-8") as f:
+                        json.dump(profile_cache, f, indent=2, ensure_ascii=False)
+                    counts["tuned"] += 1
+                    print(f"{name}: class '{doc_class}' → {profile} "
+                          f"(estimated {estimates[profile]['size']} bytes, {estimates[profile]['seconds']}s"
+                          f"{'' if target_met else ', size target not reachable'})")
+
+                    if full_outputs.get(profile) is not None:
+                        # Tried on the whole document: the trial result is the final output
+                        save_output(full_outputs[profile], output_filename)
+                        continue
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"✗ {name}: {e}")
+                continue
+
+            future = executor.submit(apply_profile, name, pdf_base64, profile, output_filename)
+            pending[future] = name
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Autotune finished in {elapsed:.1f}s")
+    print(f"  Tuned classes: {counts['tuned']}, documents using a cached profile: {counts['cached']}, "
+          f"failed: {counts['failed']}")
+    return counts
+
+
+def linearize_pdf_autotune():
+    """
+    Linearize a folder of PDFs, choosing the optimize profile per document class
+    Candidate profiles are tried concurrently on a few sample pages; the fastest one whose
+    extrapolated output meets the size target is applied to the full document
+    """
+
+    # API Configuration - PDF4Me service for linearizing PDF documents
+    settings = {
+        "api_key": "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/",
+        "url": "https://api.pdf4me.com/api/v2/LinearizePdf",
+        "split_url": "https://api.pdf4me.com/api/v2/SplitPdf",           # Used to cut the page sample
+        "candidate_profiles": ["web", "WebMax", "Default", "Compress", "CompressMax"],  # Profiles tried on the sample
+        "target_ratio": 0.8,               # Output must be at most this fraction of the input size
+        "target_bytes": None,              # Optional absolute limit in bytes, e.g. 5 * 1024 * 1024
+        "sample_windows": 3,               # Page windows sampled from the start, middle and end
+        "sample_window_pages": 2           # Pages per window
+    }
+    input_folder = "documents"                          # Folder with the PDFs to linearize
+    output_folder = "Linearized_outputs"                # Linearized PDFs, same file names
+    profile_cache_path = "linearize_profiles.json"      # Chosen profile per document class
+    max_workers = 8                                     # Concurrent API requests
+
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+    if PdfReader is None:
+        print("pypdf is not installed; page counts are read from the raw PDF (pip install pypdf)")
+
+    run_linearize_autotune(settings, input_folder, output_folder, profile_cache_path, max_workers)
+    print(f"Linearized PDFs saved in: {output_folder}")
+    print(f"Profile cache: {profile_cache_path}")
+
+
 # Main execution - Run the linearization when script is executed directly
 if __name__ == "__main__":
-    print("Starting PDF Linearization Process...")
-    print("This optimizes PDF documents for web viewing with faster loading")
-    print("Linearized PDFs display progressively as they download")
-    print("Perfect for web applications and online document viewing")
-    print("-" * 65)
-    linearize_pdf()
+    if autotune_mode:
+        linearize_pdf_autotune()
+    else:
+        print("Starting PDF Linearization Process...")
+        print("This optimizes PDF documents for web viewing with faster loading")
+        print("Linearized PDFs display progressively as they download")
+        print("Perfect for web applications and online document viewing")
+        print("-" * 65)
+        linearize_pdf()
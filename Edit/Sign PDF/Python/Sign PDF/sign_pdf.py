@@ -1,7 +1,15 @@
 import os
 import base64
+import hashlib
+import json
 import requests
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Batch mode - sign every PDF in a folder, reusing the encoded signature and options
+batch_mode = False  # Set to True to use the batch function below
 
 def sign_pdf():
     """
@@ -150,7 +158,262 @@ def sign_pdf():
         # Other status codes - Error
         print(f"Error: {response.status_code} - {response.text}")
 
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def build_static_fragment(static_options):
+    """
+    Serialise the options shared by every request once
+    Returns the JSON members without the surrounding braces, ready to be spliced into each request body
+    """
+    return json.dumps(static_options, separators=(",", ":"))[1:-1]
+
+
+def file_sha256(file_path):
+    """SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    """
+    Return request key -> output path for results of earlier runs that still exist
+    Only the latest key written to each output path is kept; older keys for that path point to replaced content
+    """
+    results = {}
+    key_of_output = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                previous_key = key_of_output.get(entry["output"])
+                if previous_key is not None and previous_key != entry["key"]:
+                    results.pop(previous_key, None)
+                key_of_output[entry["output"]] = entry["key"]
+                results[entry["key"]] = entry["output"]
+    return {key: output for key, output in results.items() if os.path.exists(output)}
+
+
+def reuse_output(source_path, target_path):
+    """Place an existing result at target_path, as a hard link where the file system allows it"""
+    if os.path.abspath(source_path) == os.path.abspath(target_path):
+        return
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        shutil.copyfile(source_path, target_path)
+
+
+def sign_one_pdf(api_key, url, pdf_path, output_path, static_fragment):
+    """
+    Sign one PDF using the pre-serialised static fragment
+    Process: Encode PDF → Splice into request body → Send API request → Poll for completion → Save result
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    with open(pdf_path, "rb") as f:
+        pdf_base64 = base64.b64encode(f.read()).decode('ascii')
+
+    # Only the per-document members are serialised here; the signature fragment is reused as-is
+    body = ('{"docName":' + json.dumps(os.path.basename(pdf_path)) +
+            ',"docContent":"' + pdf_base64 + '",' + static_fragment + '}')
+
+    session = get_session(api_key)
+    response = session.post(url, data=body.encode('utf-8'), timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    # Outputs may be hard links shared with duplicates: replace the file, never write through it
+    part_path = output_path + ".part"
+    with open(part_path, "wb") as f:
+        f.write(response.content)
+    os.replace(part_path, output_path)
+
+
+def run_sign_batch(api_key, url, input_folder, output_folder, static_fragment, max_workers, manifest_path, failures_path):
+    """
+    Stream every PDF in a folder through a worker pool, deduplicating identical requests
+    A request is identified by the document hash plus the hash of the static fragment, which holds the
+    signature image and all options. Identical requests in this run are sent once, and results of earlier
+    runs listed in the manifest are reused without an API call.
+    """
+    pdf_files = (
+        entry.name for entry in os.scandir(input_folder)
+        if entry.is_file() and entry.name.lower().endswith(".pdf")
+    )
+    options_hash = hashlib.sha256(static_fragment.encode('utf-8')).hexdigest()
+    known_results = load_manifest(manifest_path)
+    key_of_output = {output: key for key, output in known_results.items()}
+
+    started = time.time()
+    signed, reused, failed = 0, 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(manifest_path, "a", encoding="utf-8") as manifest, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}   # future -> request key
+        waiting = {}   # request key -> [(name, output path)], first entry is the one being signed
+
+        def collect(done):
+            nonlocal signed, reused, failed
+            for future in done:
+                key = pending.pop(future)
+                targets = waiting.pop(key)
+                try:
+                    future.result()
+                    signed += 1
+                    first_output = targets[0][1]
+                    for name, output_path in targets[1:]:
+                        reuse_output(first_output, output_path)
+                        reused += 1
+                    known_results[key] = first_output
+                    manifest.write(json.dumps({"key": key, "file": targets[0][0], "output": first_output}) + "\n")
+                except Exception as e:
+                    failed += len(targets)
+                    for name, _ in targets:
+                        failures_file.write(json.dumps({"file": name, "error": str(e)}) + "\n")
+                    print(f"✗ {targets[0][0]}: {e}")
+            manifest.flush()
+
+        for scanned, name in enumerate(pdf_files, start=1):
+            pdf_path = os.path.join(input_folder, name)
+            output_path = os.path.join(output_folder, name)
+            try:
+                key = hashlib.sha256((file_sha256(pdf_path) + options_hash).encode('ascii')).hexdigest()
+            except OSError as e:
+                failed += 1
+                failures_file.write(json.dumps({"file": name, "error": str(e)}) + "\n")
+                print(f"✗ {name}: {e}")
+                continue
+
+            # This output is about to hold a different result, so it can no longer serve its old key
+            previous_key = key_of_output.pop(output_path, None)
+            if previous_key is not None and previous_key != key:
+                known_results.pop(previous_key, None)
+
+            if key in waiting:
+                # Same document with the same signature is already being signed in this run
+                waiting[key].append((name, output_path))
+            elif key in known_results:
+                reuse_output(known_results[key], output_path)
+                reused += 1
+            else:
+                waiting[key] = [(name, output_path)]
+                future = executor.submit(sign_one_pdf, api_key, url, pdf_path, output_path, static_fragment)
+                pending[future] = key
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            if scanned % 100 == 0:
+                rate = scanned / max(time.time() - started, 1e-9)
+                print(f"Progress: {scanned} scanned, {signed} signed, {reused} reused, {failed} failed ({rate:.1f} documents/s)")
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s: {signed} signed, {reused} reused without an API call, {failed} failed")
+    if failed:
+        print(f"Failed documents listed in: {failures_path}")
+
+
+def sign_pdfs_batch():
+    """
+    Add the same signature to every PDF in a folder
+    Process: Encode signature and options once → Stream PDFs through a worker pool → Save each signed PDF
+    The signature image is read and base64-encoded once per run, not once per document
+    """
+
+    # API Configuration - PDF4me service for adding signatures to PDF documents
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
+    input_folder = "documents"  # Folder with the PDFs to sign
+    signature_file_path = "dev.jpg"  # Path to the signature image file
+    output_folder = "Signed_outputs"  # Output folder for signed PDFs
+    manifest_path = "Signed_manifest.jsonl"  # Request key -> output of every signed document, used for dedupe
+    failures_path = "Signed_failures.jsonl"  # One line per document that failed
+    max_workers = 8  # Concurrent API requests
+    url = "https://api.pdf4me.com/api/v2/SignPdf"
+
+    # Check if the input folder and signature exist before proceeding
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    if not os.path.exists(signature_file_path):
+        print(f"Error: Signature image file not found at {signature_file_path}")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Encode the signature once and pre-serialise all options shared by every request
+    with open(signature_file_path, "rb") as f:
+        signature_base64 = base64.b64encode(f.read()).decode('utf-8')
+    static_fragment = build_static_fragment({
+        "imageFile": signature_base64,                   # Base64 encoded signature image content
+        "imageName": os.path.basename(signature_file_path),  # Signature image file name with extension
+        "pages": "1-3",                                  # Page options: "1", "1,3,5", "2-5", "1,3,7-10", "2-"
+        "alignX": "right",                               # Horizontal alignment: "Left", "Center", "Right"
+        "alignY": "bottom",                              # Vertical alignment: "Top", "Middle", "Bottom"
+        "widthInMM": "50",                               # Signature width in millimeters (10-200)
+        "heightInMM": "25",                              # Signature height in millimeters (10-200)
+        "widthInPx": "142",                              # Signature width in pixels (20-600)
+        "heightInPx": "71",                              # Signature height in pixels (20-600)
+        "marginXInMM": "20",                             # Horizontal margin in millimeters (0-100)
+        "marginYInMM": "20",                             # Vertical margin in millimeters (0-100)
+        "marginXInPx": "57",                             # Horizontal margin in pixels (0-300)
+        "marginYInPx": "57",                             # Vertical margin in pixels (0-300)
+        "opacity": "100",                                # Opacity (0-100): 0=invisible, 100=fully opaque
+        "showOnlyInPrint": True,                         # Show signature in view and print (true/false)
+        "isBackground": False,                           # Place signature in background/foreground (true/false)
+        "async": True                                    # Enable asynchronous processing
+    })
+    print(f"Signature encoded once: {len(static_fragment)} bytes of shared request data")
+
+    run_sign_batch(api_key, url, input_folder, output_folder, static_fragment, max_workers, manifest_path, failures_path)
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Adding signature to PDF...")
-    sign_pdf()
+    if batch_mode:
+        sign_pdfs_batch()
+    else:
+        sign_pdf()
@@ -1,9 +1,17 @@
 import os
 import base64
+import hashlib
 import requests
 import time
 import json
 
+# Optional form schema cache - install with: pip install pypdf
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+except ImportError:
+    PdfReader = None
+
 def extract_form_data_from_pdf():
     """
     Extract form data from a PDF document using PDF4me API
@@ -16,6 +24,11 @@ def extract_form_data_from_pdf():
     pdf_file_path = "sample.pdf"  # Path to the main PDF file
     output_path = "Extract_form_data_output.json"  # Output form data file name
     
+    # Schema cache - field layout per form template, used to validate and project the extracted data
+    use_schema_cache = True
+    schema_cache_path = "form_schema_cache.json"  # Field lists keyed by AcroForm structural hash
+    projected_output_path = "Extract_form_data_projected.json"  # Values in template field order
+    
     # API endpoint for extracting form data from PDF documents
     base_url = "https://api.pdf4me.com/"
     url = f"{base_url}api/v2/ExtractPdfFormData"
@@ -25,6 +38,23 @@ def extract_form_data_from_pdf():
         print(f"Error: PDF file not found at {pdf_file_path}")
         return
 
+    # Look up the form template locally; the schema is only read from the document the first time a template is seen
+    schema_fields = None
+    if use_schema_cache and PdfReader is not None:
+        try:
+            schema_hash, schema_fields, from_cache = get_form_schema(pdf_file_path, schema_cache_path)
+            if schema_hash is None:
+                print("Document has no AcroForm; skipping schema check")
+                schema_fields = None
+            else:
+                source = "cached template" if from_cache else "new template, added to cache"
+                print(f"Form schema {schema_hash[:12]}: {len(schema_fields)} fields ({source})")
+        except Exception as e:
+            print(f"Could not read form schema, continuing without it: {e}")
+            schema_fields = None
+    elif use_schema_cache:
+        print("pypdf is not installed; skipping schema check (pip install pypdf)")
+
     # Read the PDF file and convert it to base64 encoding
     try:
         with open(pdf_file_path, "rb") as f:
@@ -83,6 +113,9 @@ def extract_form_data_from_pdf():
                     json.dump(form_data, f, indent=2, ensure_ascii=False)
                 print(f"Form data saved: {output_path}")
                 
+                if schema_fields is not None:
+                    save_projected_form_data(form_data, schema_fields, projected_output_path)
+                
                 # Display extracted form data summary
                 if isinstance(form_data, dict):
                     print("\nExtracted Form Data:")
@@ -164,6 +197,9 @@ def extract_form_data_from_pdf():
                             json.dump(form_data, f, indent=2, ensure_ascii=False)
                         print(f"Form data saved: {output_path}")
                         
+                        if schema_fields is not None:
+                            save_projected_form_data(form_data, schema_fields, projected_output_path)
+                        
                         # Display extracted form data summary
                         if isinstance(form_data, dict):
                             print("\nExtracted Form Data:")
@@ -214,6 +250,159 @@ def extract_form_data_from_pdf():
         # Other status codes - Error
         print(f"Error: {response.status_code} - {response.text}")
 
+# Keys left out of the structural hash: values and appearances change when a form is filled in,
+# /Parent and /P point back up the tree (the page is recorded separately in the schema)
+FORM_HASH_SKIP_KEYS = {"/V", "/AP", "/AS", "/Parent", "/P"}
+
+# Readable field types for the schema
+FORM_FIELD_TYPES = {"/Tx": "text", "/Ch": "choice", "/Sig": "signature"}
+
+def hash_form_object(obj, digest, visited):
+    """Feed a form field object and everything it references into the digest, skipping value keys"""
+    if isinstance(obj, IndirectObject):
+        # Referenced objects are hashed once to avoid cycles
+        if obj.idnum in visited:
+            return
+        visited.add(obj.idnum)
+        obj = obj.get_object()
+
+    if isinstance(obj, StreamObject):
+        digest.update(b"stream")
+        hash_form_object(DictionaryObject({k: v for k, v in obj.items() if k != "/Length"}), digest, visited)
+        digest.update(obj.get_data())
+    elif isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for key in sorted(obj.keys()):
+            if key in FORM_HASH_SKIP_KEYS:
+                continue
+            digest.update(key.encode('latin-1'))
+            hash_form_object(obj.raw_get(key), digest, visited)
+        digest.update(b">>")
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            hash_form_object(item, digest, visited)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+def compute_form_schema_hash(reader):
+    """
+    Structural hash of the AcroForm field tree
+    Documents created from the same template hash the same whether or not they are filled in
+    Returns None when the document has no form
+    """
+    acroform = reader.trailer["/Root"].get("/AcroForm")
+    if acroform is None or "/Fields" not in acroform.get_object():
+        return None
+    digest = hashlib.sha256()
+    hash_form_object(acroform.get_object().raw_get("/Fields"), digest, set())
+    return digest.hexdigest()
+
+def extract_form_schema(reader):
+    """
+    List the terminal fields of the AcroForm with their full name, type, flags, options and pages
+    Process: Map widget annotations to page numbers → Walk the field tree inheriting /FT and /Ff → Collect terminal fields
+    """
+    page_of_widget = {}
+    for page_number, page in enumerate(reader.pages, start=1):
+        for annotation in page.get("/Annots") or []:
+            if isinstance(annotation, IndirectObject):
+                page_of_widget[annotation.idnum] = page_number
+
+    fields = []
+
+    def walk(field_ref, parent_name, inherited_type, inherited_flags):
+        field = field_ref.get_object()
+        partial_name = field.get("/T")
+        name = ".".join(part for part in (parent_name, partial_name) if part)
+        field_type = field.get("/FT", inherited_type)
+        flags = int(field.get("/Ff", inherited_flags))
+        kids = field.get("/Kids") or []
+
+        # Kids with a /T are child fields; kids without one are the widgets of this field
+        child_fields = [kid for kid in kids if "/T" in kid.get_object()]
+        if child_fields:
+            for kid in child_fields:
+                walk(kid, name, field_type, flags)
+            return
+
+        widgets = kids or [field_ref]
+        if field_type == "/Btn":
+            readable_type = "pushbutton" if flags & (1 << 16) else "radio" if flags & (1 << 15) else "checkbox"
+        else:
+            readable_type = FORM_FIELD_TYPES.get(field_type, str(field_type))
+        options = [
+            str(option[0] if isinstance(option, ArrayObject) else option)
+            for option in field.get("/Opt") or []
+        ]
+        fields.append({
+            "name": name,
+            "type": readable_type,
+            "flags": flags,
+            "options": options,
+            "pages": sorted({page_of_widget[w.idnum] for w in widgets
+                             if isinstance(w, IndirectObject) and w.idnum in page_of_widget})
+        })
+
+    for field_ref in reader.trailer["/Root"]["/AcroForm"]["/Fields"]:
+        walk(field_ref, "", None, 0)
+    return fields
+
+def get_form_schema(pdf_file_path, schema_cache_path):
+    """
+    Return (schema_hash, fields, from_cache) for a PDF, using the per-template schema cache
+    Only the structural hash is computed for known templates; the field list is read from the cache
+    Returns (None, [], False) for documents without a form
+    """
+    reader = PdfReader(pdf_file_path)
+    schema_hash = compute_form_schema_hash(reader)
+    if schema_hash is None:
+        return None, [], False
+
+    schema_cache = {}
+    if os.path.exists(schema_cache_path):
+        try:
+            with open(schema_cache_path, "r", encoding='utf-8') as f:
+                schema_cache = json.load(f)
+        except Exception as e:
+            print(f"Could not read schema cache, starting empty: {e}")
+
+    if schema_hash in schema_cache:
+        return schema_hash, schema_cache[schema_hash]["fields"], True
+
+    fields = extract_form_schema(reader)
+    schema_cache[schema_hash] = {"template": os.path.basename(pdf_file_path), "fields": fields}
+    with open(schema_cache_path, "w", encoding='utf-8') as f:
+        json.dump(schema_cache, f, indent=2, ensure_ascii=False)
+    return schema_hash, fields, False
+
+def save_projected_form_data(form_data, schema_fields, projected_output_path):
+    """
+    Validate extracted values against the template schema and save them in field order
+    Fields missing from the response are written as null; values for unknown fields are reported and left out
+    """
+    values = form_data.get("formData") if isinstance(form_data, dict) else None
+    if not isinstance(values, dict):
+        print("Response has no formData object; skipping schema projection")
+        return
+
+    field_names = [field["name"] for field in schema_fields]
+    known = set(field_names)
+    missing = [name for name in field_names if name not in values]
+    unexpected = [name for name in values if name not in known]
+
+    projected = {name: values.get(name) for name in field_names}
+    with open(projected_output_path, "w", encoding='utf-8') as f:
+        json.dump(projected, f, indent=2, ensure_ascii=False)
+
+    print(f"Schema check: {len(field_names) - len(missing)}/{len(field_names)} template fields returned")
+    if missing:
+        print(f"  Missing fields: {', '.join(missing)}")
+    if unexpected:
+        print(f"  Fields not in template: {', '.join(unexpected)}")
+    print(f"Projected form data saved: {projected_output_path}")
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Extracting form data from PDF...")
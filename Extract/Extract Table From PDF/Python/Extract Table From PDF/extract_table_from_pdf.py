@@ -1,9 +1,28 @@
 import os
 import base64
 import requests
+import re
 import time
 import json
 
+# Optional columnar post-processing - install with: pip install numpy pyarrow
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Numbers accepted by the columnar post-processing: plain, or with thousands grouping
+PLAIN_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+GROUPED_NUMBER = re.compile(r"-?\d{1,3}([,'.])\d{3}(?:\1\d{3})*(?:([.,])\d+)?")
+
 def extract_table_from_pdf():
     """
     Extract table data from a PDF document using PDF4me API
@@ -89,41 +108,10 @@ def extract_table_from_pdf():
                     json.dump(table_data, f, indent=2, ensure_ascii=False)
                 print(f"Table metadata saved: {metadata_path}")
                 
-                # Process and save individual tables
-                if isinstance(table_data, dict) and 'tables' in table_data:
-                    tables = table_data['tables']
-                    if tables and isinstance(tables, list):
-                        print(f"Found {len(tables)} tables")
-                        for i, table in enumerate(tables):
-                            try:
-                                # Save each table as separate JSON file
-                                table_path = os.path.join(output_folder, f'table_{i+1}.json')
-                                with open(table_path, 'w', encoding='utf-8') as f:
-                                    json.dump(table, f, indent=2, ensure_ascii=False)
-                                print(f"Table {i+1} saved: {table_path}")
-                                
-                                # Convert table to CSV if possible
-                                if isinstance(table, dict) and 'rows' in table:
-                                    csv_path = os.path.join(output_folder, f'table_{i+1}.csv')
-                                    save_table_as_csv(table['rows'], csv_path)
-                                elif isinstance(table, list):
-                                    csv_path = os.path.join(output_folder, f'table_{i+1}.csv')
-                                    save_table_as_csv(table, csv_path)
-                                    
-                            except Exception as e:
-                                print(f"Error saving table {i+1}: {e}")
-                    else:
-                        print("No tables found in response")
-                
-                # Handle single table response
-                elif isinstance(table_data, list):
-                    # Direct table array
-                    csv_path = os.path.join(output_folder, 'extracted_table.csv')
-                    save_table_as_csv(table_data, csv_path)
-                    print(f"Single table saved: {csv_path}")
+                save_tables_row_wise(table_data, output_folder)
                 
-                # Display table summary
-                display_table_summary(table_data)
+                # Stitch multi-page tables and export them in columnar form as well (numpy + pyarrow)
+                process_tables_columnar(table_data, output_folder)
                 
             else:
                 # Response is binary content (possibly Excel or CSV)
@@ -190,41 +178,10 @@ def extract_table_from_pdf():
                             json.dump(table_data, f, indent=2, ensure_ascii=False)
                         print(f"Table metadata saved: {metadata_path}")
                         
-                        # Process and save individual tables
-                        if isinstance(table_data, dict) and 'tables' in table_data:
-                            tables = table_data['tables']
-                            if tables and isinstance(tables, list):
-                                print(f"Found {len(tables)} tables")
-                                for i, table in enumerate(tables):
-                                    try:
-                                        # Save each table as separate JSON file
-                                        table_path = os.path.join(output_folder, f'table_{i+1}.json')
-                                        with open(table_path, 'w', encoding='utf-8') as f:
-                                            json.dump(table, f, indent=2, ensure_ascii=False)
-                                        print(f"Table {i+1} saved: {table_path}")
-                                        
-                                        # Convert table to CSV if possible
-                                        if isinstance(table, dict) and 'rows' in table:
-                                            csv_path = os.path.join(output_folder, f'table_{i+1}.csv')
-                                            save_table_as_csv(table['rows'], csv_path)
-                                        elif isinstance(table, list):
-                                            csv_path = os.path.join(output_folder, f'table_{i+1}.csv')
-                                            save_table_as_csv(table, csv_path)
-                                            
-                                    except Exception as e:
-                                        print(f"Error saving table {i+1}: {e}")
-                            else:
-                                print("No tables found in response")
-                        
-                        # Handle single table response
-                        elif isinstance(table_data, list):
-                            # Direct table array
-                            csv_path = os.path.join(output_folder, 'extracted_table.csv')
-                            save_table_as_csv(table_data, csv_path)
-                            print(f"Single table saved: {csv_path}")
+                        save_tables_row_wise(table_data, output_folder)
                         
-                        # Display table summary
-                        display_table_summary(table_data)
+                        # Stitch multi-page tables and export them in columnar form as well (numpy + pyarrow)
+                        process_tables_columnar(table_data, output_folder)
                         
                     else:
                         # Response is binary content (possibly Excel or CSV)
@@ -259,6 +216,44 @@ def extract_table_from_pdf():
         # Other status codes - Error
         print(f"Error: {response.status_code} - {response.text}")
 
+def save_tables_row_wise(table_data, output_folder):
+    """Save each extracted table as JSON and CSV row by row and print a summary"""
+    # Process and save individual tables
+    if isinstance(table_data, dict) and 'tables' in table_data:
+        tables = table_data['tables']
+        if tables and isinstance(tables, list):
+            print(f"Found {len(tables)} tables")
+            for i, table in enumerate(tables):
+                try:
+                    # Save each table as separate JSON file
+                    table_path = os.path.join(output_folder, f'table_{i+1}.json')
+                    with open(table_path, 'w', encoding='utf-8') as f:
+                        json.dump(table, f, indent=2, ensure_ascii=False)
+                    print(f"Table {i+1} saved: {table_path}")
+
+                    # Convert table to CSV if possible
+                    if isinstance(table, dict) and 'rows' in table:
+                        csv_path = os.path.join(output_folder, f'table_{i+1}.csv')
+                        save_table_as_csv(table['rows'], csv_path)
+                    elif isinstance(table, list):
+                        csv_path = os.path.join(output_folder, f'table_{i+1}.csv')
+                        save_table_as_csv(table, csv_path)
+
+                except Exception as e:
+                    print(f"Error saving table {i+1}: {e}")
+        else:
+            print("No tables found in response")
+
+    # Handle single table response
+    elif isinstance(table_data, list):
+        # Direct table array
+        csv_path = os.path.join(output_folder, 'extracted_table.csv')
+        save_table_as_csv(table_data, csv_path)
+        print(f"Single table saved: {csv_path}")
+
+    # Display table summary
+    display_table_summary(table_data)
+
 def save_table_as_csv(table_rows, csv_path):
     """Convert table data to CSV format and save"""
     try:
@@ -324,6 +319,194 @@ def display_table_summary(table_data):
     else:
         print("⚠️  No tables were found in the PDF")
 
+def table_to_matrix(table):
+    """
+    Convert one table from the API response into a 2D NumPy array of strings
+    Accepts a table dict with 'rows', a list of row lists, or a list of row dicts
+    
+    Returns:
+        numpy.ndarray: Array of shape (rows, columns), or None if the table has no rows
+    """
+    rows = table.get('rows') if isinstance(table, dict) else table
+    if not rows or not isinstance(rows, list):
+        return None
+    
+    if isinstance(rows[0], dict):
+        # List of dictionaries - keys become the first (header) row
+        keys = list(rows[0].keys())
+        rows = [keys] + [[row.get(key, "") for key in keys] for row in rows]
+    
+    # Pad ragged rows so every row has the same number of cells
+    width = max(len(row) if isinstance(row, list) else 1 for row in rows)
+    matrix = np.full((len(rows), width), "", dtype=object)
+    for i, row in enumerate(rows):
+        cells = row if isinstance(row, list) else [row]
+        matrix[i, :len(cells)] = ["" if cell is None else str(cell) for cell in cells]
+    return np.char.strip(matrix.astype(str))
+
+def parse_number(cell):
+    """
+    Parse one numeric cell, or return None when it is not an unambiguous number
+    Accepts plain numbers (1234.5) and grouped numbers whose separators follow the grouping pattern
+    (1,234.5 / 1'234.50 / 1.234,56), with accounting negatives in parentheses. A comma without
+    thousands grouping (1,5) is ambiguous and, like "nan" or "inf", is not treated as a number
+    
+    Returns:
+        tuple: (value, thousands separator or None, decimal separator or None), or None
+    """
+    negative = cell.startswith("(") and cell.endswith(")")
+    if negative:
+        cell = cell[1:-1]
+    if PLAIN_NUMBER.fullmatch(cell):
+        value = float(cell)
+        group, decimal = None, "." if "." in cell else None
+    else:
+        match = GROUPED_NUMBER.fullmatch(cell)
+        if not match or match.group(2) == match.group(1):
+            return None
+        group, decimal = match.groups()
+        value = float(cell.replace(group, "").replace(",", "."))
+    return (-value if negative else value), group, decimal
+
+def coerce_numeric(column):
+    """
+    Numeric coercion of one column of strings
+    Every non-empty cell must parse with parse_number, and a separator may not act as the thousands
+    separator in one cell and as the decimal separator in another; otherwise the column stays text
+    
+    Returns:
+        numpy.ndarray: float64 or int64 array, or None if the column is not numeric
+    """
+    empty = column == ""
+    if empty.all():
+        return None
+    
+    parsed = [parse_number(cell) for cell in column[~empty]]
+    if any(result is None for result in parsed):
+        return None
+    groups = {group for _, group, _ in parsed if group}
+    decimals = {decimal for _, _, decimal in parsed if decimal}
+    if groups & decimals or len(groups) > 1 or len(decimals) > 1:
+        return None
+    values = np.full(column.shape, np.nan)
+    values[~empty] = [value for value, _, _ in parsed]
+    
+    # Whole numbers without gaps are stored as integers
+    if not empty.any() and np.all(np.mod(values, 1) == 0) and np.all(np.abs(values) < 2 ** 53):
+        return values.astype(np.int64)
+    return values
+
+def detect_header(matrix):
+    """Treat the first row as a header when it has no empty and no numeric cells"""
+    if matrix.shape[0] < 2:
+        return False
+    first_row = matrix[0]
+    if (first_row == "").any():
+        return False
+    return all(coerce_numeric(first_row[i:i + 1]) is None for i in range(first_row.shape[0]))
+
+def table_page(table):
+    """Page number of a table from the API response, or None when the response does not carry one"""
+    if not isinstance(table, dict):
+        return None
+    for key in ('page', 'pageNumber', 'pageIndex'):
+        try:
+            return int(table[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+def stitch_tables(tables):
+    """
+    Join tables that continue across pages
+    A table continues the previous one when it has the same number of columns, does not start
+    before the page after the previous one ends, and either repeats the previous header or has
+    no header of its own while starting on exactly the next page
+    Headerless tables without page numbers are never joined
+    
+    Returns:
+        list: (header, body) tuples, where header is a list of column names
+    """
+    stitched = []
+    last_page = None
+    for matrix, page in tables:
+        has_header = detect_header(matrix)
+        header = list(matrix[0]) if has_header else None
+        body = matrix[1:] if has_header else matrix
+        
+        if stitched:
+            previous_header, previous_body = stitched[-1]
+            same_width = previous_body.shape[1] == body.shape[1]
+            pages_known = page is not None and last_page is not None
+            next_page = pages_known and page == last_page + 1
+            if header is not None:
+                continues = header == previous_header and (next_page or not pages_known)
+            else:
+                continues = next_page
+            if same_width and continues:
+                stitched[-1] = (previous_header, np.vstack([previous_body, body]))
+                last_page = page
+                continue
+        
+        if header is None:
+            header = [f"column_{i + 1}" for i in range(body.shape[1])]
+        stitched.append((header, body))
+        last_page = page
+    return stitched
+
+def process_tables_columnar(table_data, output_folder):
+    """
+    Post-process extracted tables as columnar arrays
+    Process: Load rows into NumPy → Detect headers → Stitch multi-page tables → Infer column types → Export CSV/Parquet/Arrow IPC
+    The stitched files are written next to the per-table JSON/CSV outputs
+    """
+    if np is None or pa is None:
+        print("NumPy/pyarrow not installed - skipping columnar table processing (pip install numpy pyarrow)")
+        return
+    
+    if isinstance(table_data, dict) and isinstance(table_data.get('tables'), list):
+        tables = table_data['tables']
+    elif isinstance(table_data, list):
+        tables = [table_data]
+    else:
+        return
+    
+    loaded = [(table_to_matrix(table), table_page(table)) for table in tables]
+    loaded = [(matrix, page) for matrix, page in loaded if matrix is not None]
+    if not loaded:
+        return
+    
+    stitched = stitch_tables(loaded)
+    print("\n--- Columnar Table Processing ---")
+    print(f"  {len(loaded)} tables stitched into {len(stitched)} logical tables")
+    
+    for number, (header, body) in enumerate(stitched, 1):
+        # Infer one dtype per column - a column is numeric only when every non-empty cell is a number
+        columns = {}
+        for index, name in enumerate(header):
+            name = name or f"column_{index + 1}"
+            if name in columns:
+                name = f"{name}_{index + 1}"
+            numeric = coerce_numeric(body[:, index])
+            columns[name] = numeric if numeric is not None else body[:, index]
+        
+        dtypes = ", ".join(
+            f"{name}: {values.dtype if values.dtype.kind in 'if' else 'string'}" for name, values in columns.items()
+        )
+        print(f"  Stitched table {number}: {body.shape[0]} rows x {body.shape[1]} columns ({dtypes})")
+        
+        arrow_table = pa.table({
+            name: pa.array(values) if values.dtype.kind in "if" else pa.array(values.tolist(), type=pa.string())
+            for name, values in columns.items()
+        })
+        csv_path = os.path.join(output_folder, f"stitched_table_{number}.csv")
+        pa_csv.write_csv(arrow_table, csv_path)
+        parquet_path = os.path.join(output_folder, f"stitched_table_{number}.parquet")
+        pq.write_table(arrow_table, parquet_path)
+        arrow_path = os.path.join(output_folder, f"stitched_table_{number}.arrow")
+        feather.write_feather(arrow_table, arrow_path)
+        print(f"✓ Columnar table saved: {csv_path}, {parquet_path}, {arrow_path}")
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Extracting tables from PDF...")
@@ -1,9 +1,15 @@
 import os
 import base64
+import hashlib
+import re
+import sqlite3
 import requests
 import time
 import json
 
+# Corpus mode - extract each document's text once, index it locally and answer expressions from the index
+corpus_mode = False  # Set to True to run expressions over a whole folder of PDFs
+
 def extract_text_by_expression():
     """
     Extract specific text from a PDF document using regular expressions with PDF4me API
@@ -285,7 +291,286 @@ def display_extraction_summary(text_matches, expression, page_sequence):
     
     print("✅ Text extraction by expression completed successfully!")
 
+
+def extract_text_by_expression_corpus():
+    """
+    Run many expressions over a corpus of PDF documents using a local text index
+    Process: Hash each PDF → Extract text via API for unseen hashes only → Store in SQLite index → Match expressions locally → Save CSV
+    Each document's text is fetched once with ExtractResources; later expression sweeps are answered
+    from the index without calling the API again
+    """
+    
+    # API Configuration - PDF4me service for extracting text from PDF documents
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/" # Replace with your actual API key
+    corpus_folder = "corpus"  # Folder containing the PDF documents to index
+    index_path = "expression_index.sqlite"  # Local SQLite index of extracted document text
+    output_folder = "Extract_text_by_expression_outputs"  # Output folder for extracted text
+    
+    # Regular expressions to run over the whole corpus (evaluated locally with Python's re module)
+    expressions = ["%", r"\bUS\b", r"[\w.+-]+@[\w-]+\.[\w.]+"]
+    
+    # Check if the corpus folder exists before proceeding
+    if not os.path.isdir(corpus_folder):
+        print(f"Error: Corpus folder not found at {corpus_folder}")
+        return
+
+    # Validate every expression before indexing, so a typo does not abort the sweep halfway
+    valid_expressions = []
+    for number, expression in enumerate(expressions, 1):
+        try:
+            re.compile(expression)
+            valid_expressions.append((number, expression))
+        except re.error as e:
+            print(f"Error: Invalid expression '{expression}': {e}")
+    if not valid_expressions:
+        return
+
+    # Create output folder if it doesn't exist
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"Created output folder: {output_folder}")
+
+    connection = open_text_index(index_path)
+    try:
+        # Step 1: Index every PDF whose content hash is not yet known
+        pdf_files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(corpus_folder)
+            for name in names if name.lower().endswith(".pdf")
+        )
+        print(f"Found {len(pdf_files)} PDF documents in {corpus_folder}")
+        
+        new_documents = 0
+        for pdf_path in pdf_files:
+            doc_hash = hash_document(pdf_path)
+            # A file edited in place no longer has its old content
+            forget_stale_path(connection, doc_hash, pdf_path)
+            if is_document_indexed(connection, doc_hash):
+                # Known content - record the path only, no API call
+                connection.execute(
+                    "INSERT OR IGNORE INTO document_paths (doc_hash, file_path) VALUES (?, ?)",
+                    (doc_hash, pdf_path)
+                )
+                continue
+            
+            print(f"Extracting text for new document: {pdf_path}")
+            texts = fetch_document_text(pdf_path, api_key)
+            if texts is None:
+                print(f"⚠️  Skipping {pdf_path} - text extraction failed")
+                continue
+            
+            store_document_text(connection, doc_hash, pdf_path, texts)
+            new_documents += 1
+        removed_paths = prune_missing_paths(connection, pdf_files)
+        connection.commit()
+        if removed_paths:
+            print(f"Removed {removed_paths} deleted documents from the index")
+        print(f"✓ Index up to date: {new_documents} new, {len(pdf_files) - new_documents} already indexed")
+        
+        # Step 2: Answer each expression from the local index
+        for number, expression in valid_expressions:
+            corpus_matches = query_text_index(connection, expression)
+            csv_path = os.path.join(output_folder, f"corpus_matches_{number}.csv")
+            save_corpus_matches_as_csv(corpus_matches, csv_path, expression)
+            matched_documents = len({match[0] for match in corpus_matches})
+            print(f"🔍 '{expression}': {len(corpus_matches)} matches in {matched_documents} documents")
+    finally:
+        connection.close()
+    
+    print("✅ Corpus expression sweep completed successfully!")
+
+def hash_document(pdf_path):
+    """Return the SHA-256 hex digest of a PDF file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def open_text_index(index_path):
+    """Open (or create) the SQLite text index and register the REGEXP function"""
+    connection = sqlite3.connect(index_path)
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS documents (
+            doc_hash TEXT PRIMARY KEY,
+            indexed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS document_paths (
+            doc_hash TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            PRIMARY KEY (doc_hash, file_path)
+        );
+        CREATE TABLE IF NOT EXISTS document_text (
+            doc_hash TEXT NOT NULL,
+            segment INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            PRIMARY KEY (doc_hash, segment)
+        );
+    """)
+    
+    # Compiled patterns are cached so each expression is compiled once per sweep
+    pattern_cache = {}
+    def regexp(pattern, value):
+        if pattern not in pattern_cache:
+            pattern_cache[pattern] = re.compile(pattern)
+        return value is not None and pattern_cache[pattern].search(value) is not None
+    connection.create_function("REGEXP", 2, regexp)
+    return connection
+
+def is_document_indexed(connection, doc_hash):
+    """Check whether text for a document hash is already stored in the index"""
+    row = connection.execute("SELECT 1 FROM documents WHERE doc_hash = ?", (doc_hash,)).fetchone()
+    return row is not None
+
+def forget_stale_path(connection, doc_hash, pdf_path):
+    """Remove the mappings of a path to any content other than its current hash"""
+    connection.execute(
+        "DELETE FROM document_paths WHERE file_path = ? AND doc_hash != ?",
+        (pdf_path, doc_hash)
+    )
+
+def prune_missing_paths(connection, current_paths):
+    """
+    Remove paths that are no longer in the corpus, so deleted files stop appearing in results
+    The extracted text stays in the index and is reused if the same content shows up again
+
+    Returns:
+        int: Number of removed path rows
+    """
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS current_paths (file_path TEXT PRIMARY KEY)")
+    connection.execute("DELETE FROM current_paths")
+    connection.executemany("INSERT OR IGNORE INTO current_paths (file_path) VALUES (?)",
+                           [(path,) for path in current_paths])
+    cursor = connection.execute(
+        "DELETE FROM document_paths WHERE file_path NOT IN (SELECT file_path FROM current_paths)"
+    )
+    return cursor.rowcount
+
+def store_document_text(connection, doc_hash, pdf_path, texts):
+    """Store the extracted text segments of one document in the index"""
+    connection.execute(
+        "INSERT OR REPLACE INTO documents (doc_hash, indexed_at) VALUES (?, ?)",
+        (doc_hash, time.strftime('%Y-%m-%d %H:%M:%S'))
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO document_paths (doc_hash, file_path) VALUES (?, ?)",
+        (doc_hash, pdf_path)
+    )
+    connection.execute("DELETE FROM document_text WHERE doc_hash = ?", (doc_hash,))
+    connection.executemany(
+        "INSERT INTO document_text (doc_hash, segment, text) VALUES (?, ?, ?)",
+        [(doc_hash, segment, str(text)) for segment, text in enumerate(texts, 1)]
+    )
+
+def query_text_index(connection, expression):
+    """
+    Find all matches of an expression in the indexed text
+    SQLite narrows the rows with REGEXP, then every match in those rows is collected
+    
+    Returns:
+        list: (file_path, segment, matched_text) tuples
+    """
+    pattern = re.compile(expression)
+    rows = connection.execute(
+        """
+        SELECT p.file_path, t.segment, t.text
+        FROM document_text t JOIN document_paths p ON p.doc_hash = t.doc_hash
+        WHERE t.text REGEXP ?
+        ORDER BY p.file_path, t.segment
+        """,
+        (expression,)
+    )
+    return [
+        (file_path, segment, match.group(0))
+        for file_path, segment, text in rows
+        for match in pattern.finditer(text)
+    ]
+
+def fetch_document_text(pdf_path, api_key):
+    """
+    Extract all text of one PDF with the PDF4me ExtractResources API
+    Process: Read PDF → Encode to base64 → Send API request → Poll for completion → Return text list
+    
+    Returns:
+        list: Extracted text segments, or None if extraction failed
+    """
+    url = "https://api.pdf4me.com/api/v2/ExtractResources"
+    
+    try:
+        with open(pdf_path, "rb") as f:
+            pdf_base64 = base64.b64encode(f.read()).decode('utf-8')
+    except Exception as e:
+        print(f"Error reading PDF file: {e}")
+        return None
+
+    payload = {
+        "docContent": pdf_base64,                                  # Base64 encoded PDF document content
+        "docName": os.path.basename(pdf_path),                     # Name of the input PDF file
+        "extractText": True,                                       # Only the text is needed for the index
+        "extractImage": False,                                     # Skip images to keep responses small
+        "async": True                                              # Enable asynchronous processing
+    }
+    headers = {
+        "Authorization": f"Basic {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    try:
+        response = requests.post(url, json=payload, headers=headers, verify=False, timeout=300)
+        
+        if response.status_code == 202:
+            # Poll the Location URL until extraction is complete
+            location_url = response.headers.get('Location')
+            if not location_url:
+                print("Error: No polling URL found in response")
+                return None
+            
+            max_retries = 15
+            retry_delay = 8
+            for attempt in range(max_retries):
+                time.sleep(retry_delay)
+                response = requests.get(location_url, headers=headers, verify=False, timeout=60)
+                if response.status_code != 202:
+                    break
+            else:
+                print("Timeout: Text extraction did not complete after multiple retries")
+                return None
+        
+        if response.status_code != 200:
+            print(f"Error: {response.status_code} - {response.text}")
+            return None
+        
+        resource_data = response.json()
+    except Exception as e:
+        print(f"Error extracting text: {e}")
+        return None
+    
+    texts = resource_data.get('texts', []) if isinstance(resource_data, dict) else []
+    return texts if isinstance(texts, list) else [texts]
+
+def save_corpus_matches_as_csv(corpus_matches, csv_path, expression):
+    """Save corpus-wide expression matches as CSV format"""
+    try:
+        import csv
+        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            
+            # Write header
+            writer.writerow(['Match_Number', 'Document', 'Text_Segment', 'Extracted_Text', 'Expression_Used'])
+            
+            # Write matches
+            for i, (file_path, segment, match) in enumerate(corpus_matches, 1):
+                writer.writerow([i, file_path, segment, match, expression])
+                
+        print(f"✓ CSV file saved: {csv_path}")
+    except Exception as e:
+        print(f"Error saving CSV: {e}")
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
-    print("Extracting text by expression from PDF...")
-    extract_text_by_expression()
+    if corpus_mode:
+        print("Running expressions over PDF corpus...")
+        extract_text_by_expression_corpus()
+    else:
+        print("Extracting text by expression from PDF...")
+        extract_text_by_expression()
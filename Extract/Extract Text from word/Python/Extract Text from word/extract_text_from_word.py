@@ -3,6 +3,8 @@ import base64
 import requests
 import time
 import json
+import zipfile
+import xml.etree.ElementTree as ET
 
 def extract_text_from_word():
     """
@@ -14,8 +16,16 @@ def extract_text_from_word():
     # API Configuration - PDF4me service for extracting text from Word documents
     api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/" # Replace with your actual API key
     word_file_path = "sample.docx"  # Path to the main Word file (.docx or .doc)
-    
+    use_local_extraction = True  # Try the local DOCX parser first; the API is used when it cannot honour the options
 
+    # Extraction options, shared by the local fast path and the API request
+    extraction_options = {
+        "StartPageNumber": 1,                                      # Starting page number
+        "EndPageNumber": 3,                                        # Ending page number
+        "RemoveComments": True,                                    # Remove comments option
+        "RemoveHeaderFooter": True,                                # Remove header/footer option
+        "AcceptChanges": True                                      # Accept tracked changes option
+    }
     
     # API endpoint for extracting text from Word documents
     base_url = "https://api.pdf4me.com/"
@@ -26,6 +36,16 @@ def extract_text_from_word():
         print(f"Error: Word file not found at {word_file_path}")
         return
 
+    # Fast path: plain DOCX documents are read locally without uploading them
+    if use_local_extraction:
+        started = time.time()
+        local_text = extract_text_locally(word_file_path, extraction_options)
+        if local_text is not None:
+            print(f"✓ Text extracted locally in {time.time() - started:.3f}s (no API call)")
+            process_extracted_text_data({"text": local_text},
+                                        extraction_options['StartPageNumber'], extraction_options['EndPageNumber'])
+            return
+
     # Read the Word file and convert it to base64 encoding
     try:
         with open(word_file_path, "rb") as f:
@@ -40,11 +60,7 @@ def extract_text_from_word():
     payload = {
         "docContent": word_base64,                                 # Base64 encoded Word document content
         "docName": "output",                                       # Name of the input Word file
-        "StartPageNumber": 1,                                      # Starting page number
-        "EndPageNumber": 3,                                        # Ending page number
-        "RemoveComments": True,                                    # Remove comments option
-        "RemoveHeaderFooter": True,                                # Remove header/footer option
-        "AcceptChanges": True,                                     # Accept tracked changes option
+        **extraction_options,                                      # Page range and content filtering options
         "async": False                                              # Enable asynchronous processing
     }
 
@@ -388,6 +404,110 @@ def display_text_summary(text_content, start_page, end_page):
     else:
         print("  No readable text content was extracted")
 
+# WordprocessingML and markup-compatibility namespaces used in word/document.xml
+W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+# Tracked-change elements whose text only the API can accept or reject
+REVISION_TAGS = {W_NAMESPACE + name for name in ("ins", "del", "moveFrom", "moveTo")}
+
+def extract_text_locally(word_file_path, options):
+    """
+    Extract text from a plain DOCX without calling the API
+    Process: Check package parts against the options → Stream word/document.xml with iterparse → Count pages from rendered page-break hints → Collect text of the requested pages
+
+    Pages are counted from w:lastRenderedPageBreak (written by Word when it last laid out the document)
+    and explicit w:br w:type="page" breaks. A document without either hint is treated as a single page.
+    Parsing stops as soon as EndPageNumber is passed, so only the requested part of the document is read.
+
+    Returns:
+        str or None: The extracted text, or None when the document needs server-side processing
+        (tracked changes, comments or headers/footers that must be kept, or a non-DOCX file)
+    """
+    try:
+        package = zipfile.ZipFile(word_file_path)
+    except zipfile.BadZipFile:
+        print("Local extraction skipped: not a DOCX package, using the API")
+        return None
+
+    with package:
+        part_names = package.namelist()
+        if not options.get("RemoveComments") and "word/comments.xml" in part_names:
+            print("Local extraction skipped: comments must be kept, using the API")
+            return None
+        if not options.get("RemoveHeaderFooter") and any(
+                name.startswith(("word/header", "word/footer")) for name in part_names):
+            print("Local extraction skipped: headers/footers must be kept, using the API")
+            return None
+
+        start_page = options.get("StartPageNumber") or 1
+        end_page = options.get("EndPageNumber") or float("inf")
+
+        lines = []
+        paragraphs = []          # Stack of (text pieces, page the paragraph started on), nested for text boxes
+        page = 1
+        text_since_break = True  # False right after an explicit page break, until text follows
+        fallback_depth = 0       # Inside mc:Fallback, which repeats the content of mc:Choice
+        body = None
+        depth = 0                # Element nesting depth: w:document is 1, w:body is 2
+
+        with package.open("word/document.xml") as document_xml:
+            for event, element in ET.iterparse(document_xml, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    depth += 1
+                    if tag == W_NAMESPACE + "body":
+                        body = element
+                else:
+                    depth -= 1
+                    if depth == 2 and body is not None:
+                        # A top-level paragraph or table is complete: detach it from w:body so the
+                        # parsed tree never grows beyond one block, however long the document is
+                        body.clear()
+                if tag == MC_FALLBACK:
+                    fallback_depth += 1 if event == "start" else -1
+                    continue
+                if fallback_depth:
+                    continue
+
+                if event == "start":
+                    if tag == W_NAMESPACE + "p":
+                        paragraphs.append(([], page))
+                    elif tag in REVISION_TAGS:
+                        print("Local extraction skipped: document has tracked changes, using the API")
+                        return None
+                    continue
+
+                if tag == W_NAMESPACE + "t":
+                    text_since_break = True
+                    if paragraphs and start_page <= page <= end_page:
+                        paragraphs[-1][0].append(element.text or "")
+                elif tag == W_NAMESPACE + "tab":
+                    if paragraphs and start_page <= page <= end_page:
+                        paragraphs[-1][0].append("\t")
+                elif tag == W_NAMESPACE + "br" or tag == W_NAMESPACE + "cr":
+                    if element.get(W_NAMESPACE + "type") == "page":
+                        page += 1
+                        text_since_break = False
+                    elif paragraphs and start_page <= page <= end_page:
+                        paragraphs[-1][0].append("\n")
+                elif tag == W_NAMESPACE + "lastRenderedPageBreak":
+                    # Word also records a rendered break right after an explicit one; count that page once
+                    if text_since_break:
+                        page += 1
+                elif tag == W_NAMESPACE + "p" and paragraphs:
+                    pieces, paragraph_page = paragraphs.pop()
+                    if pieces or start_page <= paragraph_page <= end_page:
+                        lines.append("".join(pieces))
+
+                if page > end_page:
+                    break
+
+        # Paragraphs cut off by the end of the page range keep the text collected so far
+        lines.extend("".join(pieces) for pieces, _ in paragraphs if pieces)
+
+    return "\n".join(lines)
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Extracting text from Word document...")
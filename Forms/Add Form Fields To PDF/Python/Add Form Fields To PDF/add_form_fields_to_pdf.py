@@ -1,14 +1,27 @@
 import base64
+import hashlib
 import requests
 import json
+import shutil
 import time
 import os
 
+# Optional form schema cache - install with: pip install pypdf
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+except ImportError:
+    PdfReader = None
+
 # API Configuration - PDF4me service for adding form fields to PDF documents
 api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
 pdf_file_path = "sample.pdf"  # Path to the input PDF file - UPDATE THIS PATH TO YOUR PDF FILE
 output_path = "add_form_fields_PDF_output.pdf"  # Output PDF file name
 
+# Schema cache - documents whose template already has the field are copied instead of sent to the API
+use_schema_cache = True
+schema_cache_path = "form_schema_cache.json"  # Field lists keyed by AcroForm structural hash
+
 # API endpoint for adding form fields to PDF documents
 base_url = "https://api.pdf4me.com/"
 url = f"{base_url}api/v2/AddFormField"
@@ -242,6 +255,175 @@ def handle_async_response_and_save(api_response, output_filename):
         return False
 
 
+# Keys left out of the structural hash: values and appearances change when a form is filled in,
+# /Parent and /P point back up the tree (the page is recorded separately in the schema)
+FORM_HASH_SKIP_KEYS = {"/V", "/AP", "/AS", "/Parent", "/P"}
+
+# Readable field types for the schema
+FORM_FIELD_TYPES = {"/Tx": "text", "/Ch": "choice", "/Sig": "signature"}
+
+
+def hash_form_object(obj, digest, visited):
+    """Feed a form field object and everything it references into the digest, skipping value keys"""
+    if isinstance(obj, IndirectObject):
+        # Referenced objects are hashed once to avoid cycles
+        if obj.idnum in visited:
+            return
+        visited.add(obj.idnum)
+        obj = obj.get_object()
+
+    if isinstance(obj, StreamObject):
+        digest.update(b"stream")
+        hash_form_object(DictionaryObject({k: v for k, v in obj.items() if k != "/Length"}), digest, visited)
+        digest.update(obj.get_data())
+    elif isinstance(obj, DictionaryObject):
+        digest.update(b"<<")
+        for key in sorted(obj.keys()):
+            if key in FORM_HASH_SKIP_KEYS:
+                continue
+            digest.update(key.encode('latin-1'))
+            hash_form_object(obj.raw_get(key), digest, visited)
+        digest.update(b">>")
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            hash_form_object(item, digest, visited)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+
+def compute_form_schema_hash(reader):
+    """
+    Structural hash of the AcroForm field tree
+    Documents created from the same template hash the same whether or not they are filled in
+    Returns None when the document has no form
+    """
+    acroform = reader.trailer["/Root"].get("/AcroForm")
+    if acroform is None or "/Fields" not in acroform.get_object():
+        return None
+    digest = hashlib.sha256()
+    hash_form_object(acroform.get_object().raw_get("/Fields"), digest, set())
+    return digest.hexdigest()
+
+
+def extract_form_schema(reader):
+    """
+    List the terminal fields of the AcroForm with their full name, type, flags, options and pages
+    Process: Map widget annotations to page numbers → Walk the field tree inheriting /FT and /Ff → Collect terminal fields
+    """
+    page_of_widget = {}
+    for page_number, page in enumerate(reader.pages, start=1):
+        for annotation in page.get("/Annots") or []:
+            if isinstance(annotation, IndirectObject):
+                page_of_widget[annotation.idnum] = page_number
+
+    fields = []
+
+    def walk(field_ref, parent_name, inherited_type, inherited_flags):
+        field = field_ref.get_object()
+        partial_name = field.get("/T")
+        name = ".".join(part for part in (parent_name, partial_name) if part)
+        field_type = field.get("/FT", inherited_type)
+        flags = int(field.get("/Ff", inherited_flags))
+        kids = field.get("/Kids") or []
+
+        # Kids with a /T are child fields; kids without one are the widgets of this field
+        child_fields = [kid for kid in kids if "/T" in kid.get_object()]
+        if child_fields:
+            for kid in child_fields:
+                walk(kid, name, field_type, flags)
+            return
+
+        widgets = kids or [field_ref]
+        if field_type == "/Btn":
+            readable_type = "pushbutton" if flags & (1 << 16) else "radio" if flags & (1 << 15) else "checkbox"
+        else:
+            readable_type = FORM_FIELD_TYPES.get(field_type, str(field_type))
+        options = [
+            str(option[0] if isinstance(option, ArrayObject) else option)
+            for option in field.get("/Opt") or []
+        ]
+        fields.append({
+            "name": name,
+            "type": readable_type,
+            "flags": flags,
+            "options": options,
+            "pages": sorted({page_of_widget[w.idnum] for w in widgets
+                             if isinstance(w, IndirectObject) and w.idnum in page_of_widget})
+        })
+
+    for field_ref in reader.trailer["/Root"]["/AcroForm"]["/Fields"]:
+        walk(field_ref, "", None, 0)
+    return fields
+
+
+def get_form_schema(pdf_file_path, schema_cache_path):
+    """
+    Return (schema_hash, fields, from_cache) for a PDF, using the per-template schema cache
+    Only the structural hash is computed for known templates; the field list is read from the cache
+    Returns (None, [], False) for documents without a form
+    """
+    reader = PdfReader(pdf_file_path)
+    schema_hash = compute_form_schema_hash(reader)
+    if schema_hash is None:
+        return None, [], False
+
+    schema_cache = {}
+    if os.path.exists(schema_cache_path):
+        try:
+            with open(schema_cache_path, "r", encoding='utf-8') as f:
+                schema_cache = json.load(f)
+        except Exception as e:
+            print(f"Could not read schema cache, starting empty: {e}")
+
+    if schema_hash in schema_cache:
+        return schema_hash, schema_cache[schema_hash]["fields"], True
+
+    fields = extract_form_schema(reader)
+    schema_cache[schema_hash] = {"template": os.path.basename(pdf_file_path), "fields": fields}
+    with open(schema_cache_path, "w", encoding='utf-8') as f:
+        json.dump(schema_cache, f, indent=2, ensure_ascii=False)
+    return schema_hash, fields, False
+
+
+def parse_page_option(pages):
+    """
+    Expand an API page option such as "1,3-5" into a set of page numbers
+    Returns None for values that are not explicit page numbers (e.g. "all"), as the
+    pages they cover depend on the document
+    """
+    page_numbers = set()
+    try:
+        for part in str(pages).split(","):
+            part = part.strip()
+            if "-" in part:
+                start, end = part.split("-", 1)
+                page_numbers.update(range(int(start), int(end) + 1))
+            elif part:
+                page_numbers.add(int(part))
+    except ValueError:
+        return None
+    return page_numbers or None
+
+
+def find_existing_form_field(schema_fields, form_field_config):
+    """
+    Return the schema entry matching the requested field, or None
+    A field matches when name and type agree and its widgets already cover every requested page;
+    page options that are not explicit page numbers never match, so the API handles them
+    """
+    wanted_type = {"TextBox": "text", "CheckBox": "checkbox"}.get(form_field_config["formFieldType"])
+    wanted_pages = parse_page_option(form_field_config["pages"])
+    if wanted_pages is None:
+        return None
+    for field in schema_fields:
+        if (field["name"] == form_field_config["fieldName"] and field["type"] == wanted_type
+                and wanted_pages <= set(field["pages"])):
+            return field
+    return None
+
+
 def main():
     """
     Main orchestrator function that coordinates the entire form field addition process
@@ -271,6 +453,24 @@ def main():
         print(f"Position: ({form_field_config['positionX']}, {form_field_config['positionY']})")
         print(f"Page: {form_field_config['pages']}")
         
+        # Known templates that already contain the field need no API call
+        if use_schema_cache and PdfReader is not None:
+            try:
+                schema_hash, schema_fields, from_cache = get_form_schema(pdf_file_path, schema_cache_path)
+            except Exception as e:
+                print(f"Could not read form schema, continuing with the API: {e}")
+                schema_hash = None
+            if schema_hash is not None:
+                source = "cached template" if from_cache else "new template, added to cache"
+                print(f"Form schema {schema_hash[:12]}: {len(schema_fields)} fields ({source})")
+                if find_existing_form_field(schema_fields, form_field_config):
+                    shutil.copyfile(pdf_file_path, output_path)
+                    print(f"Field '{form_field_config['fieldName']}' already exists on page(s) {form_field_config['pages']}; "
+                          f"skipped AddFormField and copied the input to {output_path}")
+                    return
+        elif use_schema_cache:
+            print("pypdf is not installed; skipping schema check (pip install pypdf)")
+        
         # Step 1: Read and encode the PDF file
         print("Reading and encoding PDF file...")
         base64_content = read_and_encode_pdf(pdf_file_path)
@@ -289,6 +489,13 @@ def main():
             print(f"Input file: {pdf_file_path}")
             print(f"Output file: {output_path}")
             print(f"Added {form_field_config['formFieldType']} field: '{form_field_config['fieldName']}'")
+            
+            # Record the new layout so later runs on this output recognise the field
+            if use_schema_cache and PdfReader is not None:
+                try:
+                    get_form_schema(output_path, schema_cache_path)
+                except Exception as e:
+                    print(f"Could not cache the output form schema: {e}")
         else:
             print("Form field addition initiated but may require manual checking")
             print("Check your PDF4me dashboard for async job completion")
@@ -1,8 +1,12 @@
 import base64
+import csv
+import re
 import requests
 import json
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # API Configuration - PDF4me service for filling PDF forms
 api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys/"
@@ -300,6 +304,212 @@ def main():
         print("Please check your input file and API configuration")
 
 
+# ---------------------------------------------------------------------------
+# Mass-fill mode - fill the same template once per record
+# ---------------------------------------------------------------------------
+
+mass_fill_mode = False  # Set to True to run main_mass_fill() instead of main()
+records_path = "records.csv"  # CSV or JSONL, one record (form field name -> value) per row
+id_column = "record_id"  # Column naming each output file; the row number is used when missing
+mass_fill_output_folder = "Filled_forms"  # One filled PDF per record
+progress_path = "Filled_forms_progress.jsonl"  # Progress log used to resume an interrupted run
+max_workers = 8  # Concurrent API requests
+requests_per_second = 5  # Upper bound on new requests submitted per second
+
+
+def iter_form_records(path):
+    """
+    Stream form records from a CSV or JSONL file
+    Yields (record_id, form_data) where form_data maps form field names to values
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if extension in (".jsonl", ".ndjson"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+
+        for number, record in enumerate(records, start=1):
+            form_data = dict(record)
+            record_id = str(form_data.pop(id_column, "") or number)
+            yield record_id, form_data
+
+
+def make_rate_limiter(rate):
+    """
+    Return a function that blocks until the next request may be sent
+    Requests are spaced 1/rate seconds apart across all threads
+    """
+    lock = threading.Lock()
+    interval = 1.0 / rate
+    next_slot = [time.monotonic()]
+
+    def acquire():
+        with lock:
+            now = time.monotonic()
+            wait_time = next_slot[0] - now
+            next_slot[0] = max(now, next_slot[0]) + interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    return acquire
+
+
+def load_progress(path):
+    """Return the record ids already filled by an earlier run"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                if entry.get("status") == "done":
+                    done.add(entry["record_id"])
+    return done
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def fill_one_record(static_fragment, form_data, output_filename, acquire):
+    """
+    Fill the template with one record and save the result as soon as the job finishes
+    Process: Splice record into the pre-serialised body → Wait for rate limit → Send API request → Poll for completion → Save PDF
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    input_form_data = [{"fieldName": name, "fieldValue": value} for name, value in form_data.items()]
+
+    # Only the record is serialised here; the template and static options fragment is reused as-is
+    body = ('{' + static_fragment +
+            ',"dataArray":' + json.dumps(json.dumps(form_data)) +
+            ',"InputFormData":' + json.dumps(input_form_data) + '}')
+
+    session = get_session()
+    acquire()
+    response = session.post(url, data=body.encode("utf-8"), timeout=120)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 20
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    with open(output_filename, "wb") as output_file:
+        output_file.write(response.content)
+
+
+def main_mass_fill():
+    """
+    Fill the template once per record in records_path
+    Process: Encode template once → Stream records → Fill concurrently under the rate limit → Save each PDF → Log progress
+
+    Records already marked done in the progress log are skipped, so an interrupted run can simply be restarted.
+    """
+    print("Starting PDF mass form filling")
+
+    if not os.path.exists(records_path):
+        print(f"Error: Records file not found at {records_path}")
+        return
+
+    os.makedirs(mass_fill_output_folder, exist_ok=True)
+
+    # The template is read and encoded once, together with the options that are the same for every record
+    base64_content = read_and_encode_pdf(pdf_file_path)
+    static_fragment = json.dumps({
+        "templateDocName": os.path.basename(pdf_file_path),  # Template document name
+        "templateDocContent": base64_content,                # Base64 PDF content
+        "outputType": "pdf",                                 # Output type - must be pdf
+        "inputDataType": "json",                             # Input data type - json format
+        "metaData": "",                                      # Additional metadata
+        "metaDataJson": "",                                  # Additional JSON metadata
+        "async": True                                        # Asynchronous processing
+    }, separators=(",", ":"))[1:-1]
+
+    done_ids = load_progress(progress_path)
+    if done_ids:
+        print(f"Resuming: {len(done_ids)} records already filled")
+
+    acquire = make_rate_limiter(requests_per_second)
+    started = time.time()
+    filled, skipped, failed = 0, 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(progress_path, "a", encoding="utf-8") as progress:
+        pending = {}
+
+        def collect(done):
+            nonlocal filled, failed
+            for future in done:
+                record_id = pending.pop(future)
+                try:
+                    future.result()
+                    filled += 1
+                    progress.write(json.dumps({"record_id": record_id, "status": "done"}) + "\n")
+                except Exception as e:
+                    failed += 1
+                    progress.write(json.dumps({"record_id": record_id, "status": "failed", "error": str(e)}) + "\n")
+                    print(f"✗ {record_id}: {e}")
+            # Flush so a crash loses at most the records still in flight
+            progress.flush()
+            if filled and filled % 100 == 0:
+                rate = filled / max(time.time() - started, 1e-9)
+                print(f"Progress: {filled} filled, {failed} failed ({rate:.1f} forms/s)")
+
+        for record_id, form_data in iter_form_records(records_path):
+            if record_id in done_ids:
+                skipped += 1
+                continue
+
+            safe_name = re.sub(r'[^A-Za-z0-9._-]+', "_", record_id)
+            output_filename = os.path.join(mass_fill_output_folder, f"{safe_name}.pdf")
+            future = executor.submit(fill_one_record, static_fragment, form_data, output_filename, acquire)
+            pending[future] = record_id
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Mass fill finished in {elapsed:.1f}s")
+    print(f"  Filled: {filled}, already done: {skipped}, failed: {failed}")
+    print(f"Filled forms saved in: {mass_fill_output_folder}")
+    print(f"Progress log: {progress_path}")
+
+
 # Execute the main function when script is run directly
 if __name__ == "__main__":
-    main()
+    if mass_fill_mode:
+        main_mass_fill()
+    else:
+        main()
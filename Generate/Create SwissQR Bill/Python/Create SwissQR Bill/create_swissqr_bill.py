@@ -1,8 +1,12 @@
 import base64
+import csv
+import re
 import requests
 import json
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # API Configuration - PDF4me service for creating Swiss QR Bills
 api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
@@ -306,6 +310,316 @@ def main():
         print("Please check your input file and API configuration")
 
 
+# ---------------------------------------------------------------------------
+# Batch mode - one bill per debtor row, all on the same base PDF
+# ---------------------------------------------------------------------------
+
+batch_mode = False  # Set to True to run main_batch() instead of main()
+bills_csv_path = "bills.csv"  # Debtor and amount rows (see README for the columns)
+batch_output_folder = "SwissQR_bills"  # One PDF per bill, named after bill_id
+checkpoint_path = "SwissQR_bills_checkpoint.jsonl"  # Progress log used to resume an interrupted run
+max_workers = 8  # Concurrent API requests
+
+# Creditor details shared by every bill in the run
+creditor = {
+    "iban": "CH0200700110003765824",                           # Swiss IBAN for the creditor
+    "crName": "Test AG",                                       # Creditor name
+    "crAddressType": "S",                                      # Creditor address type (S = Structured)
+    "crStreetOrAddressLine1": "Test Strasse",                  # Creditor street
+    "crStreetOrAddressLine2": "1",                             # Creditor street number
+    "crPostalCode": "8000",                                    # Creditor postal code
+    "crCity": "Zurich",                                        # Creditor city
+}
+
+# Per-bill fields read from each row; anything else in the row is ignored
+BILL_FIELDS = (
+    "amount", "currency", "udName", "udAddressType", "udStreetOrAddressLine1", "udStreetOrAddressLine2",
+    "udPostalCode", "udCity", "referenceType", "reference"
+)
+
+
+def iter_bill_rows_from_csv(csv_path):
+    """
+    Stream bill rows from a CSV file
+    Every row needs a unique 'bill_id' column plus the BILL_FIELDS it uses
+    """
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def iter_bill_rows_from_cursor(cursor, fetch_size=1000):
+    """
+    Stream bill rows from an executed DB-API cursor (sqlite3, psycopg2, pyodbc, ...)
+    Column names are taken from cursor.description, so select them with the CSV column names
+    """
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(zip(columns, row))
+
+
+def iban_is_valid(iban):
+    """Check a Swiss/Liechtenstein IBAN: country code, length and ISO 13616 mod-97 checksum"""
+    iban = iban.replace(" ", "").upper()
+    if not re.fullmatch(r"(CH|LI)\d{2}[0-9A-Z]{17}", iban):
+        return False
+    rearranged = iban[4:] + iban[:4]
+    return int("".join(str(int(c, 36)) for c in rearranged)) % 97 == 1
+
+
+def iban_is_qr_iban(iban):
+    """QR-IBANs carry a QR-IID (institution id) between 30000 and 31999"""
+    iid = int(iban.replace(" ", "")[4:9])
+    return 30000 <= iid <= 31999
+
+
+def qr_reference_is_valid(reference):
+    """Check a 27-digit QR reference with the recursive mod-10 check digit"""
+    reference = reference.replace(" ", "")
+    if not re.fullmatch(r"\d{27}", reference):
+        return False
+    carry = 0
+    for digit in reference[:-1]:
+        carry = (0, 9, 4, 6, 8, 2, 7, 1, 3, 5)[(carry + int(digit)) % 10]
+    return (10 - carry) % 10 == int(reference[-1])
+
+
+def creditor_reference_is_valid(reference):
+    """Check an ISO 11649 creditor reference (RFxx...) with the mod-97 checksum"""
+    reference = reference.replace(" ", "").upper()
+    if not re.fullmatch(r"RF\d{2}[0-9A-Z]{1,21}", reference):
+        return False
+    rearranged = reference[4:] + reference[:4]
+    return int("".join(str(int(c, 36)) for c in rearranged)) % 97 == 1
+
+
+def validate_bill(bill, iban):
+    """
+    Validate one bill locally so that invalid rows never cost an API call
+    Returns a list of error messages, empty when the bill is valid
+    """
+    errors = []
+    is_qr_iban = iban_is_qr_iban(iban)
+    reference_type = bill.get("referenceType") or "NON"
+    reference = (bill.get("reference") or "").replace(" ", "")
+
+    if reference_type == "QRR":
+        if not is_qr_iban:
+            errors.append("referenceType QRR requires a QR-IBAN")
+        if not qr_reference_is_valid(reference):
+            errors.append(f"invalid QR reference: {reference!r}")
+    elif reference_type == "SCOR":
+        if is_qr_iban:
+            errors.append("referenceType SCOR cannot be used with a QR-IBAN")
+        if not creditor_reference_is_valid(reference):
+            errors.append(f"invalid creditor reference: {reference!r}")
+    elif reference_type == "NON":
+        if is_qr_iban:
+            errors.append("a QR-IBAN requires referenceType QRR")
+        if reference:
+            errors.append("referenceType NON must not have a reference")
+    else:
+        errors.append(f"unknown referenceType: {reference_type!r}")
+
+    amount = str(bill.get("amount") or "")
+    if amount:
+        if not re.fullmatch(r"\d{1,9}(\.\d{1,2})?", amount) or float(amount) < 0.01:
+            errors.append(f"invalid amount: {amount!r}")
+
+    if (bill.get("currency") or "CHF") not in ("CHF", "EUR"):
+        errors.append(f"invalid currency: {bill.get('currency')!r}")
+
+    if bill.get("udName") and len(bill["udName"]) > 70:
+        errors.append("debtor name longer than 70 characters")
+
+    return errors
+
+
+def load_checkpoint(path):
+    """Return the bill ids already written by an earlier run"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                if entry.get("status") == "done":
+                    done.add(entry["bill_id"])
+    return done
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def create_one_bill(static_fragment, bill, output_filename):
+    """
+    Create one Swiss QR Bill on the shared base document
+    Process: Splice per-bill fields into the pre-serialised body → Send API request → Poll for completion → Save PDF
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    bill_fields = {field: bill[field] for field in BILL_FIELDS if bill.get(field) not in (None, "")}
+    bill_fields["amount"] = str(bill_fields.get("amount", ""))
+    bill_fields.setdefault("currency", "CHF")
+    bill_fields.setdefault("referenceType", "NON")  # Required by the API; validate_bill assumes NON too
+
+    # Only the per-bill members are serialised here; the base PDF and creditor fragment is reused as-is
+    body = "{" + static_fragment + "," + json.dumps(bill_fields, separators=(",", ":"))[1:-1] + "}"
+
+    session = get_session()
+    response = session.post(url, data=body.encode("utf-8"), timeout=120)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    with open(output_filename, "wb") as output_file:
+        output_file.write(response.content)
+
+
+def main_batch(rows=None):
+    """
+    Create one Swiss QR Bill per row on the same base PDF
+    Process: Encode base PDF once → Validate each row locally → Create bills concurrently → Record progress in the checkpoint
+
+    Args:
+        rows (iterable): Bill rows as dicts; defaults to bills_csv_path. Pass
+            iter_bill_rows_from_cursor(cursor) to read straight from a database
+
+    Rows already marked done in the checkpoint are skipped, so an interrupted run can simply be restarted.
+    """
+    print("Starting Swiss QR Bill batch")
+
+    if not iban_is_valid(creditor["iban"]):
+        print(f"Error: Creditor IBAN {creditor['iban']} is not valid")
+        return
+
+    if rows is None:
+        if not os.path.exists(bills_csv_path):
+            print(f"Error: Bills file not found at {bills_csv_path}")
+            return
+        rows = iter_bill_rows_from_csv(bills_csv_path)
+
+    os.makedirs(batch_output_folder, exist_ok=True)
+
+    # The base PDF is read and encoded once, together with everything that is the same for every bill
+    base64_content = read_and_encode_pdf(pdf_file_path)
+    static_fragment = json.dumps({
+        "docContent": base64_content,                              # Base64 encoded PDF content
+        "docName": os.path.basename(pdf_file_path),                # Document name
+        **creditor,
+        "languageType": "English",                                 # Language for the QR bill
+        "seperatorLine": "LineWithScissor",                        # Separator line style
+        "async": True                                              # Asynchronous processing
+    }, separators=(",", ":"))[1:-1]
+
+    done_ids = load_checkpoint(checkpoint_path)
+    if done_ids:
+        print(f"Resuming: {len(done_ids)} bills already created")
+
+    started = time.time()
+    created, skipped, invalid, failed = 0, 0, 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        pending = {}
+
+        def record(bill_id, status, detail=None):
+            entry = {"bill_id": bill_id, "status": status}
+            if detail:
+                entry["detail"] = detail
+            checkpoint.write(json.dumps(entry) + "\n")
+
+        def collect(done):
+            nonlocal created, failed
+            for future in done:
+                bill_id = pending.pop(future)
+                try:
+                    future.result()
+                    created += 1
+                    record(bill_id, "done")
+                except Exception as e:
+                    failed += 1
+                    record(bill_id, "failed", str(e))
+                    print(f"✗ {bill_id}: {e}")
+            # Flush so a crash loses at most the bills still in flight
+            checkpoint.flush()
+            if created and created % 100 == 0:
+                rate = created / max(time.time() - started, 1e-9)
+                print(f"Progress: {created} created, {invalid} invalid, {failed} failed ({rate:.1f} bills/s)")
+
+        for bill in rows:
+            bill_id = str(bill.get("bill_id") or "").strip()
+            if not bill_id:
+                invalid += 1
+                print("✗ Row without bill_id skipped")
+                continue
+            if bill_id in done_ids:
+                skipped += 1
+                continue
+
+            errors = validate_bill(bill, creditor["iban"])
+            if errors:
+                invalid += 1
+                record(bill_id, "invalid", "; ".join(errors))
+                print(f"✗ {bill_id}: {'; '.join(errors)}")
+                continue
+
+            safe_name = re.sub(r'[^A-Za-z0-9._-]+', "_", bill_id)
+            output_filename = os.path.join(batch_output_folder, f"{safe_name}.swissqr.pdf")
+            future = executor.submit(create_one_bill, static_fragment, bill, output_filename)
+            pending[future] = bill_id
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s")
+    print(f"  Created: {created}, already done: {skipped}, invalid: {invalid}, failed: {failed}")
+    print(f"Bills saved in: {batch_output_folder}")
+    print(f"Checkpoint: {checkpoint_path}")
+
+
 # Execute the main function when script is run directly
 if __name__ == "__main__":
-    main()
+    if batch_mode:
+        main_batch()
+    else:
+        main()
@@ -1,7 +1,16 @@
 import os
 import base64
+import json
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Batch mode - watermark every image in a folder, reusing the encoded watermark options
+batch_mode = False  # Set to True to use the batch function below
+
+# Image files picked up by the batch mode
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff"}
 
 def add_text_watermark_to_image():
     """
@@ -131,7 +140,166 @@ def add_text_watermark_to_image():
         # Other status codes - Error
         print(f"Error: {response.status_code} - {response.text}")
 
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session(api_key):
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def build_static_fragment(static_options):
+    """
+    Serialise the options shared by every request once
+    Returns the JSON members without the surrounding braces, ready to be spliced into each request body
+    """
+    return json.dumps(static_options, separators=(",", ":"))[1:-1]
+
+
+def watermark_one_image(api_key, url, image_path, output_path, static_fragment):
+    """
+    Watermark one image using the pre-serialised static fragment
+    Process: Encode image → Splice into request body → Send API request → Poll for completion → Save result
+    
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    with open(image_path, "rb") as f:
+        image_base64 = base64.b64encode(f.read()).decode('ascii')
+    
+    # Only the per-image members are serialised here; the watermark fragment is reused as-is
+    body = ('{"docName":' + json.dumps(os.path.basename(image_path)) +
+            ',"docContent":"' + image_base64 + '",' + static_fragment + '}')
+    
+    session = get_session(api_key)
+    response = session.post(url, data=body.encode('utf-8'), timeout=300)
+    
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+        
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+    
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+    
+    with open(output_path, "wb") as f:
+        f.write(response.content)
+
+
+def run_watermark_batch(api_key, url, input_folder, output_folder, static_fragment, max_workers, failures_path):
+    """
+    Stream every image in a folder through a worker pool
+    At most two jobs per worker are queued at a time, and failures are recorded per image
+    without stopping the batch
+    """
+    image_files = (
+        entry.name for entry in os.scandir(input_folder)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+    )
+    
+    started = time.time()
+    succeeded, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}
+        
+        def collect(done):
+            nonlocal succeeded, failed
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    future.result()
+                    succeeded += 1
+                except Exception as e:
+                    failed += 1
+                    failures_file.write(json.dumps({"file": name, "error": str(e)}) + "\n")
+                    print(f"✗ {name}: {e}")
+                if (succeeded + failed) % 100 == 0:
+                    rate = (succeeded + failed) / max(time.time() - started, 1e-9)
+                    print(f"Progress: {succeeded} done, {failed} failed ({rate:.1f} images/s)")
+        
+        for name in image_files:
+            future = executor.submit(
+                watermark_one_image, api_key, url, os.path.join(input_folder, name),
+                os.path.join(output_folder, name), static_fragment
+            )
+            pending[future] = name
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        
+        collect(list(pending))
+    
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s: {succeeded} succeeded, {failed} failed")
+    if failed:
+        print(f"Failed images listed in: {failures_path}")
+
+
+def add_text_watermark_to_images_batch():
+    """
+    Add the same text watermark to every image in a folder
+    Process: Serialise watermark options once → Stream images through a worker pool → Save each result
+    """
+    
+    # API Configuration - PDF4me service for adding text watermark to image documents
+    api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
+    input_folder = "images"  # Folder with the images to watermark
+    output_folder = "Add_text_watermark_outputs"  # Output folder for watermarked images
+    failures_path = "Add_text_watermark_failures.jsonl"  # One line per image that failed
+    max_workers = 8  # Concurrent API requests
+    url = "https://api.pdf4me.com/api/v2/AddTextWatermarkToImage"
+
+    # Check if the input folder exists before proceeding
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Pre-serialise the options shared by every request
+    static_fragment = build_static_fragment({
+        "WatermarkText": "PDF4me Sample Text",                     # Text to be used as watermark
+        "TextPosition": "bottomleft",                              # Position options: topright, topleft, bottomright, bottomleft, centralhorizontal, diagonal, centralvertical, custom
+        "TextFontFamily": "Arial",                                 # Font family for the watermark text
+        "TextFontSize": 50,                                        # Font size for the watermark text (integer)
+        "TextColour": "#b4351a",                                   # Text color in hex format
+        "IsBold": True,                                            # Make text bold (true/false)
+        "IsUnderline": False,                                      # Make text underlined (true/false)
+        "IsItalic": True,                                          # Make text italic (true/false)
+        "Opacity": 1.0,                                            # Text opacity (0.0 to 1.0)
+        "RotationAngle": 0.0,                                      # Rotation angle for the text (float)
+        "PositionX": 272.0,                                        # X position for custom positioning (float)
+        "PositionY": 0.0,                                          # Y position for custom positioning (float)
+        "async": True                                              # Enable asynchronous processing
+    })
+
+    run_watermark_batch(api_key, url, input_folder, output_folder, static_fragment, max_workers, failures_path)
+
 # Run the function when script is executed directly
 if __name__ == "__main__":
     print("Adding text watermark to image...")
-    add_text_watermark_to_image()
+    if batch_mode:
+        add_text_watermark_to_images_batch()
+    else:
+        add_text_watermark_to_image()
@@ -1,8 +1,277 @@
 import os
 import base64
+import json
 import requests
+import struct
 import time
 
+# JPEG markers that are not followed by a length field
+JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+JPEG_SOS_MARKER = 0xDA
+EXIF_HEADER = b"Exif\x00\x00"
+XMP_HEADER = b"http://ns.adobe.com/xap/1.0/\x00"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_jpeg_segments(f):
+    """
+    Walk the JPEG header segments using seek, without reading the compressed image data
+    Process: Check SOI → Read marker and length → Read metadata segments, seek past the rest → Stop at start of scan (SOS)
+    
+    Args:
+        f (file): JPEG file opened in binary mode
+        
+    Returns:
+        tuple: (segments, sos_offset) where segments is a list of (marker, start_offset, end_offset, data);
+               data is only read for APPn, COM and SOFn segments and is None for all others
+               
+    Raises:
+        ValueError: If the file is not a JPEG or the header is truncated
+    """
+    file_size = os.fstat(f.fileno()).st_size
+    f.seek(0)
+    if f.read(2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+    
+    segments = []
+    while True:
+        start_offset = f.tell()
+        marker_bytes = f.read(2)
+        if len(marker_bytes) < 2 or marker_bytes[0] != 0xFF:
+            raise ValueError("Truncated or invalid JPEG header")
+        marker = marker_bytes[1]
+        
+        # Fill bytes (0xFF 0xFF ...) may precede a marker
+        while marker == 0xFF:
+            fill = f.read(1)
+            if not fill:
+                raise ValueError("Truncated or invalid JPEG header")
+            marker = fill[0]
+        
+        if marker == JPEG_SOS_MARKER:
+            return segments, start_offset
+        if marker in JPEG_STANDALONE_MARKERS:
+            segments.append((marker, start_offset, f.tell(), None))
+            continue
+        
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            raise ValueError("Truncated or invalid JPEG header")
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2 or f.tell() + length - 2 > file_size:
+            raise ValueError("Truncated or invalid JPEG header")
+        is_metadata = 0xE0 <= marker <= 0xEF or marker == 0xFE
+        is_frame_header = 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC)
+        if is_metadata or is_frame_header:
+            data = f.read(length - 2)
+        else:
+            data = None
+            f.seek(length - 2, os.SEEK_CUR)
+        segments.append((marker, start_offset, f.tell(), data))
+
+# Names of the EXIF tags reported by the local metadata reader
+EXIF_TAG_NAMES = {
+    0x010E: "ImageDescription", 0x010F: "Make", 0x0110: "Model", 0x0112: "Orientation", 0x011A: "XResolution",
+    0x011B: "YResolution", 0x0128: "ResolutionUnit", 0x0131: "Software", 0x0132: "DateTime",
+    0x013B: "Artist", 0x8298: "Copyright", 0x829A: "ExposureTime", 0x829D: "FNumber",
+    0x8827: "ISOSpeedRatings", 0x9003: "DateTimeOriginal", 0x9004: "DateTimeDigitized",
+    0x920A: "FocalLength", 0xA002: "PixelXDimension", 0xA003: "PixelYDimension", 0xA434: "LensModel",
+}
+EXIF_SUB_IFD_TAG = 0x8769
+
+# Byte size of each TIFF field type (BYTE, ASCII, SHORT, LONG, RATIONAL, UNDEFINED, SLONG, SRATIONAL)
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def parse_exif(tiff):
+    """
+    Decode the tags of IFD0 and the EXIF sub-IFD from a TIFF-structured EXIF block
+    
+    Args:
+        tiff (bytes): EXIF payload starting at the TIFF header ("II*\\0" or "MM\\0*")
+        
+    Returns:
+        dict: Tag name -> value for all readable ASCII, integer and rational tags
+    """
+    if len(tiff) < 8 or tiff[:4] not in (b"II*\x00", b"MM\x00*"):
+        raise ValueError("Invalid TIFF header in EXIF data")
+    byte_order = "<" if tiff[:2] == b"II" else ">"
+    
+    tags = {}
+    pending_ifds = [struct.unpack(byte_order + "I", tiff[4:8])[0]]
+    visited = set()
+    while pending_ifds:
+        ifd_offset = pending_ifds.pop()
+        if ifd_offset in visited or ifd_offset + 2 > len(tiff):
+            continue
+        visited.add(ifd_offset)
+        
+        entry_count = struct.unpack(byte_order + "H", tiff[ifd_offset:ifd_offset + 2])[0]
+        for index in range(entry_count):
+            entry = ifd_offset + 2 + index * 12
+            if entry + 12 > len(tiff):
+                break
+            tag, field_type, count = struct.unpack(byte_order + "HHI", tiff[entry:entry + 8])
+            if field_type not in TIFF_TYPE_SIZES:
+                continue
+            
+            # Values up to 4 bytes are stored in the entry itself, larger ones at an offset
+            size = TIFF_TYPE_SIZES[field_type] * count
+            if size <= 4:
+                value_offset = entry + 8
+            else:
+                value_offset = struct.unpack(byte_order + "I", tiff[entry + 8:entry + 12])[0]
+            raw = tiff[value_offset:value_offset + size]
+            if len(raw) < size:
+                continue
+            
+            if tag == EXIF_SUB_IFD_TAG:
+                if len(raw) < 4:
+                    continue
+                pending_ifds.append(struct.unpack(byte_order + "I", raw[:4])[0])
+                continue
+            
+            if field_type == 2:
+                value = raw.split(b"\x00", 1)[0].decode("latin-1").strip()
+            elif field_type == 1 and count > 4:
+                # Long byte arrays (e.g. Windows XP tags) are not reported
+                continue
+            elif field_type in (1, 3, 4, 9):
+                code = {1: "B", 3: "H", 4: "I", 9: "i"}[field_type]
+                value = list(struct.unpack(f"{byte_order}{count}{code}", raw))
+            elif field_type in (5, 10):
+                code = "I" if field_type == 5 else "i"
+                numbers = struct.unpack(f"{byte_order}{count * 2}{code}", raw)
+                value = [numbers[i] / numbers[i + 1] if numbers[i + 1] else 0.0 for i in range(0, len(numbers), 2)]
+            else:
+                continue
+            
+            if isinstance(value, list) and len(value) == 1:
+                value = value[0]
+            tags[EXIF_TAG_NAMES.get(tag, f"Tag0x{tag:04X}")] = value
+    return tags
+
+
+def read_png_chunks(f):
+    """
+    Walk the PNG chunk list using seek, reading only the small metadata chunks
+    
+    Yields:
+        tuple: (chunk_type, data) - data is None for image data (IDAT) and other large chunks
+    """
+    f.seek(0)
+    if f.read(8) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+    
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("Truncated PNG file")
+        length, chunk_type = struct.unpack(">I4s", header)
+        if chunk_type in (b"IHDR", b"pHYs", b"eXIf", b"iTXt"):
+            data = f.read(length)
+            f.seek(4, os.SEEK_CUR)  # CRC
+        else:
+            data = None
+            f.seek(length + 4, os.SEEK_CUR)
+        yield chunk_type, data
+        if chunk_type == b"IEND":
+            return
+
+
+def read_image_metadata_locally(image_file_path):
+    """
+    Read image metadata from the file headers without decoding any pixels
+    Process: Detect format → Walk JPEG segments / PNG chunks → Decode size, resolution, EXIF and XMP presence
+    
+    The result uses the same field names as the GetImageMetadata API response.
+    
+    Args:
+        image_file_path (str): Path to a JPEG or PNG image
+        
+    Returns:
+        dict: Image metadata, or None if the format is not supported locally
+    """
+    metadata = {
+        "imageFormat": None,
+        "fileSize": os.path.getsize(image_file_path),
+        "width": None,
+        "height": None,
+        "orientation": None,
+        "bitsperPixel": None,
+        "horizontalResolution": 96.0,
+        "verticalResolution": 96.0,
+        "hasExifData": False,
+        "exifData": None,
+        "hasXmpData": False,
+    }
+    
+    with open(image_file_path, "rb") as f:
+        signature = f.read(8)
+        
+        if signature.startswith(b"\xff\xd8"):
+            metadata["imageFormat"] = "Jpeg"
+            segments, _ = read_jpeg_segments(f)
+            for marker, _, _, data in segments:
+                if data is None:
+                    continue
+                if marker == 0xE0 and data.startswith(b"JFIF\x00") and len(data) >= 12:
+                    # JFIF density: units (1 = dpi, 2 = dots per cm), then x and y density
+                    units, x_density, y_density = struct.unpack(">BHH", data[7:12])
+                    if units in (1, 2) and x_density and y_density:
+                        factor = 2.54 if units == 2 else 1.0
+                        metadata["horizontalResolution"] = round(x_density * factor, 1)
+                        metadata["verticalResolution"] = round(y_density * factor, 1)
+                elif marker == 0xE1 and data.startswith(EXIF_HEADER):
+                    metadata["hasExifData"] = True
+                    metadata["exifData"] = parse_exif(data[len(EXIF_HEADER):])
+                elif marker == 0xE1 and data.startswith(XMP_HEADER):
+                    metadata["hasXmpData"] = True
+                elif 0xC0 <= marker <= 0xCF:
+                    if len(data) < 6:
+                        raise ValueError("Truncated JPEG frame header")
+                    precision, height, width, components = struct.unpack(">BHHB", data[:6])
+                    metadata["width"], metadata["height"] = width, height
+                    metadata["bitsperPixel"] = precision * components
+        
+        elif signature == PNG_SIGNATURE:
+            metadata["imageFormat"] = "Png"
+            for chunk_type, data in read_png_chunks(f):
+                if chunk_type == b"IHDR":
+                    if len(data) < 10:
+                        raise ValueError("Truncated PNG header")
+                    width, height, bit_depth, color_type = struct.unpack(">IIBB", data[:10])
+                    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type, 1)
+                    metadata["width"], metadata["height"] = width, height
+                    metadata["bitsperPixel"] = bit_depth * channels
+                elif chunk_type == b"pHYs":
+                    if len(data) < 9:
+                        raise ValueError("Truncated PNG pHYs chunk")
+                    x_ppu, y_ppu, unit = struct.unpack(">IIB", data[:9])
+                    if unit == 1:
+                        # Pixels per metre to dpi
+                        metadata["horizontalResolution"] = round(x_ppu * 0.0254, 1)
+                        metadata["verticalResolution"] = round(y_ppu * 0.0254, 1)
+                elif chunk_type == b"eXIf":
+                    metadata["hasExifData"] = True
+                    metadata["exifData"] = parse_exif(data)
+                elif chunk_type == b"iTXt" and data.startswith(b"XML:com.adobe.xmp\x00"):
+                    metadata["hasXmpData"] = True
+        
+        else:
+            return None
+    
+    if metadata["exifData"]:
+        exif = metadata["exifData"]
+        metadata["orientation"] = exif.get("Orientation")
+        # EXIF resolution is used when the file header does not define one
+        if exif.get("ResolutionUnit") == 2 and exif.get("XResolution") and metadata["horizontalResolution"] == 96.0:
+            metadata["horizontalResolution"] = float(exif["XResolution"])
+            metadata["verticalResolution"] = float(exif.get("YResolution", exif["XResolution"]))
+    return metadata
+
+
+
 def get_image_metadata():
     """
     Get image metadata using PDF4me API
@@ -14,6 +283,7 @@ def get_image_metadata():
     api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
     image_file_path = "sample.png"  # Path to the main image file
     output_path = "Image_metadata_output.json"  # Output metadata file name
+    use_local_reader = True  # Read JPEG/PNG metadata from the file headers, without uploading the image
     
     # API endpoint for getting image metadata
     base_url = "https://api.pdf4me.com"
@@ -24,6 +294,22 @@ def get_image_metadata():
         print(f"Error: Image file not found at {image_file_path}")
         return
 
+    # Local fast path - only the header segments are read, pixels are never decoded
+    if use_local_reader:
+        try:
+            metadata = read_image_metadata_locally(image_file_path)
+        except Exception as e:
+            print(f"Local metadata reader failed, using API instead: {e}")
+            metadata = None
+        
+        if metadata is not None:
+            print("✓ Success! Image metadata read locally!")
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, separators=(",", ":"))
+            print(f"File saved: {output_path}")
+            return
+        print("Image format not supported by the local reader, using API...")
+
     # Read the image file and convert it to base64 encoding
     try:
         with open(image_file_path, "rb") as f:
@@ -0,0 +1,352 @@
+import os
+import io
+import base64
+import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Optional local processing of simple geometry - install with: pip install pillow
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# API Configuration - PDF4me image services used by the pipeline
+api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
+base_url = "https://api.pdf4me.com/"
+
+# PDF4me endpoints for the operations a pipeline can contain
+ENDPOINTS = {
+    "crop": "api/v2/CropImage",
+    "flip": "api/v2/FlipImage",
+    "rotate": "api/v2/RotateImage",
+    "resize": "api/v2/ResizeImage",
+    "compress": "api/v2/CompressImage",
+    "convert": "api/v2/ConvertImageFormat",
+}
+
+# Pillow output format names for the file extensions handled by the pipeline
+PILLOW_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".bmp": "BMP", ".gif": "GIF", ".tif": "TIFF", ".tiff": "TIFF"}
+
+# Pillow transpose method for every (flip_x, flip_y, swap_axes) orientation
+TRANSPOSE_METHODS = {
+    (False, False, False): None,
+    (True, False, False): "FLIP_LEFT_RIGHT",
+    (False, True, False): "FLIP_TOP_BOTTOM",
+    (True, True, False): "ROTATE_180",
+    (False, False, True): "TRANSPOSE",
+    (True, True, True): "TRANSVERSE",
+    (True, False, True): "ROTATE_270",   # 90 degrees clockwise
+    (False, True, True): "ROTATE_90",    # 90 degrees counter-clockwise
+}
+
+
+def plan_pipeline(operations):
+    """
+    Split a chain of image operations into local and server-side stages
+    Process: Mark each operation local or remote → Group consecutive operations of the same kind
+
+    Crop, flip, right-angle rotation and resize are done locally when Pillow is installed;
+    compression, format conversion and free-angle rotation are sent to PDF4me.
+
+    Args:
+        operations (list): (name, options) tuples, e.g. ("rotate", {"RotationAngle": 90})
+
+    Returns:
+        list: ("local", [operations]) and ("remote", operation) stages in execution order
+    """
+    stages = []
+    for name, options in operations:
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown image operation: {name}")
+
+        if is_local_operation(name, options):
+            if stages and stages[-1][0] == "local":
+                stages[-1][1].append((name, options))
+            else:
+                stages.append(("local", [(name, options)]))
+        else:
+            stages.append(("remote", (name, options)))
+    return stages
+
+
+def is_local_operation(name, options):
+    """Check whether an operation can be done locally without changing the result"""
+    if Image is None:
+        return False
+    if name in ("crop", "flip", "resize"):
+        return True
+    if name == "rotate":
+        return int(options.get("RotationAngle", 0)) % 90 == 0
+    return False
+
+
+def fold_geometry(operations, width, height):
+    """
+    Fold a run of crop/flip/rotate operations into one crop box and one transpose
+    Process: Track the crop box in source pixels and the orientation as (flip_x, flip_y, swap_axes)
+
+    Every crop is mapped back into source coordinates, so the image is cropped once and
+    transposed once no matter how many operations were chained.
+
+    Returns:
+        tuple: (crop_box, orientation, remaining_width, remaining_height)
+    """
+    box = [0, 0, width, height]
+    flip_x, flip_y, swap_axes = False, False, False
+    current_width, current_height = width, height
+
+    for name, options in operations:
+        if name == "flip":
+            orientation_type = options.get("orientationType", "Horizontal")
+            if orientation_type in ("Horizontal", "HorizontalAndVertical"):
+                flip_x = not flip_x
+            if orientation_type in ("Vertical", "HorizontalAndVertical"):
+                flip_y = not flip_y
+
+        elif name == "rotate":
+            # Positive angles rotate clockwise; each quarter turn swaps the axes
+            for _ in range((int(options.get("RotationAngle", 0)) // 90) % 4):
+                flip_x, flip_y, swap_axes = not flip_y, flip_x, not swap_axes
+                current_width, current_height = current_height, current_width
+
+        elif name == "crop":
+            if options.get("CropType", "Border") == "Border":
+                left = int(options.get("LeftBorder", 0))
+                top = int(options.get("TopBorder", 0))
+                right = current_width - int(options.get("RightBorder", 0))
+                bottom = current_height - int(options.get("BottomBorder", 0))
+            else:
+                left = int(options.get("UpperLeftX", 0))
+                top = int(options.get("UpperLeftY", 0))
+                right = left + int(options.get("Width", current_width))
+                bottom = top + int(options.get("Height", current_height))
+
+            left, right = max(0, left), min(current_width, right)
+            top, bottom = max(0, top), min(current_height, bottom)
+            if right <= left or bottom <= top:
+                raise ValueError(f"Crop removes the whole image: {options}")
+
+            # Undo the flips, then the axis swap, to get the rectangle in cropped-source coordinates
+            if flip_x:
+                left, right = current_width - right, current_width - left
+            if flip_y:
+                top, bottom = current_height - bottom, current_height - top
+            if swap_axes:
+                left, top, right, bottom = top, left, bottom, right
+
+            box = [box[0] + left, box[1] + top, box[0] + right, box[1] + bottom]
+            current_width, current_height = right - left, bottom - top
+            if swap_axes:
+                current_width, current_height = current_height, current_width
+
+    return tuple(box), (flip_x, flip_y, swap_axes), current_width, current_height
+
+
+def run_local_stage(image, operations):
+    """
+    Apply a run of local operations with Pillow
+    Geometry between two resizes is folded into a single crop and a single transpose
+    """
+    pending_geometry = []
+
+    def apply_geometry(image):
+        if not pending_geometry:
+            return image
+        box, orientation, _, _ = fold_geometry(pending_geometry, image.width, image.height)
+        pending_geometry.clear()
+        if box != (0, 0, image.width, image.height):
+            image = image.crop(box)
+        method = TRANSPOSE_METHODS[orientation]
+        if method:
+            image = image.transpose(getattr(Image.Transpose, method))
+        return image
+
+    for name, options in operations:
+        if name != "resize":
+            pending_geometry.append((name, options))
+            continue
+
+        image = apply_geometry(image)
+        if options.get("ImageResizeType", "Percentage") == "Percentage":
+            factor = float(options.get("ResizePercentage", 100)) / 100
+            size = (max(1, round(image.width * factor)), max(1, round(image.height * factor)))
+        elif options.get("MaintainAspectRatio", True):
+            factor = min(int(options["Width"]) / image.width, int(options["Height"]) / image.height)
+            size = (max(1, round(image.width * factor)), max(1, round(image.height * factor)))
+        else:
+            size = (int(options["Width"]), int(options["Height"]))
+        image = image.resize(size, Image.Resampling.LANCZOS)
+
+    return apply_geometry(image)
+
+
+def run_remote_stage(name, options, image_bytes, file_name):
+    """
+    Send one irreducible operation to PDF4me
+    Process: Encode to base64 → Send API request → Poll for completion → Return result bytes
+    """
+    headers = {
+        "Authorization": f"Basic {api_key}",                       # Authentication using provided API key
+        "Content-Type": "application/json"                        # Specify that we're sending JSON data
+    }
+    payload = {
+        "docContent": base64.b64encode(image_bytes).decode('utf-8'),  # Base64 encoded image content
+        "docName": file_name,                                          # Name of the input image file
+        **options,                                                     # Operation-specific options
+        "async": True                                                  # Enable asynchronous processing
+    }
+
+    response = requests.post(f"{base_url}{ENDPOINTS[name]}", json=payload, headers=headers, verify=False, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError(f"{name}: No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 20
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = requests.get(location_url, headers=headers, verify=False)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError(f"{name}: Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{name}: {response.status_code} - {response.text}")
+    return response.content
+
+
+def encode_image(image, extension):
+    """Encode a Pillow image in the format given by a file extension"""
+    image_format = PILLOW_FORMATS.get(extension.lower(), "PNG")
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **({"quality": 95} if image_format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def run_pipeline(image_path, output_path, stages):
+    """
+    Run a planned pipeline on one image
+    The image is decoded once, stays in memory across local stages and is only
+    encoded when it has to be uploaded for a server-side step or saved
+
+    A server-side format conversion replaces the extension of output_path with the new format's
+
+    Returns:
+        tuple: (local_operation_count, remote_call_count, saved output path)
+    """
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+
+    file_name = os.path.basename(image_path)
+    extension = os.path.splitext(file_name)[1]
+    image = None
+    local_count, remote_count = 0, 0
+
+    for kind, stage in stages:
+        if kind == "local":
+            if image is None:
+                image = Image.open(io.BytesIO(image_bytes))
+                image.load()
+            image = run_local_stage(image, stage)
+            local_count += len(stage)
+        else:
+            if image is not None:
+                image_bytes = encode_image(image, extension)
+                image = None
+            name, options = stage
+            image_bytes = run_remote_stage(name, options, image_bytes, file_name)
+            remote_count += 1
+
+            # A format conversion changes the extension used for later uploads and the output
+            if name == "convert" and "newImageFormat" in options:
+                extension = "." + options["newImageFormat"].lower()
+                file_name = os.path.splitext(file_name)[0] + extension
+
+    # The output keeps the format the image has after the last conversion
+    output_path = os.path.splitext(output_path)[0] + extension
+    if image is not None:
+        image_bytes = encode_image(image, extension)
+    with open(output_path, "wb") as f:
+        f.write(image_bytes)
+    return local_count, remote_count, output_path
+
+
+def image_pipeline():
+    """
+    Apply one chain of image operations to every image in a folder
+    Process: Plan pipeline → Fold local geometry → Run server-side steps → Save results (worker pool over the folder)
+    A typical thumbnail job (crop → flip → rotate → resize → compress) needs one upload instead of five
+    """
+
+    input_folder = "images"  # Folder with the images to process
+    output_folder = "Image_pipeline_outputs"  # Output folder for processed images
+    max_workers = 4  # Images processed in parallel
+
+    # Operation chain - option names match the single-operation samples
+    operations = [
+        ("crop", {"CropType": "Border", "LeftBorder": "10", "RightBorder": "10", "TopBorder": "20", "BottomBorder": "20"}),
+        ("flip", {"orientationType": "Horizontal"}),
+        ("rotate", {"RotationAngle": 90, "Backgroundcolor": "#FFFFFF", "ProportionateResize": True}),
+        ("resize", {"ImageResizeType": "Percentage", "ResizePercentage": "50.0", "MaintainAspectRatio": True}),
+        ("compress", {"imageType": "JPG", "compressionLevel": "Medium"}),
+    ]
+
+    # Check if the input folder exists before proceeding
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    # Create output folder if it doesn't exist
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"Created output folder: {output_folder}")
+
+    if Image is None:
+        print("Pillow not installed - every operation is sent to PDF4me (pip install pillow)")
+
+    stages = plan_pipeline(operations)
+    print("Pipeline plan:")
+    for kind, stage in stages:
+        if kind == "local":
+            print(f"  local:  {' + '.join(name for name, _ in stage)}")
+        else:
+            print(f"  remote: {stage[0]}")
+
+    image_files = sorted(
+        name for name in os.listdir(input_folder)
+        if os.path.splitext(name)[1].lower() in PILLOW_FORMATS
+    )
+    print(f"Processing {len(image_files)} images with {max_workers} workers...")
+
+    started = time.time()
+    succeeded, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(run_pipeline, os.path.join(input_folder, name), os.path.join(output_folder, name), stages): name
+            for name in image_files
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                local_count, remote_count, saved_path = future.result()
+                succeeded += 1
+                print(f"✓ {name} → {os.path.basename(saved_path)}: {local_count} local operations, {remote_count} API calls")
+            except Exception as e:
+                failed += 1
+                print(f"✗ {name}: {e}")
+
+    elapsed = time.time() - started
+    print(f"Pipeline finished in {elapsed:.1f}s: {succeeded} succeeded, {failed} failed")
+    print(f"Results saved in: {output_folder}")
+
+# Run the function when script is executed directly
+if __name__ == "__main__":
+    print("Running image pipeline...")
+    image_pipeline()
@@ -1,8 +1,131 @@
 import os
 import base64
 import requests
+import shutil
+import struct
 import time
 
+# JPEG markers that are not followed by a length field
+JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+JPEG_SOS_MARKER = 0xDA
+EXIF_HEADER = b"Exif\x00\x00"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_jpeg_segments(f):
+    """
+    Walk the JPEG header segments using seek, without reading the compressed image data
+    Process: Check SOI → Read marker and length → Read metadata segments, seek past the rest → Stop at start of scan (SOS)
+    
+    Args:
+        f (file): JPEG file opened in binary mode
+        
+    Returns:
+        tuple: (segments, sos_offset) where segments is a list of (marker, start_offset, end_offset, data);
+               data is only read for APPn, COM and SOFn segments and is None for all others
+               
+    Raises:
+        ValueError: If the file is not a JPEG or the header is truncated
+    """
+    file_size = os.fstat(f.fileno()).st_size
+    f.seek(0)
+    if f.read(2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+    
+    segments = []
+    while True:
+        start_offset = f.tell()
+        marker_bytes = f.read(2)
+        if len(marker_bytes) < 2 or marker_bytes[0] != 0xFF:
+            raise ValueError("Truncated or invalid JPEG header")
+        marker = marker_bytes[1]
+        
+        # Fill bytes (0xFF 0xFF ...) may precede a marker
+        while marker == 0xFF:
+            fill = f.read(1)
+            if not fill:
+                raise ValueError("Truncated or invalid JPEG header")
+            marker = fill[0]
+        
+        if marker == JPEG_SOS_MARKER:
+            return segments, start_offset
+        if marker in JPEG_STANDALONE_MARKERS:
+            segments.append((marker, start_offset, f.tell(), None))
+            continue
+        
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            raise ValueError("Truncated or invalid JPEG header")
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2 or f.tell() + length - 2 > file_size:
+            raise ValueError("Truncated or invalid JPEG header")
+        is_metadata = 0xE0 <= marker <= 0xEF or marker == 0xFE
+        is_frame_header = 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC)
+        if is_metadata or is_frame_header:
+            data = f.read(length - 2)
+        else:
+            data = None
+            f.seek(length - 2, os.SEEK_CUR)
+        segments.append((marker, start_offset, f.tell(), data))
+
+
+def parse_exif_orientation(tiff):
+    """Read the Orientation tag (0x0112) from IFD0 of a TIFF-structured EXIF block, None if absent"""
+    if len(tiff) < 8 or tiff[:4] not in (b"II*\x00", b"MM\x00*"):
+        return None
+    byte_order = "<" if tiff[:2] == b"II" else ">"
+    ifd_offset = struct.unpack(byte_order + "I", tiff[4:8])[0]
+    if ifd_offset + 2 > len(tiff):
+        return None
+    
+    entry_count = struct.unpack(byte_order + "H", tiff[ifd_offset:ifd_offset + 2])[0]
+    for index in range(entry_count):
+        entry = ifd_offset + 2 + index * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, field_type = struct.unpack(byte_order + "HH", tiff[entry:entry + 4])
+        if tag == 0x0112 and field_type == 3:
+            return struct.unpack(byte_order + "H", tiff[entry + 8:entry + 10])[0]
+    return None
+
+
+def read_exif_orientation(image_file_path):
+    """
+    Read the EXIF orientation from the file headers without decoding any pixels
+    Supports JPEG (APP1 Exif segment) and PNG (eXIf chunk)
+    
+    Returns:
+        int: Orientation value (1 = upright), or None if the image has no orientation tag
+        
+    Raises:
+        ValueError: If the format is not supported by the local reader
+    """
+    with open(image_file_path, "rb") as f:
+        signature = f.read(8)
+        
+        if signature.startswith(b"\xff\xd8"):
+            segments, _ = read_jpeg_segments(f)
+            for marker, _, _, data in segments:
+                if marker == 0xE1 and data is not None and data.startswith(EXIF_HEADER):
+                    return parse_exif_orientation(data[len(EXIF_HEADER):])
+            return None
+        
+        if signature == PNG_SIGNATURE:
+            # Walk the chunk list with seek; eXIf is the only chunk that is read
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                length, chunk_type = struct.unpack(">I4s", header)
+                if chunk_type == b"eXIf":
+                    return parse_exif_orientation(f.read(length))
+                if chunk_type == b"IEND":
+                    return None
+                f.seek(length + 4, os.SEEK_CUR)
+        
+        raise ValueError("Unsupported image format")
+
+
 def rotate_image_by_exif_data():
     """
     Rotate image by EXIF data using PDF4me API
@@ -14,6 +137,7 @@ def rotate_image_by_exif_data():
     api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
     image_file_path = "pdf4me.png"  # Path to the main image file
     output_path = "Rotate_image_by_exif_data_output.png"  # Output image file name
+    use_local_check = True  # Skip the API call when the EXIF orientation is already upright
     
     # API endpoint for rotating image documents by EXIF data
     base_url = "https://api.pdf4me.com"
@@ -24,6 +148,19 @@ def rotate_image_by_exif_data():
         print(f"Error: Image file not found at {image_file_path}")
         return
 
+    # Local fast path - an upright image (orientation 1 or no tag) needs no rotation
+    if use_local_check:
+        try:
+            orientation = read_exif_orientation(image_file_path)
+            print(f"EXIF orientation: {orientation if orientation is not None else 'not set'}")
+            if orientation in (None, 1):
+                shutil.copyfile(image_file_path, output_path)
+                print("✓ Image is already upright - API call skipped")
+                print(f"Image saved: {output_path}")
+                return
+        except ValueError as e:
+            print(f"Local orientation check not possible ({e}), using API...")
+
     # Read the image file and convert it to base64 encoding
     try:
         with open(image_file_path, "rb") as f:
@@ -1,14 +1,230 @@
 import os
 import base64
 import requests
+import struct
+import tempfile
 import time
 import json
+import zipfile
+import zlib
+
+# ZIP record signatures used by the streaming reader
+ZIP_LOCAL_FILE_HEADER = b"PK\x03\x04"
+ZIP_DATA_DESCRIPTOR = b"PK\x07\x08"
+ZIP_CENTRAL_DIRECTORY = b"PK\x01\x02"
+ZIP_END_OF_CENTRAL_DIRECTORY = b"PK\x05\x06"
+
+
+def iter_zip_members(chunks):
+    """
+    Read a ZIP archive from an iterable of byte chunks and yield each member as soon as it is complete
+    Process: Buffer chunks → Parse local file header → Read/inflate member data → Verify CRC → Yield member
+    
+    Members are taken from their local file headers, so the central directory at the end
+    of the archive is never needed. Stored and deflated members are supported, including
+    members whose sizes are only written in a trailing data descriptor.
+    
+    Args:
+        chunks (iterable): Iterable of bytes objects, e.g. response.iter_content()
+        
+    Yields:
+        tuple: (member_name, member_bytes) for every file in the archive
+        
+    Raises:
+        ValueError: If the stream is not a valid ZIP archive or a member cannot be read
+    """
+    chunk_iterator = iter(chunks)
+    buffer = bytearray()
+    
+    def fill(size):
+        # Pull chunks from the stream until the buffer holds at least `size` bytes
+        while len(buffer) < size:
+            chunk = next(chunk_iterator, None)
+            if chunk is None:
+                return False
+            buffer.extend(chunk)
+        return True
+    
+    def take(size):
+        # Remove and return the first `size` bytes of the buffer
+        if not fill(size):
+            raise ValueError("Unexpected end of ZIP stream")
+        data = bytes(buffer[:size])
+        del buffer[:size]
+        return data
+    
+    while fill(4):
+        signature = bytes(buffer[:4])
+        
+        # The central directory follows the last member - nothing more to extract
+        if signature in (ZIP_CENTRAL_DIRECTORY, ZIP_END_OF_CENTRAL_DIRECTORY):
+            return
+        if signature != ZIP_LOCAL_FILE_HEADER:
+            raise ValueError(f"Invalid ZIP record signature: {signature!r}")
+        
+        # Local file header: signature, version, flags, method, time, date, crc, sizes, name/extra lengths
+        header = take(30)
+        (_, _, flags, method, _, _, crc, compressed_size,
+         uncompressed_size, name_length, extra_length) = struct.unpack("<4sHHHHHIIIHH", header)
+        raw_name = take(name_length)
+        extra = take(extra_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        
+        # ZIP64 archives keep the real sizes in the extra field (header id 0x0001)
+        is_zip64 = False
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, data_size = struct.unpack("<HH", extra[offset:offset + 4])
+            if header_id == 0x0001:
+                is_zip64 = True
+                if data_size >= 16:
+                    uncompressed_size, compressed_size = struct.unpack("<QQ", extra[offset + 4:offset + 20])
+                break
+            offset += 4 + data_size
+        
+        has_data_descriptor = bool(flags & 0x08)
+        if flags & 0x01:
+            raise ValueError(f"Encrypted ZIP member not supported: {name}")
+        
+        if method == 0 and not has_data_descriptor:
+            # Stored member with known size
+            data = take(compressed_size)
+        elif method == 8:
+            # Deflated member - inflate incrementally so the end is found even without known sizes
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            parts = []
+            while not decompressor.eof:
+                if not buffer and not fill(1):
+                    raise ValueError(f"Unexpected end of ZIP stream in member: {name}")
+                pending = bytes(buffer)
+                buffer.clear()
+                parts.append(decompressor.decompress(pending))
+                # Bytes after the deflate stream belong to the next record
+                buffer.extend(decompressor.unused_data)
+            parts.append(decompressor.flush())
+            data = b"".join(parts)
+        elif method == 0:
+            # Stored member whose size is only written in the data descriptor - the member ends at the
+            # first descriptor signature whose CRC and size match the bytes before it
+            size_format = "<IQQ" if is_zip64 else "<III"
+            descriptor_length = 4 + struct.calcsize(size_format)
+            position = buffer.find(ZIP_DATA_DESCRIPTOR)
+            while True:
+                if position < 0:
+                    search_from = max(0, len(buffer) - 3)
+                    if not fill(len(buffer) + 1):
+                        raise ValueError(f"Unexpected end of ZIP stream in member: {name}")
+                    position = buffer.find(ZIP_DATA_DESCRIPTOR, search_from)
+                    continue
+                if not fill(position + descriptor_length):
+                    raise ValueError(f"Unexpected end of ZIP stream in member: {name}")
+                descriptor_crc, descriptor_size, _ = struct.unpack(
+                    size_format, bytes(buffer[position + 4:position + descriptor_length]))
+                if descriptor_size == position and zlib.crc32(buffer[:position]) & 0xFFFFFFFF == descriptor_crc:
+                    break
+                position = buffer.find(ZIP_DATA_DESCRIPTOR, position + 1)
+            data = take(position)
+        else:
+            raise ValueError(f"Unsupported ZIP compression method {method} for member: {name}")
+        
+        if has_data_descriptor:
+            # Data descriptor: optional signature, crc, compressed and uncompressed size (32 or 64 bit)
+            fill(4)
+            if bytes(buffer[:4]) == ZIP_DATA_DESCRIPTOR:
+                take(4)
+            crc = struct.unpack("<I", take(4))[0]
+            take(16 if is_zip64 else 8)
+        
+        if zlib.crc32(data) & 0xFFFFFFFF != crc:
+            raise ValueError(f"CRC mismatch for ZIP member: {name}")
+        
+        # Directory entries carry no data
+        if name.endswith("/"):
+            continue
+        yield name, data
+
+
+def unique_member_path(output_folder, member_name, used_names):
+    """Output path for a ZIP member - only the file name is kept and repeated names get a numeric suffix"""
+    # Only keep the file name to avoid writing outside the output folder
+    file_name = os.path.basename(member_name)
+    stem, extension = os.path.splitext(file_name)
+    number = 1
+    while file_name in used_names:
+        number += 1
+        file_name = f"{stem}_{number}{extension}"
+    used_names.add(file_name)
+    return os.path.join(output_folder, file_name)
+
+
+def save_member(member_path, member_data):
+    """Write one extracted member through a .part file so an interrupted run leaves no partial PDF"""
+    part_path = member_path + ".part"
+    with open(part_path, "wb") as f:
+        f.write(member_data)
+    os.replace(part_path, member_path)
+
+
+def save_zip_members_from_stream(response, output_folder):
+    """
+    Write the split PDFs of a returnAsZip response to disk while the ZIP is still downloading
+    Process: Iterate response body → Extract each completed ZIP member → Save it immediately
+    
+    The downloaded bytes are also kept in a temporary file. If the streaming reader cannot
+    handle a member, the rest of the response is downloaded and the archive is read with
+    zipfile instead, so every split PDF is still saved.
+    
+    Args:
+        response (requests.Response): Response opened with stream=True
+        output_folder (str): Folder for the extracted split PDFs
+        
+    Returns:
+        int: Number of split PDF documents saved
+    """
+    saved_count = 0
+    used_names = set()
+    with tempfile.TemporaryFile() as spool:
+        def tee_chunks():
+            # Keep a copy of the archive for the zipfile fallback
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    spool.write(chunk)
+                    yield chunk
+        
+        chunk_stream = tee_chunks()
+        try:
+            for member_name, member_data in iter_zip_members(chunk_stream):
+                output_filename = unique_member_path(output_folder, member_name, used_names)
+                save_member(output_filename, member_data)
+                saved_count += 1
+                print(f"✓ Split PDF {saved_count} saved: {output_filename} ({len(member_data)} bytes)")
+        except ValueError as e:
+            print(f"Streaming ZIP extraction stopped ({e}), reading the downloaded archive instead...")
+            for _ in chunk_stream:
+                pass
+            spool.seek(0)
+            
+            # Members are named in archive order, so the ones already saved keep their paths
+            used_names = set()
+            with zipfile.ZipFile(spool) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+                for index, info in enumerate(members):
+                    output_filename = unique_member_path(output_folder, info.filename, used_names)
+                    if index < saved_count:
+                        continue
+                    member_data = archive.read(info)
+                    save_member(output_filename, member_data)
+                    print(f"✓ Split PDF {index + 1} saved: {output_filename} ({len(member_data)} bytes)")
+            saved_count = len(members)
+    return saved_count
+
 
 def split_pdf_by_swiss_qr():
     # API Configuration - PDF4me service for splitting PDF by Swiss QR
     api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
     pdf_file_path = "SwissQR.pdf"  # Path to the main PDF file
     output_folder = "Split_PDF_SwissQR_outputs"  # Output folder for split PDF files
+    return_as_zip = False  # True: receive one ZIP and extract split PDFs while it downloads
     
     # Check if the input file exists before proceeding
     if not os.path.exists(pdf_file_path):
@@ -46,7 +262,7 @@ def split_pdf_by_swiss_qr():
         "splitQRPage": "after",                                     # Split position: after, before
         "pdfRenderDpi": "150",                                      # PDF render DPI: 100, 150, 200, 250
         "combinePagesWithSameBarcodes": False,                      # Combine consecutive pages with same QR
-        "returnAsZip": False,                                       # Return individual files, not ZIP
+        "returnAsZip": return_as_zip,                               # Return individual files or one ZIP
         "async": False                                               # Enable asynchronous processing
     }
 
@@ -54,7 +270,8 @@ def split_pdf_by_swiss_qr():
     
     # Make the API request to split PDF by Swiss QR
     try:
-        response = requests.post(url, json=payload, headers=headers, verify=False, timeout=300)  # 5 minute timeout
+        response = requests.post(url, json=payload, headers=headers, verify=False, timeout=300,  # 5 minute timeout
+                                 stream=return_as_zip)
         
         # Log detailed response information for debugging 
         print(f"Response Status Code: {response.status_code} ({response.reason})")
@@ -70,6 +287,16 @@ def split_pdf_by_swiss_qr():
     if response.status_code == 200:
         # 200 - Success: PDF splitting completed immediately
         print("✓ Success! PDF Swiss QR splitting completed!")
+        
+        # ZIP response: save each split PDF as soon as its bytes have arrived
+        if return_as_zip:
+            try:
+                saved_count = save_zip_members_from_stream(response, output_folder)
+                print(f"✓ All {saved_count} split PDF documents processed in folder: {output_folder}")
+            except Exception as e:
+                print(f"Error extracting split PDF documents from ZIP stream: {e}")
+            return
+        
         print("Parsing API response...")
         
         # Parse JSON response to get split PDF documents
@@ -206,7 +433,7 @@ def split_pdf_by_swiss_qr():
 
             # Check the processing status by calling the polling URL
             try:
-                response_split = requests.get(location_url, headers=headers, verify=False)
+                response_split = requests.get(location_url, headers=headers, verify=False, stream=return_as_zip)
                 print(f"Poll response status: {response_split.status_code} ({response_split.reason})")
             except Exception as e:
                 print(f"Error polling status: {e}")
@@ -216,6 +443,15 @@ def split_pdf_by_swiss_qr():
                 # 200 - Success: Processing completed
                 print("✓ Success! PDF Swiss QR splitting completed!")
                 
+                # ZIP response: save each split PDF as soon as its bytes have arrived
+                if return_as_zip:
+                    try:
+                        saved_count = save_zip_members_from_stream(response_split, output_folder)
+                        print(f"✓ All {saved_count} split PDF documents processed in folder: {output_folder}")
+                    except Exception as e:
+                        print(f"Error extracting split PDF documents from ZIP stream: {e}")
+                    return
+                
                 # Parse JSON response to get split PDF documents
                 try:
                     print("Parsing polling response...")
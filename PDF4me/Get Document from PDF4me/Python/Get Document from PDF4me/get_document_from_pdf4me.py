@@ -1,13 +1,18 @@
 import base64
 import requests
 import json
+import struct
 import time
+import zipfile
+import zlib
 import os
 
 # API Configuration - PDF4me service for splitting PDF documents by barcode
 api_key = "Please get the key from https://dev.pdf4me.com/dashboard/#/api-keys/"
 pdf_file_path = "sample.pdf"  # Path to the main PDF file
 output_path = "swiss_qr_split_result.zip"  # Output ZIP file name for split PDFs
+stream_zip_members = True  # Extract split PDFs from the ZIP while it is still downloading
+stream_chunk_size = 64 * 1024  # Bytes read from the response body per iteration
 
 # API endpoint for splitting PDF documents by barcode
 base_url = "https://api.pdf4me.com/"
@@ -49,6 +54,248 @@ def read_and_encode_pdf(file_path):
         print(f"Error reading PDF file: {e}")
         raise
 
+# ZIP record signatures used by the streaming reader
+ZIP_LOCAL_FILE_HEADER = b"PK\x03\x04"
+ZIP_DATA_DESCRIPTOR = b"PK\x07\x08"
+ZIP_CENTRAL_DIRECTORY = b"PK\x01\x02"
+ZIP_END_OF_CENTRAL_DIRECTORY = b"PK\x05\x06"
+
+
+def iter_zip_members(chunks):
+    """
+    Read a ZIP archive from an iterable of byte chunks and yield each member as soon as it is complete
+    Process: Buffer chunks → Parse local file header → Read/inflate member data → Verify CRC → Yield member
+    
+    Members are taken from their local file headers, so the central directory at the end
+    of the archive is never needed. Stored and deflated members are supported, including
+    members whose sizes are only written in a trailing data descriptor.
+    
+    Args:
+        chunks (iterable): Iterable of bytes objects, e.g. response.iter_content()
+        
+    Yields:
+        tuple: (member_name, member_bytes) for every file in the archive
+        
+    Raises:
+        ValueError: If the stream is not a valid ZIP archive or a member cannot be read
+    """
+    chunk_iterator = iter(chunks)
+    buffer = bytearray()
+    
+    def fill(size):
+        # Pull chunks from the stream until the buffer holds at least `size` bytes
+        while len(buffer) < size:
+            chunk = next(chunk_iterator, None)
+            if chunk is None:
+                return False
+            buffer.extend(chunk)
+        return True
+    
+    def take(size):
+        # Remove and return the first `size` bytes of the buffer
+        if not fill(size):
+            raise ValueError("Unexpected end of ZIP stream")
+        data = bytes(buffer[:size])
+        del buffer[:size]
+        return data
+    
+    while fill(4):
+        signature = bytes(buffer[:4])
+        
+        # The central directory follows the last member - nothing more to extract
+        if signature in (ZIP_CENTRAL_DIRECTORY, ZIP_END_OF_CENTRAL_DIRECTORY):
+            return
+        if signature != ZIP_LOCAL_FILE_HEADER:
+            raise ValueError(f"Invalid ZIP record signature: {signature!r}")
+        
+        # Local file header: signature, version, flags, method, time, date, crc, sizes, name/extra lengths
+        header = take(30)
+        (_, _, flags, method, _, _, crc, compressed_size,
+         uncompressed_size, name_length, extra_length) = struct.unpack("<4sHHHHHIIIHH", header)
+        raw_name = take(name_length)
+        extra = take(extra_length)
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        
+        # ZIP64 archives keep the real sizes in the extra field (header id 0x0001)
+        is_zip64 = False
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, data_size = struct.unpack("<HH", extra[offset:offset + 4])
+            if header_id == 0x0001:
+                is_zip64 = True
+                if data_size >= 16:
+                    uncompressed_size, compressed_size = struct.unpack("<QQ", extra[offset + 4:offset + 20])
+                break
+            offset += 4 + data_size
+        
+        has_data_descriptor = bool(flags & 0x08)
+        if flags & 0x01:
+            raise ValueError(f"Encrypted ZIP member not supported: {name}")
+        
+        if method == 0 and not has_data_descriptor:
+            # Stored member with known size
+            data = take(compressed_size)
+        elif method == 8:
+            # Deflated member - inflate incrementally so the end is found even without known sizes
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            parts = []
+            while not decompressor.eof:
+                if not buffer and not fill(1):
+                    raise ValueError(f"Unexpected end of ZIP stream in member: {name}")
+                pending = bytes(buffer)
+                buffer.clear()
+                parts.append(decompressor.decompress(pending))
+                # Bytes after the deflate stream belong to the next record
+                buffer.extend(decompressor.unused_data)
+            parts.append(decompressor.flush())
+            data = b"".join(parts)
+        elif method == 0:
+            # Stored member whose size is only written in the data descriptor - the member ends at the
+            # first descriptor signature whose CRC and size match the bytes before it
+            size_format = "<IQQ" if is_zip64 else "<III"
+            descriptor_length = 4 + struct.calcsize(size_format)
+            position = buffer.find(ZIP_DATA_DESCRIPTOR)
+            while True:
+                if position < 0:
+                    search_from = max(0, len(buffer) - 3)
+                    if not fill(len(buffer) + 1):
+                        raise ValueError(f"Unexpected end of ZIP stream in member: {name}")
+                    position = buffer.find(ZIP_DATA_DESCRIPTOR, search_from)
+                    continue
+                if not fill(position + descriptor_length):
+                    raise ValueError(f"Unexpected end of ZIP stream in member: {name}")
+                descriptor_crc, descriptor_size, _ = struct.unpack(
+                    size_format, bytes(buffer[position + 4:position + descriptor_length]))
+                if descriptor_size == position and zlib.crc32(buffer[:position]) & 0xFFFFFFFF == descriptor_crc:
+                    break
+                position = buffer.find(ZIP_DATA_DESCRIPTOR, position + 1)
+            data = take(position)
+        else:
+            raise ValueError(f"Unsupported ZIP compression method {method} for member: {name}")
+        
+        if has_data_descriptor:
+            # Data descriptor: optional signature, crc, compressed and uncompressed size (32 or 64 bit)
+            fill(4)
+            if bytes(buffer[:4]) == ZIP_DATA_DESCRIPTOR:
+                take(4)
+            crc = struct.unpack("<I", take(4))[0]
+            take(16 if is_zip64 else 8)
+        
+        if zlib.crc32(data) & 0xFFFFFFFF != crc:
+            raise ValueError(f"CRC mismatch for ZIP member: {name}")
+        
+        # Directory entries carry no data
+        if name.endswith("/"):
+            continue
+        yield name, data
+
+
+def unique_member_path(output_dir, member_name, used_names):
+    """Output path for a ZIP member - only the file name is kept and repeated names get a numeric suffix"""
+    # Only keep the file name to avoid writing outside the output folder
+    file_name = os.path.basename(member_name)
+    stem, extension = os.path.splitext(file_name)
+    number = 1
+    while file_name in used_names:
+        number += 1
+        file_name = f"{stem}_{number}{extension}"
+    used_names.add(file_name)
+    return os.path.join(output_dir, file_name)
+
+
+def save_member(member_path, member_data):
+    """Write one extracted member through a .part file so an interrupted run leaves no partial PDF"""
+    part_path = member_path + ".part"
+    with open(part_path, 'wb') as member_file:
+        member_file.write(member_data)
+    os.replace(part_path, member_path)
+
+
+def stream_zip_response(response, output_dir, output_filename, on_member=None):
+    """
+    Save a binary ZIP response while extracting its members as they arrive
+    Process: Iterate response body → Copy raw bytes to archive file → Extract completed members → Notify callback
+    
+    The archive is always saved. If the streaming reader cannot handle a member, the rest of
+    the response is downloaded and the remaining members are extracted with zipfile.
+    
+    Args:
+        response (requests.Response): Response opened with stream=True
+        output_dir (str): Folder for the archive and the extracted split PDFs
+        output_filename (str): File name for the ZIP archive
+        on_member (callable, optional): Called with the path of each extracted file as soon as it is written
+        
+    Returns:
+        list: Paths of the extracted member files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    archive_path = os.path.join(output_dir, output_filename)
+    part_path = archive_path + ".part"
+    extracted_paths = []
+    used_names = set()
+    total_bytes = 0
+    
+    try:
+        with open(part_path, 'w+b') as archive_file:
+            def tee_chunks():
+                # Keep an on-disk copy of the archive while feeding the ZIP reader
+                nonlocal total_bytes
+                for chunk in response.iter_content(chunk_size=stream_chunk_size):
+                    if chunk:
+                        archive_file.write(chunk)
+                        total_bytes += len(chunk)
+                        yield chunk
+            
+            chunk_stream = tee_chunks()
+            try:
+                for member_name, member_data in iter_zip_members(chunk_stream):
+                    member_path = unique_member_path(output_dir, member_name, used_names)
+                    save_member(member_path, member_data)
+                    extracted_paths.append(member_path)
+                    print(f"Extracted split PDF: {member_path} ({len(member_data)} bytes)")
+                    
+                    if on_member:
+                        on_member(member_path)
+                
+                # Drain the remainder (central directory) so the saved archive is complete
+                for _ in chunk_stream:
+                    pass
+            except ValueError as e:
+                print(f"Streaming ZIP extraction stopped ({e}), reading the downloaded archive instead...")
+                for _ in chunk_stream:
+                    pass
+                archive_file.flush()
+                archive_file.seek(0)
+                
+                # Members are named in archive order, so the ones already extracted keep their paths
+                used_names = set()
+                try:
+                    with zipfile.ZipFile(archive_file) as archive:
+                        members = [info for info in archive.infolist() if not info.is_dir()]
+                        for index, info in enumerate(members):
+                            member_path = unique_member_path(output_dir, info.filename, used_names)
+                            if index < len(extracted_paths):
+                                continue
+                            member_data = archive.read(info)
+                            save_member(member_path, member_data)
+                            extracted_paths.append(member_path)
+                            print(f"Extracted split PDF: {member_path} ({len(member_data)} bytes)")
+                            
+                            if on_member:
+                                on_member(member_path)
+                except (zipfile.BadZipFile, ValueError) as zip_error:
+                    # The archive is still saved below so it can be opened by other tools
+                    print(f"Could not extract split PDFs from the archive: {zip_error}")
+        os.replace(part_path, archive_path)
+    finally:
+        # Only an interrupted download leaves the .part file behind
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    
+    print(f"Split PDF archive saved successfully: {archive_path}")
+    print(f"Output file size: {total_bytes} bytes")
+    return extracted_paths
+
 
 def split_pdf_by_barcode(base64_content, filename):
     """
@@ -89,7 +336,8 @@ def split_pdf_by_barcode(base64_content, filename):
     
     try:
         # Send POST request to PDF4me API
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        # Stream the body so a ZIP result can be extracted while it downloads
+        response = requests.post(url, headers=headers, json=payload, timeout=30, stream=stream_zip_members)
         
         # Log detailed response information for debugging 
         print(f"Response Status Code: {response.status_code} ({response.reason})")
@@ -102,6 +350,8 @@ def split_pdf_by_barcode(base64_content, filename):
             print("Success! PDF split by barcode successfully!")
             
             # C# logic: API returns binary ZIP content directly for 200 response
+            if stream_zip_members:
+                return {"binary_stream": response, "status": "success"}
             return {"binary_content": response.content, "status": "success"}
         
         elif response.status_code == 202:
@@ -137,7 +387,7 @@ def split_pdf_by_barcode(base64_content, filename):
         raise
 
 
-def handle_async_response_and_save(api_response, output_filename):
+def handle_async_response_and_save(api_response, output_filename, on_member=None):
     """
     Handle API response and save the split PDF files archive
     Process: Check response type → Handle sync/async → Save file or poll status
@@ -145,13 +395,22 @@ def handle_async_response_and_save(api_response, output_filename):
     Args:
         api_response (dict): Response from the PDF4me API
         output_filename (str): Name for the output ZIP file
+        on_member (callable, optional): Called with each split PDF path as soon as it is extracted
+                                        (only when stream_zip_members is enabled)
         
     Returns:
         bool: True if file was saved successfully, False otherwise
     """
     try:
+        # Handle streamed synchronous response (status 200) - extract members while downloading
+        if 'binary_stream' in api_response and api_response.get('status') == 'success':
+            print("Streaming binary ZIP response...")
+            output_dir = os.path.join(os.path.dirname(pdf_file_path) or ".", "swiss_qr_split_output")
+            stream_zip_response(api_response['binary_stream'], output_dir, output_filename, on_member)
+            return True
+        
         # Handle synchronous response (status 200) - Following C# logic
-        if 'binary_content' in api_response and api_response.get('status') == 'success':
+        elif 'binary_content' in api_response and api_response.get('status') == 'success':
             print("Processing binary ZIP response directly...")
             
             # Create output directory (following C# logic)
@@ -200,7 +459,8 @@ def handle_async_response_and_save(api_response, output_filename):
                     
                     try:
                         # Poll the location URL for completion
-                        status_response = requests.get(location_url, headers=headers, verify=False)
+                        status_response = requests.get(location_url, headers=headers, verify=False,
+                                                       stream=stream_zip_members)
                         print(f"Poll response status: {status_response.status_code} ({status_response.reason})")
                         
                         if status_response.status_code == 200:
@@ -213,6 +473,15 @@ def handle_async_response_and_save(api_response, output_filename):
                             # Prepare full output path
                             full_output_path = os.path.join(output_dir, output_filename)
                             
+                            # Extract split PDFs from the ZIP as the polling response downloads
+                            if stream_zip_members:
+                                try:
+                                    stream_zip_response(status_response, output_dir, output_filename, on_member)
+                                    return True
+                                except Exception as stream_error:
+                                    print(f"Error streaming ZIP file from polling: {stream_error}")
+                                    return False
+                            
                             # Following C# logic: treat polling response as binary ZIP content
                             try:
                                 # Save the binary ZIP content directly from polling response
@@ -286,7 +555,12 @@ def main():
         
         # Step 3: Handle response and save split files archive
         print("Processing response and saving archive...")
-        success = handle_async_response_and_save(api_response, output_filename)
+        # Each split PDF is reported as soon as it leaves the download stream;
+        # replace this callback to start downstream processing on the first part
+        success = handle_async_response_and_save(
+            api_response, output_filename,
+            on_member=lambda member_path: print(f"Split part ready: {member_path}")
+        )
         
         # Final summary
         if success:
@@ -1,8 +1,19 @@
 import base64
+import hashlib
+import re
 import requests
 import json
+import shutil
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Optional local link scan for batch mode - install with: pip install pypdf
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
 
 # API Configuration - PDF4me service for updating hyperlinks annotation in PDF documents
 api_key = "Please get the key from https://dev.pdf4me.com/dashboard/#/api-keys/"
@@ -294,6 +305,275 @@ def main():
         print("Please check your input file and API configuration")
 
 
+# ---------------------------------------------------------------------------
+# Batch mode - apply one rule set to a whole folder tree of PDFs
+# ---------------------------------------------------------------------------
+
+batch_mode = False  # Set to True to run main_batch() instead of main()
+batch_input_folder = "documents"  # Folder scanned recursively for PDFs
+batch_output_folder = "Hyperlinks_updated_outputs"  # Updated PDFs, same relative paths
+manifest_path = "Hyperlinks_manifest.jsonl"  # One line per processed document, used to resume
+copy_unmatched = False  # Also copy documents without matching links to the output folder
+max_workers = 8  # Concurrent documents
+
+# Rule set applied to every document (same format as updatehyperlinkannotationlist)
+hyperlink_rules = [
+    {
+        "SearchOn": "Text",                                # Search criteria type
+        "SearchValue": "http://www.google.com",            # Search for the hyperlinked text
+        "IsExpression": True,                              # Whether to use expression matching
+        "TextCurrentValue": "http://www.google.com",       # Current hyperlinked text to replace
+        "TextNewValue": "https://pdf4me.com",              # New display text for the hyperlink
+        "URLCurrentValue": "http://www.google.com",        # Current URL destination to replace
+        "URLNewValue": "https://pdf4me.com"                # New URL destination
+    }
+]
+
+
+def compile_hyperlink_rules(rules):
+    """
+    Compile the rule set once into two regular expressions used by the local scan
+    Expression rules are used as-is, plain values are escaped and matched as substrings
+
+    Returns:
+        tuple: (uri_pattern, text_pattern)
+            uri_pattern matches link targets: every URLCurrentValue, plus SearchValue of rules not searching on text
+            text_pattern matches the SearchValue of rules with SearchOn "Text" (None if there are none)
+    """
+    def to_pattern(value, is_expression):
+        return value if is_expression else re.escape(value)
+
+    uri_patterns, text_patterns = [], []
+    for rule in rules:
+        is_expression = rule.get("IsExpression", False)
+        if rule.get("URLCurrentValue"):
+            uri_patterns.append(to_pattern(rule["URLCurrentValue"], is_expression))
+        if rule.get("SearchValue"):
+            target = text_patterns if rule.get("SearchOn", "Text").lower() == "text" else uri_patterns
+            target.append(to_pattern(rule["SearchValue"], is_expression))
+
+    def combine(patterns):
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+    return combine(uri_patterns), combine(text_patterns)
+
+
+def file_may_have_links(file_path, chunk_size=1024 * 1024):
+    """
+    Cheap byte scan before parsing: a PDF without '/URI' and without object streams cannot contain link URIs
+    Reads the file in chunks with a small overlap so markers split across chunks are still found
+    """
+    previous = b""
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            window = previous + chunk
+            if b"/URI" in window or b"/ObjStm" in window:
+                return True
+            previous = chunk[-8:]
+    return False
+
+
+def find_matching_links(file_path, uri_pattern, text_pattern):
+    """
+    Count the links of a PDF that the rule set may rewrite
+    Process: Byte prefilter → Read every page's /Annots → Match /A /URI targets → For text rules, match the text of pages that carry links
+    The text of a page is only extracted when its link targets did not already match
+    """
+    if not file_may_have_links(file_path):
+        return 0
+
+    matches = 0
+    reader = PdfReader(file_path)
+    for page in reader.pages:
+        uris = []
+        for annotation in page.get("/Annots") or []:
+            annotation = annotation.get_object()
+            action = annotation.get("/A") if annotation.get("/Subtype") == "/Link" else None
+            uri = action.get_object().get("/URI") if action is not None else None
+            if uri is not None:
+                uris.append(str(uri))
+        if not uris:
+            continue
+
+        page_matches = sum(1 for uri in uris if uri_pattern and uri_pattern.search(uri))
+        if not page_matches and text_pattern is not None and text_pattern.search(page.extract_text() or ""):
+            page_matches = len(uris)
+        matches += page_matches
+    return matches
+
+
+def load_manifest(path, rules_hash):
+    """Return the relative paths already handled with this rule set by an earlier run"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line may be cut off if the previous run was killed
+                if entry.get("rules") == rules_hash and entry.get("status") in ("updated", "no_match"):
+                    done.add(entry["file"])
+    return done
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def update_one_document(pdf_path, output_filename, rules_fragment, patterns):
+    """
+    Scan one PDF and send it to the API only if it has links the rules may rewrite
+    Process: Local link scan → Splice document into the pre-serialised rules body → Send API request → Poll → Save
+
+    Returns:
+        tuple: (status, number of matching links), status is "updated" or "no_match"
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    if PdfReader is not None:
+        matches = find_matching_links(pdf_path, *patterns)
+        if not matches:
+            if copy_unmatched:
+                shutil.copyfile(pdf_path, output_filename)
+            return "no_match", 0
+    else:
+        matches = None
+
+    with open(pdf_path, "rb") as f:
+        pdf_base64 = base64.b64encode(f.read()).decode("ascii")
+
+    # Only the per-document members are serialised here; the compiled rule list is reused as-is
+    body = ('{"docName":' + json.dumps(os.path.basename(pdf_path)) +
+            ',"docContent":"' + pdf_base64 + '",' + rules_fragment + '}')
+
+    session = get_session()
+    response = session.post(url, data=body.encode("utf-8"), timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+
+    with open(output_filename, "wb") as output_file:
+        output_file.write(response.content)
+    return "updated", matches
+
+
+def main_batch():
+    """
+    Apply hyperlink_rules to every PDF under batch_input_folder
+    Process: Compile rules once → Scan each PDF's links locally → Send only matching documents → Record each result in the manifest
+
+    Documents already recorded in the manifest for the same rule set are skipped, so an interrupted run can simply be restarted.
+    """
+    print("Starting batch hyperlink update")
+
+    if not os.path.isdir(batch_input_folder):
+        print(f"Error: Input folder not found at {batch_input_folder}")
+        return
+
+    patterns = compile_hyperlink_rules(hyperlink_rules)
+    if PdfReader is None:
+        print("pypdf is not installed; every document will be sent (pip install pypdf)")
+
+    # The rule list is serialised once and spliced into every request body
+    rules_fragment = json.dumps({
+        "updatehyperlinkannotationlist": hyperlink_rules,
+        "async": True
+    }, separators=(",", ":"))[1:-1]
+    rules_hash = hashlib.sha256(rules_fragment.encode("utf-8")).hexdigest()[:16]
+
+    done_files = load_manifest(manifest_path, rules_hash)
+    if done_files:
+        print(f"Resuming: {len(done_files)} documents already handled with this rule set")
+
+    def iter_pdf_files():
+        for folder, _, file_names in os.walk(batch_input_folder):
+            for file_name in file_names:
+                if file_name.lower().endswith(".pdf"):
+                    yield os.path.relpath(os.path.join(folder, file_name), batch_input_folder)
+
+    started = time.time()
+    counts = {"updated": 0, "no_match": 0, "failed": 0, "skipped": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                relative_path = pending.pop(future)
+                entry = {"file": relative_path, "rules": rules_hash}
+                try:
+                    entry["status"], entry["links"] = future.result()
+                except Exception as e:
+                    entry["status"], entry["error"] = "failed", str(e)
+                    print(f"✗ {relative_path}: {e}")
+                counts[entry["status"]] += 1
+                manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+
+        for scanned, relative_path in enumerate(iter_pdf_files(), start=1):
+            if relative_path in done_files:
+                counts["skipped"] += 1
+                continue
+
+            output_filename = os.path.join(batch_output_folder, relative_path)
+            os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+            future = executor.submit(update_one_document, os.path.join(batch_input_folder, relative_path),
+                                     output_filename, rules_fragment, patterns)
+            pending[future] = relative_path
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            if scanned % 1000 == 0:
+                rate = scanned / max(time.time() - started, 1e-9)
+                print(f"Progress: {scanned} scanned, {counts['updated']} updated, "
+                      f"{counts['no_match']} without matching links ({rate:.1f} documents/s)")
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s")
+    print(f"  Updated: {counts['updated']}, no matching links (no API call): {counts['no_match']}, "
+          f"failed: {counts['failed']}, already done: {counts['skipped']}")
+    print(f"Manifest: {manifest_path}")
+
+
 # Execute the main function when script is run directly
 if __name__ == "__main__":
-    main()
+    if batch_mode:
+        main_batch()
+    else:
+        main()
@@ -1,8 +1,20 @@
 import base64
+import csv
+import re
 import requests
 import json
+import shutil
+import tempfile
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Optional keyring support for batch passwords - install with: pip install keyring
+try:
+    import keyring
+except ImportError:
+    keyring = None
 
 # API Configuration - PDF4me service for unlocking password-protected PDF documents
 api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
@@ -284,6 +296,253 @@ def main():
         print("Please check your input file, password, and API configuration")
 
 
+# ---------------------------------------------------------------------------
+# Batch mode - unlock every PDF in a folder with its own password
+# ---------------------------------------------------------------------------
+
+batch_mode = False  # Set to True to run main_batch() instead of main()
+batch_input_folder = "documents"  # Folder with the protected PDFs
+batch_output_folder = "Unlocked_outputs"  # Unlocked PDFs, same file names
+secrets_path = "passwords.json"  # {"file.pdf": "password"} or a CSV with file,password columns
+max_workers = 4  # Concurrent API requests
+failures_path = "Unlocked_failures.jsonl"  # One line per document that failed
+
+# Request bodies are base64-encoded in chunks of this many bytes (a multiple of 3), so no PDF is held in memory whole
+ENCODE_CHUNK_SIZE = 3 * 256 * 1024
+
+# Matches the /Encrypt key but not /EncryptMetadata
+ENCRYPT_KEY = re.compile(rb"/Encrypt(?![A-Za-z])")
+
+
+def pdf_has_encrypt_entry(file_path, window=64 * 1024):
+    """
+    Check locally whether a PDF is encrypted by looking for /Encrypt in its trailer
+    Process: Find the last startxref → Read the trailer (or cross-reference stream dictionary) it points to → Look for /Encrypt
+    Only a small window at the end of the file and at the xref offset is read
+
+    Returns:
+        bool: True if the trailer has an /Encrypt entry, False if it has none, None if the trailer could not be found
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        f.seek(max(0, file_size - window))
+        tail = f.read()
+
+        match = list(re.finditer(rb"startxref\s+(\d+)", tail))
+        if not match:
+            return None
+        xref_offset = int(match[-1].group(1))
+        if xref_offset >= file_size:
+            return None
+
+        f.seek(xref_offset)
+        section = f.read(window)
+
+    if section.startswith(b"xref"):
+        # Classic cross-reference table: the trailer dictionary follows the table
+        trailer_start = section.find(b"trailer")
+        if trailer_start == -1:
+            trailer_start = tail.rfind(b"trailer")
+            if trailer_start == -1:
+                return None
+            section = tail
+        dictionary = section[trailer_start:section.find(b"startxref", trailer_start)]
+    else:
+        # Cross-reference stream (PDF 1.5+): the trailer keys live in the stream dictionary
+        stream_start = section.find(b"stream")
+        if stream_start == -1:
+            return None
+        dictionary = section[:stream_start]
+
+    return bool(ENCRYPT_KEY.search(dictionary))
+
+
+def load_secrets_file(path):
+    """
+    Load per-file passwords from a JSON object or a CSV file with 'file' and 'password' columns
+    Returns a dict of file name -> password
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return {row["file"]: row["password"] for row in csv.DictReader(f)}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def keyring_password_lookup(file_name):
+    """
+    Example password callback backed by the system keyring (pip install keyring)
+    Store passwords with: keyring.set_password("pdf4me-unlock", "file.pdf", "password")
+    """
+    if keyring is None:
+        raise RuntimeError("keyring is not installed (pip install keyring)")
+    return keyring.get_password("pdf4me-unlock", file_name)
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def write_request_body(pdf_path, body_prefix, body_suffix, body_file):
+    """Write a JSON request body with the PDF base64-encoded chunk by chunk between prefix and suffix"""
+    body_file.write(body_prefix.encode("utf-8"))
+    with open(pdf_path, "rb") as pdf_file:
+        for chunk in iter(lambda: pdf_file.read(ENCODE_CHUNK_SIZE), b""):
+            body_file.write(base64.b64encode(chunk))
+    body_file.write(body_suffix.encode("utf-8"))
+    body_file.seek(0)
+
+
+def save_response_stream(response, output_filename):
+    """Write a streamed response to disk without holding it in memory"""
+    with open(output_filename, "wb") as output_file:
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            output_file.write(chunk)
+
+
+def unlock_one_pdf(pdf_path, password, output_filename):
+    """
+    Unlock one PDF with bounded memory
+    Process: Stream-encode the request body to a temporary file → Upload it → Poll for completion → Stream the result to disk
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    body_prefix = ('{"docName":' + json.dumps(os.path.basename(pdf_path)) +
+                   ',"password":' + json.dumps(password) +
+                   ',"async":true,"docContent":"')
+    session = get_session()
+
+    with tempfile.TemporaryFile() as body_file:
+        write_request_body(pdf_path, body_prefix, '"}', body_file)
+        response = session.post(url, data=body_file, stream=True, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        response.close()
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, stream=True, timeout=60)
+            if response.status_code != 202:
+                break
+            response.close()
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    with response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+        save_response_stream(response, output_filename)
+
+
+def main_batch(password_lookup=None):
+    """
+    Unlock every PDF in batch_input_folder with its own password
+    Process: Check /Encrypt locally → Look up password → Unlock concurrently → Save results
+
+    Args:
+        password_lookup (callable): Function file name -> password (or None). Defaults to the
+            passwords in secrets_path; pass keyring_password_lookup to use the system keyring
+
+    Files that are not encrypted are copied to the output folder without an API call.
+    """
+    print("Starting batch PDF unlocking")
+
+    if not os.path.isdir(batch_input_folder):
+        print(f"Error: Input folder not found at {batch_input_folder}")
+        return
+
+    if password_lookup is None:
+        if not os.path.exists(secrets_path):
+            print(f"Error: Secrets file not found at {secrets_path}")
+            return
+        password_lookup = load_secrets_file(secrets_path).get
+
+    os.makedirs(batch_output_folder, exist_ok=True)
+
+    pdf_files = (
+        entry.name for entry in os.scandir(batch_input_folder)
+        if entry.is_file() and entry.name.lower().endswith(".pdf")
+    )
+
+    started = time.time()
+    unlocked, skipped, failed = 0, 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(failures_path, "w", encoding="utf-8") as failures_file:
+        pending = {}
+
+        def record_failure(name, error):
+            nonlocal failed
+            failed += 1
+            failures_file.write(json.dumps({"file": name, "error": error}) + "\n")
+            print(f"✗ {name}: {error}")
+
+        def collect(done):
+            nonlocal unlocked
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    future.result()
+                    unlocked += 1
+                except Exception as e:
+                    record_failure(name, str(e))
+
+        for name in pdf_files:
+            pdf_path = os.path.join(batch_input_folder, name)
+            output_filename = os.path.join(batch_output_folder, name)
+
+            try:
+                if pdf_has_encrypt_entry(pdf_path) is False:
+                    # Not encrypted: no round-trip needed
+                    shutil.copyfile(pdf_path, output_filename)
+                    skipped += 1
+                    continue
+                password = password_lookup(name)
+            except Exception as e:
+                record_failure(name, str(e))
+                continue
+            if not password:
+                record_failure(name, "no password found for this file")
+                continue
+
+            future = executor.submit(unlock_one_pdf, pdf_path, password, output_filename)
+            pending[future] = name
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch finished in {elapsed:.1f}s")
+    print(f"  Unlocked: {unlocked}, not encrypted (no API call): {skipped}, failed: {failed}")
+    print(f"Unlocked PDFs saved in: {batch_output_folder}")
+    if failed:
+        print(f"Failed documents listed in: {failures_path}")
+
+
 # Execute the main function when script is run directly
 if __name__ == "__main__":
-    main()
+    if batch_mode:
+        main_batch()
+    else:
+        main()
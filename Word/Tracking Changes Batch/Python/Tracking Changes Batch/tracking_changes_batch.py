@@ -0,0 +1,207 @@
+import base64
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+# API Configuration - PDF4me services for Word tracking changes
+api_key = "get the API key from https://dev.pdf4me.com/dashboard/#/api-keys"
+base_url = "https://api.pdf4me.com/"
+
+# Supported operations: API endpoint and the w:trackRevisions state the operation produces
+OPERATIONS = {
+    "enable": {"endpoint": "EnableTrackingChangesInWord", "target_state": True},
+    "disable": {"endpoint": "DisableTrackingChangesInWord", "target_state": False},
+    "get": {"endpoint": "GetTrackingChangesInWord", "target_state": None},
+}
+
+# WordprocessingML namespace used in word/settings.xml
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def read_track_revisions(docx_path):
+    """
+    Read the w:trackRevisions setting of a DOCX locally
+    Only the word/settings.xml member is decompressed; the rest of the package is not read
+
+    Returns:
+        bool: True if revisions are tracked, False otherwise
+    """
+    with zipfile.ZipFile(docx_path) as package:
+        try:
+            settings_xml = package.read("word/settings.xml")
+        except KeyError:
+            return False  # No settings part means default settings: tracking off
+
+    element = ET.fromstring(settings_xml).find(f"{{{W_NAMESPACE}}}trackRevisions")
+    if element is None:
+        return False
+    # An on/off property without w:val is on
+    value = element.get(f"{{{W_NAMESPACE}}}val", "true")
+    return value.lower() not in ("false", "0", "off")
+
+
+# Thread-local HTTP sessions so every worker reuses its own keep-alive connection
+thread_local = threading.local()
+
+
+def get_session():
+    """Return the calling thread's requests session, creating it on first use"""
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Basic {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.verify = False
+        thread_local.session = session
+    return thread_local.session
+
+
+def call_word_api(endpoint, docx_path):
+    """
+    Shared client for the three tracking-changes endpoints
+    Process: Encode document → Send API request → Poll for completion → Return the final response
+
+    Raises:
+        RuntimeError: If the API returns an error or processing times out
+    """
+    with open(docx_path, "rb") as f:
+        word_base64 = base64.b64encode(f.read()).decode("ascii")
+
+    payload = {
+        "docName": os.path.basename(docx_path),  # Document name
+        "docContent": word_base64,               # Base64 encoded Word document content
+        "async": True                            # For big files and too many calls async is recommended
+    }
+
+    session = get_session()
+    response = session.post(f"{base_url}api/v2/{endpoint}", json=payload, timeout=300)
+
+    if response.status_code == 202:
+        location_url = response.headers.get('Location')
+        if not location_url:
+            raise RuntimeError("No polling URL found in response")
+
+        # Retry logic for polling the result
+        max_retries = 10
+        retry_delay = 10
+        for attempt in range(max_retries):
+            time.sleep(retry_delay)
+            response = session.get(location_url, timeout=60)
+            if response.status_code != 202:
+                break
+        else:
+            raise RuntimeError("Processing did not complete after multiple retries")
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text[:200]}")
+    return response
+
+
+def process_document(operation, docx_path, output_folder):
+    """
+    Run one operation on one document
+    Enable/Disable are skipped when the document is already in the target state and copied unchanged
+
+    Returns:
+        dict: Report entry for the document
+    """
+    tracking = read_track_revisions(docx_path)
+    entry = {"file": os.path.basename(docx_path), "trackRevisions": tracking}
+    target_state = OPERATIONS[operation]["target_state"]
+
+    if target_state is not None and tracking == target_state:
+        shutil.copyfile(docx_path, os.path.join(output_folder, os.path.basename(docx_path)))
+        entry["status"] = "skipped"
+        return entry
+
+    response = call_word_api(OPERATIONS[operation]["endpoint"], docx_path)
+    if operation == "get":
+        entry["result"] = response.json()
+    else:
+        with open(os.path.join(output_folder, os.path.basename(docx_path)), "wb") as f:
+            f.write(response.content)
+    entry["status"] = "done"
+    return entry
+
+
+def run_tracking_changes_batch(operation, input_folder, output_folder, report_path, max_workers):
+    """
+    Run enable, disable or get over every DOCX in a folder
+    Process: Check w:trackRevisions locally → Call the API only where needed → Append each result to the JSONL report as it finishes
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{operation}', expected one of: {', '.join(OPERATIONS)}")
+
+    docx_files = (
+        entry.path for entry in os.scandir(input_folder)
+        if entry.is_file() and entry.name.lower().endswith(".docx") and not entry.name.startswith("~$")
+    )
+
+    started = time.time()
+    counts = {"done": 0, "skipped": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            open(report_path, "w", encoding="utf-8") as report:
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                docx_path = pending.pop(future)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    entry = {"file": os.path.basename(docx_path), "status": "failed", "error": str(e)}
+                    print(f"✗ {entry['file']}: {e}")
+                counts[entry["status"]] += 1
+                report.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            report.flush()
+
+        for docx_path in docx_files:
+            future = executor.submit(process_document, operation, docx_path, output_folder)
+            pending[future] = docx_path
+            if len(pending) >= max_workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    elapsed = time.time() - started
+    print(f"Batch '{operation}' finished in {elapsed:.1f}s")
+    print(f"  Processed: {counts['done']}, already in target state (no API call): {counts['skipped']}, "
+          f"failed: {counts['failed']}")
+    print(f"Report: {report_path}")
+    return counts
+
+
+def tracking_changes_batch():
+    """
+    Main function for the tracking changes batch
+    Runs one of enable / disable / get over a folder of Word documents
+    """
+    operation = "get"  # "enable", "disable" or "get"
+    input_folder = "documents"  # Folder with the DOCX files
+    output_folder = "Tracking_changes_outputs"  # Processed documents (enable/disable)
+    report_path = "Tracking_changes_report.jsonl"  # One line per document; includes tracking changes for "get"
+    max_workers = 8  # Concurrent API requests
+
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at {input_folder}")
+        return
+
+    if operation != "get":
+        os.makedirs(output_folder, exist_ok=True)
+
+    print(f"=== Tracking changes batch: {operation} ===")
+    run_tracking_changes_batch(operation, input_folder, output_folder, report_path, max_workers)
+
+
+# Run the function when script is executed directly
+if __name__ == "__main__":
+    tracking_changes_batch()